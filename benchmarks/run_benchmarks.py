@@ -0,0 +1,215 @@
+"""
+Pipeline benchmark suite
+Drives ThreatDetector, RealTimeAnalyzer feature extraction, prediction and
+the dashboard persistence paths with deterministic traffic profiles, and
+saves throughput / p50 / p99 / peak RSS as JSON for comparison between commits
+
+Usage:
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<old>.json
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import platform
+import resource
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Callable, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.traffic_profiles import PROFILES, generate_profile, to_detector_format  # noqa: E402
+from realtime_analyzer import RealTimeAnalyzer  # noqa: E402
+from threat_model import ThreatDetector  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+MODEL_PATH = os.path.join(ROOT, 'models', 'threat_detector.joblib')
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KB on Linux, bytes on macOS
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def measure(func: Callable, items: List, warmup: int = 3) -> Dict:
+    """
+    Call func once per item and summarize per-call latency
+
+    Args:
+        func: Callable taking one item
+        items: Inputs, one call each
+        warmup: Calls made before timing starts
+
+    Returns:
+        Dictionary with calls, throughput and latency percentiles
+    """
+    for item in items[:warmup]:
+        func(item)
+
+    latencies = np.empty(len(items), dtype=np.int64)
+    started = time.perf_counter_ns()
+    for i, item in enumerate(items):
+        t0 = time.perf_counter_ns()
+        func(item)
+        latencies[i] = time.perf_counter_ns() - t0
+    total_s = (time.perf_counter_ns() - started) / 1e9
+
+    us = latencies / 1000
+    return {
+        'calls': len(items),
+        'throughput_per_s': len(items) / total_s if total_s else 0.0,
+        'p50_us': float(np.percentile(us, 50)),
+        'p99_us': float(np.percentile(us, 99)),
+        'mean_us': float(us.mean()),
+        'peak_rss_mb': peak_rss_mb(),
+    }
+
+
+def bench_threat_detector(profile: str, num_packets: int) -> Dict:
+    """ThreatDetector.analyze_packet, including its threat log writes"""
+    packets = to_detector_format(generate_profile(profile, num_packets))
+    detector = ThreatDetector()
+    return measure(detector.analyze_packet, packets)
+
+
+def bench_feature_extraction(analyzer: RealTimeAnalyzer, profile: str, window: int, repeats: int) -> Dict:
+    """RealTimeAnalyzer.extract_flow_features over fixed-size packet windows"""
+    windows = [generate_profile(profile, window, seed=seed) for seed in range(repeats)]
+    result = measure(analyzer.extract_flow_features, windows)
+    result['packets_per_s'] = result['throughput_per_s'] * window
+    return result
+
+
+def bench_predict(analyzer: RealTimeAnalyzer, profile: str, window: int, repeats: int) -> Dict:
+    """RealTimeAnalyzer.predict_threat on precomputed window features"""
+    features = [analyzer.extract_flow_features(generate_profile(profile, window, seed=seed))
+                for seed in range(repeats)]
+    return measure(analyzer.predict_threat, features)
+
+
+def bench_persistence(analyzer: RealTimeAnalyzer, window: int, repeats: int) -> Dict:
+    """Dashboard writers: prediction JSON append and stats file rewrite"""
+    features = analyzer.extract_flow_features(generate_profile('normal', window))
+    predictions = [analyzer.predict_threat(features) for _ in range(repeats)]
+    return {
+        'save_prediction': measure(analyzer._save_prediction_for_dashboard, predictions),
+        'update_stats': measure(lambda _: analyzer._update_stats_for_dashboard(), predictions),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+
+def run_all(num_packets=2000, window=1000, repeats=50) -> Dict:
+    """
+    Run every benchmark in a scratch working directory
+
+    Args:
+        num_packets: Packets per profile for the per-packet detector benchmark
+        window: Packets per analysis window
+        repeats: Windows per feature/predict/persistence benchmark
+
+    Returns:
+        Nested results dictionary
+    """
+    results = {
+        'revision': git_revision(),
+        'timestamp': datetime.now().isoformat(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {'num_packets': num_packets, 'window': window, 'repeats': repeats},
+        'benchmarks': {},
+    }
+    bench = results['benchmarks']
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        # Detector and analyzer write under ./data; keep that out of the repo
+        os.chdir(scratch)
+        try:
+            rules = RealTimeAnalyzer(window_size=1, metrics_file=None)
+            model = RealTimeAnalyzer(window_size=1, model_path=MODEL_PATH, metrics_file=None) \
+                if os.path.exists(MODEL_PATH) else None
+
+            for profile in PROFILES:
+                print(f"⏱️  {profile}...")
+                bench[f"detector.analyze_packet[{profile}]"] = bench_threat_detector(profile, num_packets)
+                bench[f"analyzer.extract_flow_features[{profile}]"] = bench_feature_extraction(rules, profile, window, repeats)
+                bench[f"analyzer.predict_threat.rules[{profile}]"] = bench_predict(rules, profile, window, repeats)
+                if model is not None and model.model is not None:
+                    bench[f"analyzer.predict_threat.model[{profile}]"] = bench_predict(model, profile, window, repeats)
+
+            print("⏱️  persistence...")
+            for name, result in bench_persistence(rules, window, repeats).items():
+                bench[f"analyzer.persistence.{name}"] = result
+        finally:
+            os.chdir(cwd)
+
+    results['peak_rss_mb'] = peak_rss_mb()
+    return results
+
+
+def print_results(results: Dict, baseline: Dict = None):
+    """Print a results table, with speedup vs. a baseline run when given"""
+    base = (baseline or {}).get('benchmarks', {})
+    print(f"\n📊 Benchmarks @ {results['revision']} (peak RSS {results['peak_rss_mb']:.0f} MB)")
+    header = f"{'benchmark':58s} {'ops/s':>12s} {'p50 us':>10s} {'p99 us':>10s}"
+    if base:
+        header += f" {'p50 vs base':>12s}"
+    print(header)
+    for name, r in results['benchmarks'].items():
+        line = f"{name:58s} {r['throughput_per_s']:12.1f} {r['p50_us']:10.1f} {r['p99_us']:10.1f}"
+        if name in base:
+            line += f" {base[name]['p50_us'] / r['p50_us']:11.2f}x"
+        print(line)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="NetGuardAI pipeline benchmarks")
+    parser.add_argument("--packets", type=int, default=2000, help="Packets per detector run (default: 2000)")
+    parser.add_argument("--window", type=int, default=1000, help="Packets per analysis window (default: 1000)")
+    parser.add_argument("--repeats", type=int, default=50, help="Windows per benchmark (default: 50)")
+    parser.add_argument("--compare", default=None, help="Previous results JSON to compare against")
+    parser.add_argument("--output", default=None, help="Results path (default: benchmarks/results/<time>-<rev>.json)")
+    args = parser.parse_args()
+
+    # Threat warnings and per-window INFO logs would dominate the timings
+    logging.disable(logging.WARNING)
+
+    results = run_all(args.packets, args.window, args.repeats)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{results['revision']}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(results, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(results, baseline)
+    print(f"\n✅ Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,7 @@ No warnings, no sudo prompts, with real-time alerts
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.graph_objects as go
 import json
 import os
@@ -14,7 +15,14 @@ import time
 import subprocess
 import signal
 
-sys.path.insert(0, os.path.abspath('..'))
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.packet_archive import load_archived_packets, list_partitions
+from utils.tail_reader import CsvTailReader, JsonFileCache
+from utils.rollups import TrafficRollup, SIZE_BIN_EDGES
+from utils.downsample import histogram, lttb, minmax_decimate, MAX_POINTS
+from utils.control import ControlClient, ControlError
+from utils.pubsub import EventSubscriber, TOPIC_PREDICTIONS, TOPIC_STATS, TOPIC_PACKETS, TOPIC_ROLLUPS
 
 # Page config
 st.set_page_config(
@@ -64,54 +72,154 @@ PACKETS_LOG = os.path.join(base_dir, 'data', 'packets_log.csv')
 THREATS_LOG = os.path.join(base_dir, 'data', 'threat_logs.json')
 ML_PREDICTIONS = os.path.join(base_dir, 'data', 'ml_predictions.json')
 ML_STATS = os.path.join(base_dir, 'data', 'ml_stats.json')
+PACKETS_ARCHIVE = os.path.join(base_dir, 'data', 'archive')
+PACKET_ROLLUPS = os.path.join(base_dir, 'data', 'packet_rollups.json')
 
 # Session state
 if 'auto_refresh' not in st.session_state:
     st.session_state.auto_refresh = False
 if 'last_threat' not in st.session_state:
     st.session_state.last_threat = None
+if 'figure_cache' not in st.session_state:
+    st.session_state.figure_cache = {}
 
-def load_packets():
-    """Load packet data"""
-    if os.path.exists(PACKETS_LOG):
+@st.cache_resource
+def get_file_readers():
+    """Incremental readers shared across reruns (offsets/mtimes per file)"""
+    return {
+        'packets': CsvTailReader(PACKETS_LOG),
+        'predictions': JsonFileCache(ML_PREDICTIONS, default=[]),
+        'stats': JsonFileCache(ML_STATS, default={}),
+        'rollups': JsonFileCache(PACKET_ROLLUPS, default=None),
+    }
+
+@st.cache_resource
+def get_subscriber():
+    """Subscription to analyzer change events, shared across reruns"""
+    return EventSubscriber()
+
+def data_versions():
+    """Per-topic change counters: pub/sub events, or file mtimes when no publisher is running"""
+    subscriber = get_subscriber()
+    if subscriber.connected:
+        return subscriber.snapshot()
+    versions = {}
+    for topic, path in [(TOPIC_PREDICTIONS, ML_PREDICTIONS), (TOPIC_STATS, ML_STATS),
+                        (TOPIC_PACKETS, PACKETS_LOG), (TOPIC_ROLLUPS, PACKET_ROLLUPS)]:
         try:
-            df = pd.read_csv(PACKETS_LOG)
-            if 'Timestamp' in df.columns:
-                df['Timestamp'] = pd.to_datetime(df['Timestamp'])
-            return df
-        except:
-            pass
-    return pd.DataFrame()
+            versions[topic] = os.stat(path).st_mtime_ns
+        except OSError:
+            versions[topic] = None
+    return versions
+
+def cached_figure(name, topics, builder):
+    """Rebuild a figure only when one of its topics changed since it was last built"""
+    topics = topics if isinstance(topics, tuple) else (topics,)
+    version = tuple(st.session_state.data_versions.get(t) for t in topics)
+    cache = st.session_state.figure_cache
+    if name not in cache or cache[name][0] != version:
+        cache[name] = (version, builder())
+    return cache[name][1]
+
+# Streamlit >= 1.33 (experimental_fragment) / 1.37 (fragment); None on older versions
+fragment = getattr(st, 'fragment', None) or getattr(st, 'experimental_fragment', None)
+
+def live_section(topics, render):
+    """
+    Draw a page section into a placeholder that refreshes on its own
+    
+    With auto-refresh on, a small fragment polls the change counters of the
+    section's topics every 0.5s and redraws only this placeholder when one of
+    them changed; the rest of the page is not re-executed.
+    """
+    placeholder = st.empty()
+    with placeholder.container():
+        render()
+    if not st.session_state.auto_refresh or fragment is None:
+        return
+    
+    drawn = {t: st.session_state.data_versions.get(t) for t in topics}
+    
+    @fragment(run_every=0.5)
+    def watch_for_updates():
+        versions = data_versions()
+        changed = {t: versions.get(t) for t in topics}
+        if changed == drawn:
+            return
+        drawn.update(changed)
+        st.session_state.data_versions.update(changed)
+        with placeholder.container():
+            render()
+    
+    watch_for_updates()
+
+def load_packets():
+    """Load packet data (only rows appended since the last rerun are parsed)"""
+    try:
+        return get_file_readers()['packets'].read()
+    except:
+        return pd.DataFrame()
 
 def load_ml_predictions():
     """Load ML predictions"""
-    if os.path.exists(ML_PREDICTIONS):
-        try:
-            with open(ML_PREDICTIONS, 'r') as f:
-                data = json.load(f)
-                return data if isinstance(data, list) else [data]
-        except:
-            pass
-    return []
+    data = get_file_readers()['predictions'].load()
+    return data if isinstance(data, list) else [data]
 
 def load_ml_stats():
     """Load ML stats"""
-    if os.path.exists(ML_STATS):
-        try:
-            with open(ML_STATS, 'r') as f:
-                return json.load(f)
-        except:
-            pass
-    return {}
+    data = get_file_readers()['stats'].load()
+    return data if isinstance(data, dict) else {}
 
-def check_analyzer():
-    """Check if simulator is running"""
+def prediction_series(preds):
+    """Prediction times (datetime64) and confidences (%) for time-series charts, undated rows dropped"""
+    times = pd.to_datetime([p.get('timestamp') for p in preds], errors='coerce')
+    confs = np.array([p.get('confidence', 0) * 100 for p in preds], dtype=float)
+    valid = ~times.isna()
+    return times[valid].values, confs[valid], valid
+
+def load_rollup(packets_df):
+    """Load precomputed traffic rollups, building them from packets only as a fallback"""
+    data = get_file_readers()['rollups'].load()
+    if isinstance(data, dict):
+        return TrafficRollup.from_dict(data)
+    if not packets_df.empty:
+        return TrafficRollup.from_frame(packets_df)
+    return None
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def load_archive(partitions, start_hour):
+    """Archived packets from start_hour on (cached until the partition list changes)"""
+    return load_archived_packets(PACKETS_ARCHIVE, start=start_hour)
+
+def load_packet_range(live_df, start=None):
+    """Active segment plus archived partitions overlapping [start, now]"""
+    if not live_df.empty and start is not None and live_df['Timestamp'].min() <= start:
+        return live_df[live_df['Timestamp'] > start]
     try:
-        result = subprocess.run(['pgrep', '-f', 'live_simulator.py'], 
-                              capture_output=True, text=True)
-        return bool(result.stdout.strip())
+        # Hour granularity keeps the cache key stable across reruns
+        start_hour = pd.Timestamp(start).floor('h') if start is not None else None
+        archived = load_archive(tuple(list_partitions(PACKETS_ARCHIVE, start_hour)), start_hour)
     except:
-        return False
+        archived = pd.DataFrame()
+    if archived.empty:
+        df = live_df
+    else:
+        # Rows the tail reader kept from before a rotation are archived too
+        if not live_df.empty:
+            live_df = live_df[live_df['Timestamp'] > archived['Timestamp'].max()]
+        df = pd.concat([archived, live_df], ignore_index=True)
+    if start is not None and not df.empty:
+        df = df[df['Timestamp'] > start]
+    return df
+
+@st.cache_resource
+def get_control_client():
+    """Client for the analyzer's local control endpoint"""
+    return ControlClient()
+
+def check_analyzer():
+    """Check if simulator is running (one localhost request, no subprocess)"""
+    return get_control_client().status() is not None
 
 def start_analyzer():
     """Start live simulator - NO SUDO NEEDED!"""
@@ -124,18 +232,31 @@ def start_analyzer():
         subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, 
                         start_new_session=True)
         
+        # Wait for its control endpoint to come up
+        if not get_control_client().wait_until(running=True, timeout=5):
+            return False, "Simulator did not report healthy within 5s"
+        
         return True, "Live simulator started!"
     except Exception as e:
         return False, str(e)
 
 def stop_analyzer():
-    """Stop simulator - NO SUDO NEEDED"""
+    """Stop simulator gracefully - NO SUDO NEEDED"""
+    client = get_control_client()
+    status = client.status()
+    if status is None:
+        return True
+    
+    # Ask for a graceful stop (current batch is flushed), escalate to SIGTERM
     try:
-        # Kill simulator
-        subprocess.run(['pkill', '-9', '-f', 'live_simulator.py'], 
-                      capture_output=True)
-        time.sleep(0.3)
+        client.stop()
+    except ControlError as e:
+        st.warning(f"Graceful stop refused ({e.message}), sending SIGTERM")
+    if client.wait_until(running=False, timeout=5):
         return True
+    try:
+        os.kill(status['pid'], signal.SIGTERM)
+        return client.wait_until(running=False, timeout=2)
     except:
         return False
 
@@ -158,7 +279,7 @@ with st.sidebar:
     st.header("🎛️ Controls")
     
     # Auto-refresh
-    st.session_state.auto_refresh = st.toggle("🔄 Auto-Refresh (2s)", st.session_state.auto_refresh)
+    st.session_state.auto_refresh = st.toggle("🔄 Auto-Refresh (live)", st.session_state.auto_refresh)
     
     st.markdown("---")
     
@@ -199,47 +320,51 @@ with st.sidebar:
             else:
                 st.error("Failed")
 
-# ========== LOAD DATA ==========
-packets_df = load_packets()
-predictions = load_ml_predictions()
-stats = load_ml_stats()
+# ========== DATA VERSIONS ==========
+# Taken before any section loads, so a change that lands mid-load is picked up by the next poll
+st.session_state.data_versions = data_versions()
 
 # ========== THREAT ALERTS ==========
 st.markdown("---")
 
-if predictions:
-    latest = predictions[-1]
-    is_threat = latest.get('is_threat', False)
+def render_alert():
+    predictions = load_ml_predictions()
     
-    if is_threat:
-        threat_type = latest.get('threat_type', 'Unknown').upper()
-        confidence = latest.get('confidence', 0) * 100
-        timestamp = latest.get('timestamp', '')
-        
-        # Show alert
-        st.markdown(f"""
-        <div class="threat-box">
-            🚨 THREAT ALERT 🚨<br>
-            {threat_type}<br>
-            Confidence: {confidence:.1f}%<br>
-            {timestamp}
-        </div>
-        """, unsafe_allow_html=True)
+    if predictions:
+        latest = predictions[-1]
+        is_threat = latest.get('is_threat', False)
         
-        # Toast
-        if st.session_state.last_threat != threat_type:
-            st.toast(f"🚨 {threat_type} DETECTED!", icon="🚨")
-            st.session_state.last_threat = threat_type
+        if is_threat:
+            threat_type = latest.get('threat_type', 'Unknown').upper()
+            confidence = latest.get('confidence', 0) * 100
+            timestamp = latest.get('timestamp', '')
+            
+            # Show alert
+            st.markdown(f"""
+            <div class="threat-box">
+                🚨 THREAT ALERT 🚨<br>
+                {threat_type}<br>
+                Confidence: {confidence:.1f}%<br>
+                {timestamp}
+            </div>
+            """, unsafe_allow_html=True)
+            
+            # Toast
+            if st.session_state.last_threat != threat_type:
+                st.toast(f"🚨 {threat_type} DETECTED!", icon="🚨")
+                st.session_state.last_threat = threat_type
+        else:
+            confidence = latest.get('confidence', 0) * 100
+            st.markdown(f"""
+            <div class="normal-box">
+                ✅ System Normal (Confidence: {confidence:.1f}%)
+            </div>
+            """, unsafe_allow_html=True)
+            st.session_state.last_threat = None
     else:
-        confidence = latest.get('confidence', 0) * 100
-        st.markdown(f"""
-        <div class="normal-box">
-            ✅ System Normal (Confidence: {confidence:.1f}%)
-        </div>
-        """, unsafe_allow_html=True)
-        st.session_state.last_threat = None
-else:
-    st.info("🔄 Waiting for data... Generate sample data or start analyzer")
+        st.info("🔄 Waiting for data... Generate sample data or start analyzer")
+
+live_section((TOPIC_PREDICTIONS,), render_alert)
 
 st.markdown("---")
 
@@ -248,65 +373,74 @@ tab1, tab2, tab3, tab4, tab5 = st.tabs(["📊 Overview", "📡 Live Packets", "
 
 # ========== TAB 1: OVERVIEW ==========
 with tab1:
-    col1, col2, col3, col4 = st.columns(4)
-    
-    with col1:
-        total = stats.get('total_packets', len(packets_df))
-        st.metric("Packets", f"{total:,}")
-    
-    with col2:
-        preds = len(predictions)
-        st.metric("Predictions", f"{preds:,}")
-    
-    with col3:
-        threats = sum(1 for p in predictions if p.get('is_threat', False))
-        st.metric("Threats", threats)
-    
-    with col4:
-        if predictions:
-            ts = predictions[-1].get('timestamp', 'N/A')
-            if 'T' in ts:
-                ts = ts.split('T')[1][:8]
-            st.metric("Last Update", ts)
-        else:
-            st.metric("Last Update", "N/A")
-    
-    st.markdown("---")
-    
-    # Timeline chart
-    if predictions and len(predictions) > 1:
-        st.subheader("🔴 Live Activity")
+    def render_overview():
+        stats = load_ml_stats()
+        predictions = load_ml_predictions()
+        packets_df = load_packets()
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            total = stats.get('total_packets', len(packets_df))
+            st.metric("Packets", f"{total:,}")
         
-        times = []
-        confs = []
-        colors = []
+        with col2:
+            preds = len(predictions)
+            st.metric("Predictions", f"{preds:,}")
         
-        for p in predictions[-50:]:
-            ts = p.get('timestamp', '')
-            if 'T' in ts:
-                ts = ts.split('T')[1][:8]
-            times.append(ts)
-            confs.append(p.get('confidence', 0) * 100)
-            colors.append('#ff0000' if p.get('is_threat', False) else '#00cc00')
+        with col3:
+            threats = sum(1 for p in predictions if p.get('is_threat', False))
+            st.metric("Threats", threats)
         
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=times,
-            y=confs,
-            mode='lines+markers',
-            line=dict(color='#0066cc', width=2),
-            marker=dict(size=8, color=colors, line=dict(width=1, color='white'))
-        ))
+        with col4:
+            if predictions:
+                ts = predictions[-1].get('timestamp', 'N/A')
+                if 'T' in ts:
+                    ts = ts.split('T')[1][:8]
+                st.metric("Last Update", ts)
+            else:
+                st.metric("Last Update", "N/A")
         
-        fig.update_layout(
-            xaxis_title="Time",
-            yaxis_title="Confidence (%)",
-            height=350,
-            showlegend=False,
-            margin=dict(l=20, r=20, t=20, b=20)
-        )
+        st.markdown("---")
         
-        st.plotly_chart(fig, config={"displayModeBar": False})
+        # Timeline chart
+        if predictions and len(predictions) > 1:
+            st.subheader("🔴 Live Activity")
+            
+            def build_figure():
+                times, confs, valid = prediction_series(predictions)
+                is_threat = np.array([p.get('is_threat', False) for p in predictions], dtype=bool)[valid]
+                # Min/max decimation keeps every confidence spike within MAX_POINTS points;
+                # threat windows get their own marker trace, bounded the same way
+                x, y = minmax_decimate(times, confs, MAX_POINTS)
+                threat_x, threat_y = minmax_decimate(times[is_threat], confs[is_threat], MAX_POINTS)
+                fig = go.Figure()
+                fig.add_trace(go.Scatter(
+                    x=x,
+                    y=y,
+                    mode='lines',
+                    line=dict(color='#0066cc', width=2)
+                ))
+                fig.add_trace(go.Scatter(
+                    x=threat_x,
+                    y=threat_y,
+                    mode='markers',
+                    marker=dict(size=8, color='#ff0000', line=dict(width=1, color='white'))
+                ))
+                
+                fig.update_layout(
+                    xaxis_title="Time",
+                    yaxis_title="Confidence (%)",
+                    height=350,
+                    showlegend=False,
+                    margin=dict(l=20, r=20, t=20, b=20)
+                )
+                return fig
+            
+            fig = cached_figure('activity', TOPIC_PREDICTIONS, build_figure)
+            st.plotly_chart(fig, config={"displayModeBar": False})
+    
+    live_section((TOPIC_PREDICTIONS, TOPIC_STATS, TOPIC_PACKETS), render_overview)
 
 # ========== TAB 2: LIVE PACKETS ==========
 with tab2:
@@ -316,386 +450,437 @@ with tab2:
         ["Last 1 minute", "Last 5 minutes", "Last 15 minutes", "Last 1 hour", "All time"],
         index=1)
     
-    if not packets_df.empty:
+    def render_live_packets():
+        packets_df = load_packets()
         now = datetime.now()
         
         if time_filter == "Last 1 minute":
-            df = packets_df[packets_df['Timestamp'] > now - timedelta(minutes=1)]
+            df = load_packet_range(packets_df, now - timedelta(minutes=1))
         elif time_filter == "Last 5 minutes":
-            df = packets_df[packets_df['Timestamp'] > now - timedelta(minutes=5)]
+            df = load_packet_range(packets_df, now - timedelta(minutes=5))
         elif time_filter == "Last 15 minutes":
-            df = packets_df[packets_df['Timestamp'] > now - timedelta(minutes=15)]
+            df = load_packet_range(packets_df, now - timedelta(minutes=15))
         elif time_filter == "Last 1 hour":
-            df = packets_df[packets_df['Timestamp'] > now - timedelta(hours=1)]
+            df = load_packet_range(packets_df, now - timedelta(hours=1))
         else:
-            df = packets_df
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Packets", len(df))
-        with col2:
-            src = 'Src_IP' if 'Src_IP' in df.columns else 'Source IP'
-            st.metric("Unique IPs", df[src].nunique() if src in df.columns else 0)
-        with col3:
-            st.metric("Protocols", df['Protocol'].nunique())
-        with col4:
-            size = 'Size' if 'Size' in df.columns else 'Packet Size'
-            avg = df[size].mean() if size in df.columns else 0
-            st.metric("Avg Size", f"{avg:.0f}B")
-        
-        st.markdown("---")
-        st.subheader(f"🔴 Live: {len(df)} packets")
-        
-        display = df.sort_values('Timestamp', ascending=False).head(100)
-        st.dataframe(display, height=400)
-    else:
-        st.warning("No packets. Generate sample data or start analyzer.")
-
-# ========== TAB 3: ML ANALYSIS ==========
-with tab3:
-    st.header("🎯 ML Prediction Analysis")
-    
-    if predictions:
-        # Summary metrics
-        total_preds = len(predictions)
-        threat_preds = sum(1 for p in predictions if p.get('is_threat', False))
-        normal_preds = total_preds - threat_preds
-        threat_rate = (threat_preds / total_preds * 100) if total_preds > 0 else 0
-        
-        col1, col2, col3, col4 = st.columns(4)
-        with col1:
-            st.metric("Total Predictions", total_preds)
-        with col2:
-            st.metric("✅ Normal", normal_preds, delta=f"{(normal_preds/total_preds*100):.1f}%")
-        with col3:
-            st.metric("🚨 Threats", threat_preds, delta=f"{threat_rate:.1f}%", delta_color="inverse")
-        with col4:
-            avg_conf = sum(p.get('confidence', 0) for p in predictions) / len(predictions) * 100
-            st.metric("Avg Confidence", f"{avg_conf:.1f}%")
-        
-        st.markdown("---")
-        
-        # Prediction timeline
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📊 Prediction Distribution")
-            
-            fig = go.Figure(data=[go.Pie(
-                labels=['Normal', 'Threat'],
-                values=[normal_preds, threat_preds],
-                marker=dict(colors=['#00cc00', '#ff0000']),
-                hole=0.5
-            )])
-            
-            fig.update_layout(
-                height=300,
-                margin=dict(l=20, r=20, t=40, b=20),
-                annotations=[dict(text=f'{threat_rate:.1f}%<br>Threat Rate', x=0.5, y=0.5, font_size=16, showarrow=False)]
-            )
-            
-            st.plotly_chart(fig, config={"displayModeBar": False})
-        
-        with col2:
-            st.subheader("📈 Confidence Distribution")
-            
-            confidences = [p.get('confidence', 0) * 100 for p in predictions]
-            
-            fig = go.Figure(data=[go.Histogram(
-                x=confidences,
-                nbinsx=20,
-                marker=dict(color='#0066cc')
-            )])
-            
-            fig.update_layout(
-                xaxis_title="Confidence (%)",
-                yaxis_title="Count",
-                height=300,
-                margin=dict(l=20, r=20, t=40, b=20),
-                showlegend=False
-            )
-            
-            st.plotly_chart(fig, config={"displayModeBar": False})
+            df = load_packet_range(packets_df)
         
-        st.markdown("---")
-        
-        # Recent predictions
-        st.subheader("📋 Recent Predictions")
-        
-        for pred in reversed(predictions[-10:]):
-            is_threat = pred.get('is_threat', False)
-            threat_type = pred.get('threat_type', 'normal')
-            conf = pred.get('confidence', 0) * 100
-            ts = pred.get('timestamp', '')
-            
-            if 'T' in ts:
-                ts = ts.split('T')[1][:8]
-            
-            col1, col2, col3 = st.columns([2, 2, 1])
-            
+        if not df.empty:
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                if is_threat:
-                    st.error(f"🚨 **THREAT**: {threat_type.replace('_', ' ').upper()}")
-                else:
-                    st.success(f"✅ **NORMAL TRAFFIC**")
-            
+                st.metric("Packets", len(df))
             with col2:
-                st.write(f"**Confidence**: {conf:.1f}%")
-                st.progress(conf / 100)
-            
+                src = 'Src_IP' if 'Src_IP' in df.columns else 'Source IP'
+                st.metric("Unique IPs", df[src].nunique() if src in df.columns else 0)
             with col3:
-                st.caption(f"⏰ {ts}")
+                st.metric("Protocols", df['Protocol'].nunique())
+            with col4:
+                size = 'Size' if 'Size' in df.columns else 'Packet Size'
+                avg = df[size].mean() if size in df.columns else 0
+                st.metric("Avg Size", f"{avg:.0f}B")
             
             st.markdown("---")
-    else:
-        st.info("No predictions yet. Start analyzer to see ML analysis.")
-
-# ========== TAB 4: THREAT INTELLIGENCE ==========
-with tab4:
-    st.header("🚨 Threat Intelligence Dashboard")
+            st.subheader(f"🔴 Live: {len(df)} packets")
+            
+            display = df.sort_values('Timestamp', ascending=False).head(100)
+            st.dataframe(display, height=400)
+        else:
+            st.warning("No packets. Generate sample data or start analyzer.")
     
-    if predictions:
-        threats = [p for p in predictions if p.get('is_threat', False)]
+    live_section((TOPIC_PACKETS,), render_live_packets)
+
+# ========== TAB 3: ML ANALYSIS ==========
+with tab3:
+    def render_ml_analysis():
+        predictions = load_ml_predictions()
         
-        if threats:
-            # Threat metrics
-            col1, col2, col3, col4 = st.columns(4)
+        st.header("🎯 ML Prediction Analysis")
+        
+        if predictions:
+            # Summary metrics
+            total_preds = len(predictions)
+            threat_preds = sum(1 for p in predictions if p.get('is_threat', False))
+            normal_preds = total_preds - threat_preds
+            threat_rate = (threat_preds / total_preds * 100) if total_preds > 0 else 0
             
+            col1, col2, col3, col4 = st.columns(4)
             with col1:
-                st.metric("🚨 Total Threats", len(threats))
-            
+                st.metric("Total Predictions", total_preds)
             with col2:
-                # Threat types
-                threat_types = {}
-                for t in threats:
-                    tt = t.get('threat_type', 'unknown')
-                    threat_types[tt] = threat_types.get(tt, 0) + 1
-                most_common = max(threat_types, key=lambda x: threat_types[x]) if threat_types else "N/A"
-                st.metric("Most Common", str(most_common).replace('_', ' ').title())
-            
+                st.metric("✅ Normal", normal_preds, delta=f"{(normal_preds/total_preds*100):.1f}%")
             with col3:
-                avg_threat_conf = sum(t.get('confidence', 0) for t in threats) / len(threats) * 100
-                st.metric("Avg Threat Confidence", f"{avg_threat_conf:.1f}%")
-            
+                st.metric("🚨 Threats", threat_preds, delta=f"{threat_rate:.1f}%", delta_color="inverse")
             with col4:
-                recent_threats = len([t for t in threats[-10:] if t in threats[-5:]])
-                st.metric("Recent Threats (last 5)", recent_threats, delta="⚠️" if recent_threats > 2 else "✓")
+                avg_conf = sum(p.get('confidence', 0) for p in predictions) / len(predictions) * 100
+                st.metric("Avg Confidence", f"{avg_conf:.1f}%")
             
             st.markdown("---")
             
-            # Threat visualization
+            # Prediction timeline
             col1, col2 = st.columns(2)
             
             with col1:
-                st.subheader("🎯 Threat Types Distribution")
+                st.subheader("📊 Prediction Distribution")
                 
-                if threat_types:
-                    labels = [k.replace('_', ' ').title() for k in threat_types.keys()]
-                    values = list(threat_types.values())
-                    
-                    fig = go.Figure(data=[go.Bar(
-                        x=labels,
-                        y=values,
-                        marker=dict(color='#ff0000')
+                def build_figure():
+                    fig = go.Figure(data=[go.Pie(
+                        labels=['Normal', 'Threat'],
+                        values=[normal_preds, threat_preds],
+                        marker=dict(colors=['#00cc00', '#ff0000']),
+                        hole=0.5
                     )])
                     
                     fig.update_layout(
-                        xaxis_title="Threat Type",
-                        yaxis_title="Count",
                         height=300,
-                        margin=dict(l=20, r=20, t=20, b=20)
+                        margin=dict(l=20, r=20, t=40, b=20),
+                        annotations=[dict(text=f'{threat_rate:.1f}%<br>Threat Rate', x=0.5, y=0.5, font_size=16, showarrow=False)]
                     )
-                    
-                    st.plotly_chart(fig, config={"displayModeBar": False})
+                    return fig
+                
+                fig = cached_figure('prediction_pie', TOPIC_PREDICTIONS, build_figure)
+                st.plotly_chart(fig, config={"displayModeBar": False})
             
             with col2:
-                st.subheader("⚠️ Threat Severity Timeline")
+                st.subheader("📈 Confidence Distribution")
                 
-                # Create timeline of threats
-                times = []
-                confs = []
-                for t in threats[-20:]:
-                    ts = t.get('timestamp', '')
-                    if 'T' in ts:
-                        ts = ts.split('T')[1][:8]
-                    times.append(ts)
-                    confs.append(t.get('confidence', 0) * 100)
+                confidences = [p.get('confidence', 0) * 100 for p in predictions]
                 
-                fig = go.Figure()
-                fig.add_trace(go.Scatter(
-                    x=times,
-                    y=confs,
-                    mode='lines+markers',
-                    marker=dict(size=10, color='#ff0000'),
-                    line=dict(color='#ff0000', width=2),
-                    fill='tozeroy',
-                    fillcolor='rgba(255, 0, 0, 0.2)'
-                ))
-                
-                fig.update_layout(
-                    xaxis_title="Time",
-                    yaxis_title="Confidence (%)",
-                    height=300,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    showlegend=False
-                )
+                def build_figure():
+                    # Pre-binned on the server: 20 bars regardless of prediction count
+                    centers, counts, width = histogram(confidences, bins=20, value_range=(0, 100))
+                    fig = go.Figure(data=[go.Bar(
+                        x=centers,
+                        y=counts,
+                        width=width,
+                        marker=dict(color='#0066cc')
+                    )])
+                    
+                    fig.update_layout(
+                        xaxis_title="Confidence (%)",
+                        yaxis_title="Count",
+                        height=300,
+                        margin=dict(l=20, r=20, t=40, b=20),
+                        showlegend=False
+                    )
+                    return fig
                 
+                fig = cached_figure('confidence_hist', TOPIC_PREDICTIONS, build_figure)
                 st.plotly_chart(fig, config={"displayModeBar": False})
             
             st.markdown("---")
             
-            # Detailed threat list
-            st.subheader("📋 Threat Details")
+            # Recent predictions
+            st.subheader("📋 Recent Predictions")
             
-            threat_data = []
-            for t in reversed(threats[-15:]):
-                ts = t.get('timestamp', '')
+            for pred in reversed(predictions[-10:]):
+                is_threat = pred.get('is_threat', False)
+                threat_type = pred.get('threat_type', 'normal')
+                conf = pred.get('confidence', 0) * 100
+                ts = pred.get('timestamp', '')
+                
                 if 'T' in ts:
                     ts = ts.split('T')[1][:8]
                 
-                threat_data.append({
-                    'Time': ts,
-                    'Type': t.get('threat_type', 'unknown').replace('_', ' ').title(),
-                    'Confidence': f"{t.get('confidence', 0) * 100:.1f}%",
-                    'Severity': '🔴 High' if t.get('confidence', 0) > 0.8 else '🟠 Medium'
-                })
+                col1, col2, col3 = st.columns([2, 2, 1])
+                
+                with col1:
+                    if is_threat:
+                        st.error(f"🚨 **THREAT**: {threat_type.replace('_', ' ').upper()}")
+                    else:
+                        st.success(f"✅ **NORMAL TRAFFIC**")
+                
+                with col2:
+                    st.write(f"**Confidence**: {conf:.1f}%")
+                    st.progress(conf / 100)
+                    if pred.get('is_anomaly'):
+                        top = ', '.join(f['feature'] for f in pred.get('anomaly_features', []))
+                        st.caption(f"⚠️ Anomaly score {pred['anomaly_score']:.1f} ({top})")
+                
+                with col3:
+                    st.caption(f"⏰ {ts}")
+                
+                st.markdown("---")
+        else:
+            st.info("No predictions yet. Start analyzer to see ML analysis.")
+    
+    live_section((TOPIC_PREDICTIONS,), render_ml_analysis)
+
+# ========== TAB 4: THREAT INTELLIGENCE ==========
+with tab4:
+    def render_threat_intel():
+        predictions = load_ml_predictions()
+        
+        st.header("🚨 Threat Intelligence Dashboard")
+        
+        if predictions:
+            threats = [p for p in predictions if p.get('is_threat', False)]
             
-            if threat_data:
-                df_threats = pd.DataFrame(threat_data)
-                st.dataframe(df_threats, height=300, use_container_width=True)
+            if threats:
+                # Threat metrics
+                col1, col2, col3, col4 = st.columns(4)
+                
+                with col1:
+                    st.metric("🚨 Total Threats", len(threats))
+                
+                with col2:
+                    # Threat types
+                    threat_types = {}
+                    for t in threats:
+                        tt = t.get('threat_type', 'unknown')
+                        threat_types[tt] = threat_types.get(tt, 0) + 1
+                    most_common = max(threat_types, key=lambda x: threat_types[x]) if threat_types else "N/A"
+                    st.metric("Most Common", str(most_common).replace('_', ' ').title())
+                
+                with col3:
+                    avg_threat_conf = sum(t.get('confidence', 0) for t in threats) / len(threats) * 100
+                    st.metric("Avg Threat Confidence", f"{avg_threat_conf:.1f}%")
+                
+                with col4:
+                    recent_threats = len([t for t in threats[-10:] if t in threats[-5:]])
+                    st.metric("Recent Threats (last 5)", recent_threats, delta="⚠️" if recent_threats > 2 else "✓")
+                
+                st.markdown("---")
+                
+                # Threat visualization
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.subheader("🎯 Threat Types Distribution")
+                    
+                    if threat_types:
+                        labels = [k.replace('_', ' ').title() for k in threat_types.keys()]
+                        values = list(threat_types.values())
+                        
+                        def build_figure():
+                            fig = go.Figure(data=[go.Bar(
+                                x=labels,
+                                y=values,
+                                marker=dict(color='#ff0000')
+                            )])
+                            
+                            fig.update_layout(
+                                xaxis_title="Threat Type",
+                                yaxis_title="Count",
+                                height=300,
+                                margin=dict(l=20, r=20, t=20, b=20)
+                            )
+                            return fig
+                        
+                        fig = cached_figure('threat_types', TOPIC_PREDICTIONS, build_figure)
+                        st.plotly_chart(fig, config={"displayModeBar": False})
+                
+                with col2:
+                    st.subheader("⚠️ Threat Severity Timeline")
+                    
+                    def build_figure():
+                        # LTTB keeps the shape of the threat timeline within MAX_POINTS points
+                        times, confs, _ = prediction_series(threats)
+                        x, y = lttb(times, confs, MAX_POINTS)
+                        fig = go.Figure()
+                        fig.add_trace(go.Scatter(
+                            x=x,
+                            y=y,
+                            mode='lines+markers',
+                            marker=dict(size=10, color='#ff0000'),
+                            line=dict(color='#ff0000', width=2),
+                            fill='tozeroy',
+                            fillcolor='rgba(255, 0, 0, 0.2)'
+                        ))
+                        
+                        fig.update_layout(
+                            xaxis_title="Time",
+                            yaxis_title="Confidence (%)",
+                            height=300,
+                            margin=dict(l=20, r=20, t=20, b=20),
+                            showlegend=False
+                        )
+                        return fig
+                    
+                    fig = cached_figure('threat_timeline', TOPIC_PREDICTIONS, build_figure)
+                    st.plotly_chart(fig, config={"displayModeBar": False})
+                
+                st.markdown("---")
+                
+                # Detailed threat list
+                st.subheader("📋 Threat Details")
+                
+                threat_data = []
+                for t in reversed(threats[-15:]):
+                    ts = t.get('timestamp', '')
+                    if 'T' in ts:
+                        ts = ts.split('T')[1][:8]
+                    
+                    threat_data.append({
+                        'Time': ts,
+                        'Type': t.get('threat_type', 'unknown').replace('_', ' ').title(),
+                        'Confidence': f"{t.get('confidence', 0) * 100:.1f}%",
+                        'Severity': '🔴 High' if t.get('confidence', 0) > 0.8 else '🟠 Medium'
+                    })
+                
+                if threat_data:
+                    df_threats = pd.DataFrame(threat_data)
+                    st.dataframe(df_threats, height=300, use_container_width=True)
+            else:
+                st.success("🎉 No threats detected! System is secure.")
+                st.info("All network traffic appears normal. Continue monitoring for any anomalies.")
         else:
-            st.success("🎉 No threats detected! System is secure.")
-            st.info("All network traffic appears normal. Continue monitoring for any anomalies.")
-    else:
-        st.info("No threat data available yet. Start analyzer to begin threat monitoring.")
+            st.info("No threat data available yet. Start analyzer to begin threat monitoring.")
+    
+    live_section((TOPIC_PREDICTIONS,), render_threat_intel)
 
 # ========== TAB 5: ADVANCED STATISTICS ==========
 with tab5:
-    st.header("📈 Advanced Network Statistics")
-    
-    if not packets_df.empty:
-        col1, col2 = st.columns(2)
+    def render_advanced_stats():
+        st.header("📈 Advanced Network Statistics")
         
-        with col1:
-            # Protocol pie
-            proto = packets_df['Protocol'].value_counts()
-            
-            fig = go.Figure(data=[go.Pie(
-                labels=proto.index,
-                values=proto.values,
-                hole=0.4
-            )])
-            
-            fig.update_layout(
-                title="Protocols",
-                height=350,
-                margin=dict(l=20, r=20, t=40, b=20)
-            )
-            
-            st.plotly_chart(fig, config={"displayModeBar": False})
+        rollup = load_rollup(load_packets())
         
-        with col2:
-            # Top IPs
-            src = 'Src_IP' if 'Src_IP' in packets_df.columns else 'Source IP'
-            if src in packets_df.columns:
-                top = packets_df[src].value_counts().head(10)
-                
-                fig = go.Figure(data=[go.Bar(
-                    x=top.values,
-                    y=top.index,
-                    orientation='h',
-                    marker=dict(color='#0066cc')
-                )])
+        if rollup is not None and rollup.total_packets > 0:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                # Protocol pie
+                proto = rollup.protocol_counts.most_common()
                 
-                fig.update_layout(
-                    title="Top 10 IPs",
-                    xaxis_title="Count",
-                    height=350,
-                    margin=dict(l=20, r=20, t=40, b=20)
-                )
+                def build_figure():
+                    fig = go.Figure(data=[go.Pie(
+                        labels=[p for p, _ in proto],
+                        values=[c for _, c in proto],
+                        hole=0.4
+                    )])
+                    
+                    fig.update_layout(
+                        title="Protocols",
+                        height=350,
+                        margin=dict(l=20, r=20, t=40, b=20)
+                    )
+                    return fig
                 
+                fig = cached_figure('protocols', (TOPIC_ROLLUPS, TOPIC_PACKETS), build_figure)
                 st.plotly_chart(fig, config={"displayModeBar": False})
-        
-        st.markdown("---")
-        
-        # Additional charts
-        col1, col2 = st.columns(2)
-        
-        with col1:
-            st.subheader("📦 Packet Size Distribution")
-            size_col = 'Size' if 'Size' in packets_df.columns else 'Packet Size'
-            if size_col in packets_df.columns:
-                fig = go.Figure(data=[go.Histogram(
-                    x=packets_df[size_col],
-                    nbinsx=30,
-                    marker=dict(color='#109618')
-                )])
+            
+            with col2:
+                # Top IPs
+                top = rollup.src_ips.top(10)
                 
-                fig.update_layout(
-                    xaxis_title="Packet Size (bytes)",
-                    yaxis_title="Frequency",
-                    height=300,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    showlegend=False
-                )
+                def build_figure():
+                    fig = go.Figure(data=[go.Bar(
+                        x=[c for _, c in top],
+                        y=[ip for ip, _ in top],
+                        orientation='h',
+                        marker=dict(color='#0066cc')
+                    )])
+                    
+                    fig.update_layout(
+                        title="Top 10 IPs",
+                        xaxis_title="Count",
+                        height=350,
+                        margin=dict(l=20, r=20, t=40, b=20)
+                    )
+                    return fig
                 
+                fig = cached_figure('top_ips', (TOPIC_ROLLUPS, TOPIC_PACKETS), build_figure)
                 st.plotly_chart(fig, config={"displayModeBar": False})
-        
-        with col2:
-            st.subheader("🔢 Top Destination Ports")
-            dst_port_col = 'Dst_Port' if 'Dst_Port' in packets_df.columns else 'Destination Port'
-            if dst_port_col in packets_df.columns:
-                top_ports = packets_df[dst_port_col].value_counts().head(10)
+            
+            st.markdown("---")
+            
+            # Additional charts
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.subheader("📦 Packet Size Distribution")
+                edges = SIZE_BIN_EDGES
+                def build_figure():
+                    fig = go.Figure(data=[go.Bar(
+                        x=[(lo + min(hi, 1550)) / 2 for lo, hi in zip(edges[:-1], edges[1:])],
+                        y=rollup.size_hist.tolist(),
+                        width=50,
+                        marker=dict(color='#109618')
+                    )])
+                    
+                    fig.update_layout(
+                        xaxis_title="Packet Size (bytes)",
+                        yaxis_title="Frequency",
+                        height=300,
+                        margin=dict(l=20, r=20, t=20, b=20),
+                        showlegend=False
+                    )
+                    return fig
                 
-                fig = go.Figure(data=[go.Bar(
-                    x=top_ports.index.astype(str),
-                    y=top_ports.values,
-                    marker=dict(color='#dc3912')
-                )])
+                fig = cached_figure('packet_sizes', (TOPIC_ROLLUPS, TOPIC_PACKETS), build_figure)
+                st.plotly_chart(fig, config={"displayModeBar": False})
+            
+            with col2:
+                st.subheader("🔢 Top Destination Ports")
+                top_ports = rollup.dst_ports.top(10)
                 
-                fig.update_layout(
-                    xaxis_title="Port",
-                    yaxis_title="Count",
-                    height=300,
-                    margin=dict(l=20, r=20, t=20, b=20),
-                    showlegend=False
-                )
+                def build_figure():
+                    fig = go.Figure(data=[go.Bar(
+                        x=[port for port, _ in top_ports],
+                        y=[c for _, c in top_ports],
+                        marker=dict(color='#dc3912')
+                    )])
+                    
+                    fig.update_layout(
+                        xaxis_title="Port",
+                        xaxis_type='category',
+                        yaxis_title="Count",
+                        height=300,
+                        margin=dict(l=20, r=20, t=20, b=20),
+                        showlegend=False
+                    )
+                    return fig
                 
+                fig = cached_figure('top_ports', (TOPIC_ROLLUPS, TOPIC_PACKETS), build_figure)
                 st.plotly_chart(fig, config={"displayModeBar": False})
-        
-        st.markdown("---")
-        
-        # Traffic timeline
-        if 'Timestamp' in packets_df.columns:
-            st.subheader("📈 Network Traffic Over Time")
-            
-            packets_df['Minute'] = pd.to_datetime(packets_df['Timestamp']).dt.floor('1min')
-            traffic = packets_df.groupby('Minute').size().reset_index(name='count')
-            
-            fig = go.Figure()
-            fig.add_trace(go.Scatter(
-                x=traffic['Minute'],
-                y=traffic['count'],
-                mode='lines+markers',
-                marker=dict(size=6, color='#0066cc'),
-                line=dict(color='#0066cc', width=2),
-                fill='tozeroy',
-                fillcolor='rgba(0, 102, 204, 0.2)'
-            ))
             
-            fig.update_layout(
-                xaxis_title="Time",
-                yaxis_title="Packets per Minute",
-                height=300,
-                margin=dict(l=20, r=20, t=20, b=20),
-                showlegend=False
-            )
+            st.markdown("---")
             
-            st.plotly_chart(fig, config={"displayModeBar": False})
-    else:
-        st.info("No data for statistics")
+            # Traffic timeline
+            if rollup.minute_counts:
+                st.subheader("📈 Network Traffic Over Time")
+                
+                minutes = sorted(rollup.minute_counts)
+                
+                def build_figure():
+                    # LTTB keeps the shape of the timeline within MAX_POINTS points
+                    x, y = lttb(
+                        pd.to_datetime(minutes).values,
+                        [rollup.minute_counts[m] for m in minutes],
+                        MAX_POINTS
+                    )
+                    fig = go.Figure()
+                    fig.add_trace(go.Scatter(
+                        x=x,
+                        y=y,
+                        mode='lines+markers',
+                        marker=dict(size=6, color='#0066cc'),
+                        line=dict(color='#0066cc', width=2),
+                        fill='tozeroy',
+                        fillcolor='rgba(0, 102, 204, 0.2)'
+                    ))
+                    
+                    fig.update_layout(
+                        xaxis_title="Time",
+                        yaxis_title="Packets per Minute",
+                        height=300,
+                        margin=dict(l=20, r=20, t=20, b=20),
+                        showlegend=False
+                    )
+                    return fig
+                
+                fig = cached_figure('traffic_timeline', (TOPIC_ROLLUPS, TOPIC_PACKETS), build_figure)
+                st.plotly_chart(fig, config={"displayModeBar": False})
+        else:
+            st.info("No data for statistics")
+    
+    live_section((TOPIC_ROLLUPS, TOPIC_PACKETS), render_advanced_stats)
 
 # ========== AUTO REFRESH ==========
-if st.session_state.auto_refresh:
-    time.sleep(2)
+# Sections refresh themselves through live_section fragments; Streamlit
+# versions without fragments fall back to a full rerun on change
+if st.session_state.auto_refresh and fragment is None:
+    deadline = time.time() + 2
+    while time.time() < deadline and data_versions() == st.session_state.data_versions:
+        time.sleep(0.25)
     st.rerun()
@@ -1,3 +1,34 @@
+"""
+Window-level feature extraction shared by live analysis and training
+RealTimeAnalyzer featurizes the packets captured during each window and
+train_model featurizes tumbling windows of archived packet logs
+(featurize_windows), both with extract_flow_features, so training and live
+windows cover the same span and are computed by the same code
+"""
+
+from typing import Dict, List, Union
+
+import numpy as np
+import pandas as pd
+
+from utils.syn_flood import flag_array, TCP_SYN, TCP_ACK, TCP_RST, TCP_FIN
+
+# Model feature order (the column order the classifier is trained on)
+FEATURE_NAMES = [
+    'total_packets', 'unique_src_ips', 'unique_dst_ips', 'unique_src_ports',
+    'unique_dst_ports', 'total_bytes', 'mean_packet_size', 'max_packet_size',
+    'min_packet_size', 'std_packet_size', 'tcp_packets', 'udp_packets',
+    'icmp_packets', 'other_protocol_packets', 'http_packets', 'https_packets',
+    'dns_packets', 'ssh_packets', 'mean_ttl', 'min_ttl', 'max_ttl', 'duration',
+    'packets_per_second', 'max_src_ip_count', 'max_dst_ip_count',
+    'src_ip_entropy', 'dst_ip_entropy',
+    'syn_packets', 'ack_packets', 'rst_packets', 'fin_packets',
+    'syn_no_ack_ratio', 'max_half_open_per_dst',
+]
+
+PROTOCOL_NUMBERS = {'TCP': 6, 'UDP': 17, 'ICMP': 1}
+
+
 def extract_features(packet):
     """
     Extract basic features from scapy packet (expand later for ML).
@@ -6,4 +37,163 @@ def extract_features(packet):
         "packet_length": len(packet),
         "protocol": packet.proto if hasattr(packet, "proto") else None,
     }
-    return features
\ No newline at end of file
+    return features
+
+
+def default_features() -> Dict:
+    """Return default features when no packets available"""
+    return {name: 0 for name in FEATURE_NAMES}
+
+
+def calculate_entropy(series, weights=None):
+    """Calculate Shannon entropy of a series (optionally with per-row sample weights)"""
+    try:
+        value_counts = series.value_counts() if weights is None else weights.groupby(series).sum()
+        probabilities = value_counts / value_counts.sum()
+        entropy = -np.sum(probabilities * np.log2(probabilities + 1e-9))
+        return entropy
+    except:
+        return 0
+
+
+def extract_flow_features(packets: Union[List[Dict], pd.DataFrame]) -> Dict:
+    """
+    Extract aggregated flow-level features from packet window
+
+    Args:
+        packets: List of packet dictionaries (RealTimeAnalyzer._packet_callback
+            format) or a DataFrame with the same columns. An optional 'weight'
+            column (sampled capture) scales the count, volume and rate features
+            back to the unsampled traffic; distinct counts are not corrected
+
+    Returns:
+        Dictionary of extracted features
+    """
+    if len(packets) == 0:
+        return default_features()
+
+    # Convert to DataFrame for easier analysis
+    df = packets if isinstance(packets, pd.DataFrame) else pd.DataFrame(packets)
+    weights = df['weight'].fillna(1).astype(float) if 'weight' in df else None
+
+    def count(mask):
+        return mask.sum() if weights is None else weights[mask].sum()
+
+    # Basic statistics
+    features = {
+        # Packet count features
+        'total_packets': len(df) if weights is None else weights.sum(),
+        'unique_src_ips': df['src_ip'].nunique(),
+        'unique_dst_ips': df['dst_ip'].nunique(),
+        'unique_src_ports': df['src_port'].nunique() if 'src_port' in df else 0,
+        'unique_dst_ports': df['dst_port'].nunique() if 'dst_port' in df else 0,
+
+        # Size features
+        'total_bytes': df['size'].sum() if weights is None else (df['size'] * weights).sum(),
+        'mean_packet_size': df['size'].mean(),
+        'max_packet_size': df['size'].max(),
+        'min_packet_size': df['size'].min(),
+        'std_packet_size': df['size'].std() if len(df) > 1 else 0,
+
+        # Protocol distribution
+        'tcp_packets': count(df['protocol'] == 6),
+        'udp_packets': count(df['protocol'] == 17),
+        'icmp_packets': count(df['protocol'] == 1),
+        'other_protocol_packets': count((df['protocol'] != 6) &
+                                        (df['protocol'] != 17) &
+                                        (df['protocol'] != 1)),
+
+        # Port analysis (common ports)
+        'http_packets': count((df['dst_port'] == 80) | (df['src_port'] == 80)) if 'dst_port' in df else 0,
+        'https_packets': count((df['dst_port'] == 443) | (df['src_port'] == 443)) if 'dst_port' in df else 0,
+        'dns_packets': count((df['dst_port'] == 53) | (df['src_port'] == 53)) if 'dst_port' in df else 0,
+        'ssh_packets': count((df['dst_port'] == 22) | (df['src_port'] == 22)) if 'dst_port' in df else 0,
+
+        # TTL features
+        'mean_ttl': df['ttl'].mean() if 'ttl' in df else 0,
+        'min_ttl': df['ttl'].min() if 'ttl' in df else 0,
+        'max_ttl': df['ttl'].max() if 'ttl' in df else 0,
+
+        # Time-based features
+        'duration': (df['timestamp'].max() - df['timestamp'].min()).total_seconds() if len(df) > 1 else 0,
+        'packets_per_second': (len(df) if weights is None else weights.sum()) / max(1, (df['timestamp'].max() - df['timestamp'].min()).total_seconds()) if len(df) > 1 else 0,
+    }
+
+    # IP distribution analysis
+    if weights is None:
+        top_src_ip = df['src_ip'].value_counts().iloc[0]
+        top_dst_ip = df['dst_ip'].value_counts().iloc[0]
+    else:
+        top_src_ip = weights.groupby(df['src_ip']).sum().max()
+        top_dst_ip = weights.groupby(df['dst_ip']).sum().max()
+
+    features['max_src_ip_count'] = top_src_ip
+    features['max_dst_ip_count'] = top_dst_ip
+    features['src_ip_entropy'] = calculate_entropy(df['src_ip'], weights)
+    features['dst_ip_entropy'] = calculate_entropy(df['dst_ip'], weights)
+
+    # TCP flag analytics (uint8 bitfield; packet logs carry no flags, so these are 0 there)
+    flags = flag_array(df['flags']) if 'flags' in df else np.zeros(len(df), dtype=np.uint8)
+    syn = (flags & TCP_SYN) != 0
+    ack = (flags & TCP_ACK) != 0
+    w = np.ones(len(df)) if weights is None else weights.to_numpy()
+    features['syn_packets'] = int(w[syn].sum())
+    features['ack_packets'] = int(w[ack].sum())
+    features['rst_packets'] = int(w[(flags & TCP_RST) != 0].sum())
+    features['fin_packets'] = int(w[(flags & TCP_FIN) != 0].sum())
+    features['syn_no_ack_ratio'] = float(w[syn & ~ack].sum() / features['tcp_packets']) if features['tcp_packets'] else 0.0
+    # Stateful across windows: filled in by the analyzer's HalfOpenTable
+    features['max_half_open_per_dst'] = 0
+
+    return features
+
+
+def packets_from_log(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert canonical packet log rows (CSV or Parquet archive) into the
+    column layout extract_flow_features reads from live packet dicts
+
+    The packet log does not record TTL, so the TTL features of log windows are 0.
+
+    Args:
+        df: DataFrame with Timestamp, Src_IP, Dst_IP, Protocol, Src_Port, Dst_Port, Size
+
+    Returns:
+        DataFrame with timestamp, src_ip, dst_ip, protocol, src_port, dst_port, size
+    """
+    protocol = df['Protocol'].astype(str)
+    numbers = protocol.map(PROTOCOL_NUMBERS)
+    numbers = numbers.fillna(pd.to_numeric(protocol, errors='coerce'))
+
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(df['Timestamp'], errors='coerce', format='mixed'),
+        'src_ip': df['Src_IP'].astype(str),
+        'dst_ip': df['Dst_IP'].astype(str),
+        'protocol': numbers.fillna(0).astype('int64'),
+        'size': pd.to_numeric(df['Size'], errors='coerce').fillna(0).astype('int64'),
+        # Portless packets are None in live dicts, i.e. NaN in the window frame
+        'src_port': pd.to_numeric(df['Src_Port'], errors='coerce').astype('float64'),
+        'dst_port': pd.to_numeric(df['Dst_Port'], errors='coerce').astype('float64'),
+    }).dropna(subset=['timestamp'])
+
+
+def featurize_windows(packets: pd.DataFrame, window_size: float) -> pd.DataFrame:
+    """
+    Split packets into tumbling windows and featurize each one
+
+    Args:
+        packets: Frame from packets_from_log
+        window_size: Window length in seconds (the analyzer's --window)
+
+    Returns:
+        DataFrame with window_start plus one column per FEATURE_NAMES entry
+    """
+    if packets.empty:
+        return pd.DataFrame(columns=['window_start'] + FEATURE_NAMES)
+
+    window_start = packets['timestamp'].dt.floor(f"{window_size}s")
+    rows = []
+    for start, window in packets.groupby(window_start, sort=True):
+        features = extract_flow_features(window)
+        rows.append([start] + [features[name] for name in FEATURE_NAMES])
+    return pd.DataFrame(rows, columns=['window_start'] + FEATURE_NAMES)
@@ -7,14 +7,22 @@ import time
 import json
 import random
 import os
+import signal
+import threading
 from datetime import datetime
 from pathlib import Path
+from utils.packet_archive import start_compactor
+from utils.rollups import TrafficRollup, load_rollups
+from utils.pubsub import start_publisher, TOPIC_PREDICTIONS, TOPIC_STATS, TOPIC_PACKETS, TOPIC_ROLLUPS
+from utils.control import start_control_server
+from utils.loadgen import TrafficGenerator, LoadGenerator, CsvSink, PcapSink, parse_mix, to_frame
 
 # Get base directory
 base_dir = Path(__file__).parent
 ml_pred_file = base_dir / 'data' / 'ml_predictions.json'
 ml_stats_file = base_dir / 'data' / 'ml_stats.json'
 packets_file = base_dir / 'data' / 'packets_log.csv'
+rollups_file = base_dir / 'data' / 'packet_rollups.json'
 
 # Sample IPs
 IPS = ['192.168.1.100', '192.168.1.101', '192.168.1.102', '8.8.8.8', '1.1.1.1', 
@@ -62,20 +70,111 @@ def generate_prediction():
         }
     }
 
+def run_load_test(args, stop_event, rollup, publisher, stats):
+    """
+    High-rate load generation mode (--rate)
+    
+    Args:
+        args: Parsed command line arguments
+        stop_event: Event that ends the run
+        rollup: TrafficRollup updated per batch (CSV sink only)
+        publisher: EventPublisher or None
+        stats: Dict updated in place for the /stats control route
+    """
+    generator = TrafficGenerator(IPS, parse_mix(args.mix), seed=args.seed)
+    if args.sink == 'pcap':
+        sink = PcapSink(args.output or str(base_dir / 'data' / 'loadgen.pcap'))
+    else:
+        sink = CsvSink(args.output or str(packets_file))
+    load = LoadGenerator(generator, sink, args.rate, batch_interval=args.batch_interval)
+    
+    print(f"🚀 Load generator: {args.rate:,.0f} pps, mix {args.mix} -> {sink.path}")
+    
+    last_flush = time.time()
+    
+    def on_batch(batch):
+        nonlocal last_flush
+        stats['total_packets'] = load.total_packets
+        stats['achieved_pps'] = load.achieved_rate()
+        stats['late_batches'] = load.late_batches
+        if args.sink != 'csv':
+            return
+        
+        # The dashboard reads rollups, so keep them current at full rate
+        rollup.update_frame(to_frame(batch))
+        if time.time() - last_flush >= 2:
+            rollup.save(str(rollups_file))
+            if publisher:
+                publisher.publish(TOPIC_PACKETS, {'total_packets': load.total_packets})
+                publisher.publish(TOPIC_ROLLUPS)
+            print(f"📊 Packets: {load.total_packets:,} ({stats['achieved_pps']:,.0f} pps, "
+                  f"{load.late_batches} late batches)")
+            last_flush = time.time()
+    
+    load.run(duration=args.duration, stop_event=stop_event, on_batch=on_batch)
+    print(f"✅ Generated {load.total_packets:,} packets at {load.achieved_rate():,.0f} pps")
+
+
 def main():
     """Main loop - generates live data"""
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Live network traffic simulator")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Load-generation mode: packets per second (default: 0 = demo mode)")
+    parser.add_argument("--mix", default="normal=0.85,dos=0.05,port_scan=0.05,random_flood=0.05",
+                        help="Attack mix for --rate, e.g. 'normal=0.9,dos=0.1'")
+    parser.add_argument("--duration", type=float, default=None,
+                        help="Seconds to run in load mode (default: until stopped)")
+    parser.add_argument("--sink", choices=['csv', 'pcap'], default='csv',
+                        help="Load mode output: the packet log CSV or a pcap file (default: csv)")
+    parser.add_argument("--output", default=None,
+                        help="Load mode output path (default: data/packets_log.csv or data/loadgen.pcap)")
+    parser.add_argument("--batch-interval", type=float, default=0.1,
+                        help="Seconds of traffic generated per batch in load mode (default: 0.1)")
+    parser.add_argument("--seed", type=int, default=None, help="RNG seed for reproducible load")
+    args = parser.parse_args()
+    
     print("🚀 Live data simulator started")
-    print("📊 Generating packets every 2 seconds...")
+    if not args.rate:
+        print("📊 Generating packets every 2 seconds...")
     print("Press Ctrl+C to stop")
     
     # Ensure data directory exists
     os.makedirs(base_dir / 'data', exist_ok=True)
     
+    # Roll closed log segments into the Parquet archive in the background
+    compactor = start_compactor(
+        log_file=str(packets_file),
+        segment_dir=str(base_dir / 'data' / 'segments'),
+        archive_dir=str(base_dir / 'data' / 'archive')
+    )
+    
+    # Push change events to the dashboard
+    publisher = start_publisher()
+    
     predictions = []
     total_packets = 0
+    rollup = load_rollups(str(rollups_file)) or TrafficRollup()
+    stats = {'total_packets': 0, 'total_predictions': 0, 'threats_detected': 0}
+    last_write = None
+    
+    # Graceful stop: Ctrl+C, SIGTERM or POST /stop all finish the current batch
+    stop_event = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    
+    # Local control endpoint for the dashboard
+    control = start_control_server('live_simulator')
+    if control:
+        control.add_route('GET', '/health', lambda: {'ok': True, 'last_write': last_write})
+        control.add_route('GET', '/stats', lambda: stats)
+        control.add_route('POST', '/stop', lambda: stop_event.set() or {'stopping': True})
     
     try:
-        while True:
+        if args.rate:
+            run_load_test(args, stop_event, rollup, publisher, stats)
+        
+        while not args.rate and not stop_event.is_set():
             # Generate 5-10 packets
             num_packets = random.randint(5, 10)
             
@@ -86,6 +185,10 @@ def main():
                     line = f"{pkt['timestamp']},{pkt['src_ip']},{pkt['dst_ip']},{pkt['protocol']},{pkt['src_port']},{pkt['dst_port']},{pkt['size']}\n"
                     f.write(line)
                     total_packets += 1
+                    rollup.update(datetime.now(), pkt['src_ip'], pkt['protocol'], pkt['dst_port'], pkt['size'])
+            
+            # Save dashboard rollups
+            rollup.save(str(rollups_file))
             
             # Generate prediction
             pred = generate_prediction()
@@ -108,13 +211,30 @@ def main():
             
             with open(ml_stats_file, 'w') as f:
                 json.dump(stats, f, indent=2)
+            last_write = datetime.now().isoformat()
+            
+            if publisher:
+                publisher.publish(TOPIC_PACKETS, {'total_packets': total_packets})
+                publisher.publish(TOPIC_ROLLUPS)
+                publisher.publish(TOPIC_PREDICTIONS, pred)
+                publisher.publish(TOPIC_STATS, stats)
             
             print(f"📊 Packets: {total_packets}, Predictions: {len(predictions)}, Threats: {stats['threats_detected']}")
             
-            time.sleep(2)
+            stop_event.wait(2)
+        
+        print("\n✅ Stopped")
     
     except KeyboardInterrupt:
         print("\n✅ Stopped")
+    finally:
+        rollup.save(str(rollups_file))
+        if control:
+            control.close()
+        if publisher:
+            publisher.close()
+        if compactor:
+            compactor.stop()
 
 if __name__ == '__main__':
     main()
@@ -2,6 +2,7 @@ import argparse
 import logging
 from packet_capture import capture_packets
 from threat_model import ThreatDetector
+from utils.load_shedding import build_bpf_filter
 
 def main():
     logging.basicConfig(
@@ -15,21 +16,64 @@ def main():
     parser = argparse.ArgumentParser(description="NETGUARD-AI Packet Capture and Threat Detection")
     parser.add_argument(
         "--interface",
+        nargs="+",
         default=None,
-        help="Network interface to capture packets (default: system default)"
+        help="Network interface(s) to capture packets, sniffed together (default: system default)"
+    )
+    parser.add_argument(
+        "--bpf-exclude-net",
+        action="append",
+        default=[],
+        metavar="CIDR",
+        help="Drop traffic to/from this network in the kernel (repeatable)"
+    )
+    parser.add_argument(
+        "--bpf-exclude-port",
+        action="append",
+        type=int,
+        default=[],
+        metavar="PORT",
+        help="Drop TCP/UDP traffic on this port in the kernel (repeatable)"
+    )
+    parser.add_argument(
+        "--bpf",
+        default=None,
+        help="Extra BPF expression captured packets must match"
+    )
+    parser.add_argument(
+        "--count",
+        type=int,
+        default=0,
+        help="Stop after this many packets (default: 0, run until stopped)"
+    )
+    parser.add_argument(
+        "--duration",
+        type=float,
+        default=None,
+        help="Stop after this many seconds (default: run until stopped)"
+    )
+    parser.add_argument(
+        "--max-bytes",
+        type=int,
+        default=None,
+        help="Stop after this many captured bytes (default: run until stopped)"
     )
     args = parser.parse_args()
+    bpf_filter = build_bpf_filter(args.bpf_exclude_net, args.bpf_exclude_port, args.bpf)
 
     detector = ThreatDetector()
 
     try:
-        logging.info(f"📡 Capturing packets on interface: {args.interface or 'default'}")
-        capture_packets(detector, interface=args.interface)
+        logging.info(f"📡 Capturing packets on interface: {', '.join(args.interface or ['default'])}")
+        logging.info(f"🔎 Capture filter: {bpf_filter}")
+        capture_packets(detector, interface=args.interface, bpf_filter=bpf_filter,
+                        count=args.count, duration=args.duration, max_bytes=args.max_bytes)
     except KeyboardInterrupt:
         logging.warning("🛑 Packet capture stopped by user.")
     except Exception as e:
         logging.error(f"[!] Error during packet capture: {e}")
     finally:
+        detector.close()
         logging.info("✅ NETGUARD-AI System stopped.")
 
 if __name__ == "__main__":
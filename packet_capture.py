@@ -1,11 +1,46 @@
 # packet_capture.py
-from scapy.all import sniff, IP, TCP, UDP
+from scapy.all import AsyncSniffer, IP, TCP, UDP
 import logging
 import csv
 import os
+import time
+import threading
 from datetime import datetime
+from utils.packet_archive import start_compactor
+from utils.rollups import TrafficRollup, load_rollups
 
-def capture_packets(detector=None, interface=None):
+def stop_sniffer(sniffer, timeout=1.0):
+    """
+    Stop an AsyncSniffer without waiting for another packet to arrive
+
+    Returns True once the sniffer thread has exited (False if it is still
+    alive after timeout seconds).
+    """
+    deadline = time.monotonic() + timeout
+    while sniffer.thread and sniffer.thread.is_alive() and time.monotonic() < deadline:
+        try:
+            # Wakes the sniffer's select(); retried because a sniffer that has
+            # not entered its loop yet cannot be stopped
+            sniffer.stop(join=False)
+        except Exception:
+            pass
+        sniffer.thread.join(0.05)
+    return not (sniffer.thread and sniffer.thread.is_alive())
+
+def capture_packets(detector=None, interface=None, bpf_filter="ip", count=0, duration=None,
+                    max_bytes=None, stop_event=None):
+    """
+    Capture until a limit is reached, stop_event is set or Ctrl+C (default: run continuously)
+
+    Args:
+        detector: Optional ThreatDetector fed every packet
+        interface: Interface name or list of names (None = system default)
+        bpf_filter: Kernel capture filter (utils.load_shedding.build_bpf_filter)
+        count: Stop after this many packets (0 = no limit)
+        duration: Stop after this many seconds (None = no limit)
+        max_bytes: Stop after this many captured bytes (None = no limit)
+        stop_event: threading.Event that stops the capture when set
+    """
     logging.info("📡 Starting packet capture...")
 
     log_file = "data/packets_log.csv"
@@ -17,21 +52,37 @@ def capture_packets(detector=None, interface=None):
             writer = csv.writer(f)
             writer.writerow(["Timestamp", "Src_IP", "Dst_IP", "Protocol", "Src_Port", "Dst_Port", "Size"])
 
+    # Dashboard rollups, flushed to disk at most every 2 seconds
+    rollup = load_rollups() or TrafficRollup()
+    last_flush = time.time()
+    captured_packets = 0
+    captured_bytes = 0
+
     def process_packet(packet):
+        nonlocal last_flush, captured_packets, captured_bytes
         try:
             if IP in packet:
                 src_ip = packet[IP].src
                 dst_ip = packet[IP].dst
                 proto = packet[IP].proto
                 size = len(packet)
+                captured_packets += 1
+                captured_bytes += size
 
                 sport = packet[TCP].sport if TCP in packet else (packet[UDP].sport if UDP in packet else None)
                 dport = packet[TCP].dport if TCP in packet else (packet[UDP].dport if UDP in packet else None)
+                now = datetime.now()
 
                 # Save to CSV
                 with open(log_file, "a", newline="") as f:
                     writer = csv.writer(f)
-                    writer.writerow([datetime.now(), src_ip, dst_ip, proto, sport, dport, size])
+                    writer.writerow([now, src_ip, dst_ip, proto, sport, dport, size])
+
+                # Update dashboard rollups
+                rollup.update(now, src_ip, proto, dport, size)
+                if time.time() - last_flush >= 2:
+                    rollup.save()
+                    last_flush = time.time()
 
                 # Print live traffic info
                 print(f"{src_ip}:{sport} -> {dst_ip}:{dport} | Proto: {proto} | Size: {size} bytes")
@@ -45,5 +96,31 @@ def capture_packets(detector=None, interface=None):
         except Exception as e:
             logging.error(f"[!] Error analyzing packet: {e}")
 
-    sniff(prn=process_packet, iface=interface, store=False, filter="ip", count=5000)
-    logging.info("✅ Packet capture completed. Data saved in data/packets_log.csv.")
+    # Count and byte limits end the sniffer by itself. The loop below must poll anyway so
+    # stop_event and Ctrl+C can end capture early, so it enforces the duration as well
+    sniffer = AsyncSniffer(
+        prn=process_packet, iface=interface, store=False, filter=bpf_filter, count=count,
+        stop_filter=(lambda _: captured_bytes >= max_bytes) if max_bytes else None
+    )
+    stop_event = stop_event or threading.Event()
+    deadline = time.monotonic() + duration if duration else None
+
+    # Roll closed log segments into the Parquet archive in the background
+    compactor = start_compactor(log_file=log_file)
+
+    sniffer.start()
+    try:
+        # Short waits keep Ctrl+C responsive; the sniffer may also end early on count/bytes
+        while sniffer.thread.is_alive():
+            wait = 0.2 if deadline is None else min(0.2, deadline - time.monotonic())
+            if wait <= 0 or stop_event.wait(wait):
+                break
+    finally:
+        stop_sniffer(sniffer)
+        rollup.save()
+        if compactor:
+            compactor.stop()
+    if sniffer.exception is not None:
+        raise sniffer.exception
+    logging.info(f"✅ Packet capture completed ({captured_packets} packets, {captured_bytes} bytes). "
+                 f"Data saved in data/packets_log.csv.")
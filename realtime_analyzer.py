@@ -7,6 +7,7 @@ import time
 import logging
 import threading
 import queue
+import signal
 import json
 import os
 from collections import deque
@@ -14,7 +15,20 @@ from datetime import datetime
 from typing import Dict, List, Optional
 import numpy as np
 import pandas as pd
-from scapy.all import sniff, IP, TCP, UDP, ICMP
+from scapy.all import AsyncSniffer, IP, TCP, UDP, ICMP
+from packet_capture import stop_sniffer
+from utils.pubsub import start_publisher, TOPIC_PREDICTIONS, TOPIC_STATS
+from utils.control import start_control_server
+from utils.metrics import MetricsRegistry
+from utils.anomaly import EwmaAnomalyScorer
+from utils.host_baselines import HostBaselines, HOST_METRICS, BASELINES_FILE, is_internal_ip
+from utils.syn_flood import HalfOpenTable
+from utils.conntrack import ConnTracker, SESSIONS_FILE, session_features, append_sessions
+from utils.dns_tunnel import DnsTunnelDetector, parse_dns
+from utils.exfil import OutboundAccounting, OUTBOUND_FILE
+from utils.beacon import BeaconDetector
+from utils.load_shedding import AdaptiveSampler, build_bpf_filter
+from feature_extractor import FEATURE_NAMES, extract_flow_features, calculate_entropy, default_features
 
 # Setup logging
 logging.basicConfig(
@@ -23,36 +37,177 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S"
 )
 
+def _json_default(obj):
+    """Convert NumPy scalars (pandas aggregates in feature dicts) for json.dump"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+def _packet_clock() -> float:
+    """Current time in the clock of packet records (naive local datetimes as seconds)"""
+    return (pd.Timestamp.now() - pd.Timestamp(0)) / pd.Timedelta(seconds=1)
+
+class CaptureLane:
+    """
+    Capture worker for one interface: its own buffer, counters and window clock
+    """
+    
+    def __init__(self, interface=None, cpus=None, buffer_size=10000, anomaly_threshold=None, sampler=None):
+        """
+        Initialize the lane
+        
+        Args:
+            interface: Interface to sniff (None = system default)
+            cpus: CPU ids the capture thread is pinned to (None = no pinning)
+            buffer_size: Packets held until the next window (the oldest are dropped beyond this)
+            anomaly_threshold: Threshold of the lane's own anomaly scorer (None to disable)
+            sampler: AdaptiveSampler shedding load when the callback lags (None = keep every packet)
+        """
+        self.interface = interface
+        self.cpus = cpus
+        self.buffer = deque(maxlen=buffer_size)
+        # Interfaces see different traffic mixes, so each one keeps its own baseline
+        self.anomaly = EwmaAnomalyScorer(threshold=anomaly_threshold) if anomaly_threshold else None
+        self.sampler = sampler
+        self.sniffer = None
+        self.total_packets = 0
+        self.analyzed_upto = 0
+        self.last_window_at = time.perf_counter()
+        self.window_seconds = 0.0  # span of the last analyzed window
+        self.pps = 0.0
+        self.predictions = 0
+        self.threats = 0
+        self.thread = None
+        self.error = None
+        # Keeps the buffer and total_packets consistent for snapshot()
+        self._lock = threading.Lock()
+    
+    @property
+    def name(self) -> str:
+        return self.interface or 'default'
+    
+    def add(self, packet_data: Dict):
+        """Append one packet record (capture thread)"""
+        with self._lock:
+            self.buffer.append(packet_data)
+            self.total_packets += 1
+    
+    def drain(self):
+        """Take the buffered packets and the packet count they correspond to, read together"""
+        with self._lock:
+            packets = list(self.buffer)
+            self.buffer.clear()
+            return packets, self.total_packets
+    
+    def is_alive(self) -> bool:
+        return bool(self.thread and self.thread.is_alive())
+    
+    def get_status(self) -> Dict:
+        return {
+            'capturing': self.is_alive(),
+            'cpus': sorted(self.cpus) if self.cpus else None,
+            'total_packets': self.total_packets,
+            'packets_per_second': round(self.pps, 1),
+            'buffer_size': len(self.buffer),
+            'predictions': self.predictions,
+            'threats': self.threats,
+            'sampling': self.sampler.get_status() if self.sampler else None,
+            'error': self.error,
+        }
+
 class RealTimeAnalyzer:
     """
     Real-time network traffic analyzer with ML-based threat detection
     """
     
-    def __init__(self, window_size=5, model_path=None):
+    def __init__(self, window_size=5, model_path=None, metrics_file='data/metrics.prom',
+                 anomaly_threshold=3.0, baselines_file=BASELINES_FILE, sessions_file=SESSIONS_FILE,
+                 outbound_file=OUTBOUND_FILE, capture_filter="ip", sampling=None, max_sample_rate=64,
+                 sampling_lag=0.5):
         """
         Initialize the real-time analyzer
         
         Args:
             window_size: Time window in seconds for feature aggregation
             model_path: Path to the trained ML model (joblib format)
+            metrics_file: Prometheus textfile rewritten every window (None to disable)
+            anomaly_threshold: anomaly_score that flags a window as anomalous (None to disable scoring)
+            baselines_file: Per-host baseline table loaded at startup and saved on stop (None = don't persist)
+            sessions_file: CSV archive of finished TCP/UDP sessions (None = don't archive)
+            outbound_file: Per-host outbound byte history loaded at startup and saved on stop (None = don't persist)
+            capture_filter: BPF expression applied in the kernel (utils.load_shedding.build_bpf_filter)
+            sampling: 'packet' or 'flow' to sample adaptively when the callback lags (None = never sample)
+            max_sample_rate: Largest 1-in-N sampling rate (a power of two)
+            sampling_lag: Callback lag (seconds) that doubles the sampling rate
         """
         self.window_size = window_size
         self.model_path = model_path
-        self.model = None
+        # (model, version) swapped as one reference so every prediction
+        # records the version of the model that actually scored it
+        self._serving = (None, None)
+        self.metrics_file = metrics_file
         
-        # Thread-safe queue for packet storage
-        self.packet_buffer = deque(maxlen=10000)
+        # One capture lane per interface (replaced by start()); predictions from all
+        # lanes merge into a single queue
+        self.anomaly_threshold = anomaly_threshold
+        self.capture_filter = capture_filter
+        self.sampling = sampling
+        self.max_sample_rate = max_sample_rate
+        self.sampling_lag = sampling_lag
+        self.lanes = [self._new_lane()]
+        # Shared window clock: lanes are drained together on each tick
+        self.last_tick_at = time.perf_counter()
         self.prediction_queue = queue.Queue(maxsize=1000)
         
         # Statistics
-        self.total_packets = 0
         self.total_predictions = 0
         self.threats_detected = 0
         
         # Control flags
         self.running = False
-        self.capture_thread = None
         self.analysis_thread = None
+        self._stop_event = threading.Event()  # wakes the analysis loop on stop()
+        
+        # Change events and control endpoint for the dashboard (started with the pipeline)
+        self.publisher = None
+        self.control = None
+        self.stop_requested = threading.Event()
+        self.last_prediction_at = None
+        
+        # Background retraining from analyst labels (enable_online_learning)
+        self.online = None
+        # Model directory watcher with rollback history (enable_model_registry)
+        self.registry = None
+        
+        # Per-internal-host limits; the global rule thresholds apply until a host is warmed up
+        self.baselines_file = baselines_file
+        self.host_baselines = HostBaselines(
+            defaults={'pps': 100, 'port_diversity': 50},
+            floors={'pps': 10, 'bytes_per_second': 100_000, 'fan_out': 20, 'port_diversity': 20},
+        )
+        if baselines_file:
+            self.host_baselines.load(baselines_file)
+        
+        # Unanswered SYNs per destination, carried across windows
+        self.half_open = HalfOpenTable()
+        
+        # TCP/UDP session state, fed each captured packet once
+        self.conntrack = ConnTracker()
+        self.sessions_file = sessions_file
+        
+        # Query-name statistics from DNS payloads parsed in the packet callback
+        self.dns = DnsTunnelDetector()
+        
+        # Internal -> external bytes per host in time buckets (slow exfiltration)
+        self.outbound_file = outbound_file
+        self.outbound = OutboundAccounting()
+        if outbound_file:
+            self.outbound.load(outbound_file)
+        
+        # Periodic internal -> external check-ins (scored in batch every minute)
+        self.beacons = BeaconDetector()
+        
+        self._init_metrics()
         
         # Load ML model if provided
         if model_path:
@@ -60,23 +215,152 @@ class RealTimeAnalyzer:
         
         logging.info(f"🛡️ RealTimeAnalyzer initialized (window={window_size}s)")
     
+    def _init_metrics(self):
+        """Register hot-path metrics (served on /metrics and written to metrics_file)"""
+        self.metrics = MetricsRegistry()
+        m = self.metrics
+        self.m_packets = m.counter('packets_total', 'IP packets captured')
+        self.m_sampled_out = m.counter('sampled_out_total', 'Packets skipped by load-shedding sampling')
+        self.m_callback_errors = m.counter('callback_errors_total', 'Packets dropped by callback errors')
+        self.m_buffer_drops = m.counter('buffer_drops_total', 'Packets evicted from the buffer before being analyzed')
+        self.m_queue_drops = m.counter('prediction_queue_drops_total', 'Predictions evicted from a full prediction queue')
+        self.m_predictions = m.counter('predictions_total', 'Windows analyzed')
+        self.m_threats = m.counter('threats_total', 'Windows predicted as threats')
+        self.m_anomalies = m.counter('anomalies_total', 'Windows flagged by the anomaly scorer')
+        self.m_callback = m.histogram('callback_seconds', 'Packet callback latency')
+        self.m_stage = m.histogram('stage_seconds', 'Per-stage latency (capture, feature, predict, sink)')
+        self.m_inference = m.histogram('inference_seconds', 'ML model inference time')
+        self.m_pipeline = m.histogram('pipeline_latency_seconds', 'Newest packet capture to sink completion')
+        self.m_pps = m.gauge('packets_per_second', 'Capture rate over the last window')
+        self.m_model_swaps = m.counter('model_swaps_total', 'Models hot-swapped into the analyzer')
+        m.gauge('buffer_size', 'Packets held in the buffers', lambda: self.buffer_size)
+        m.gauge('buffer_occupancy_ratio', 'Fill ratio of the fullest buffer',
+                lambda: max(len(lane.buffer) / lane.buffer.maxlen for lane in self.lanes))
+        m.gauge('prediction_queue_depth', 'Predictions waiting in the queue', lambda: self.prediction_queue.qsize())
+        m.gauge('sampling_rate', 'Highest 1-in-N sampling rate across interfaces',
+                lambda: max(lane.sampler.rate if lane.sampler else 1 for lane in self.lanes))
+    
+    def enable_profiling(self, profiler):
+        """
+        Instrument the hot loop with a StageProfiler (must run before start())
+        
+        Args:
+            profiler: utils.profiling.StageProfiler instance
+        """
+        profiler.wrap(self, '_packet_callback')
+        profiler.wrap(self, 'extract_flow_features')
+        profiler.wrap(self, 'predict_threat')
+        profiler.wrap(self, '_save_prediction_for_dashboard')
+        profiler.wrap(self, '_update_stats_for_dashboard')
+        profiler.wrap_window(self, '_analyze_window')
+    
+    def _new_lane(self, interface=None, cpus=None) -> CaptureLane:
+        sampler = None
+        if self.sampling:
+            sampler = AdaptiveSampler(mode=self.sampling, max_rate=self.max_sample_rate,
+                                      high_lag=self.sampling_lag, low_lag=self.sampling_lag / 10,
+                                      name=interface or 'default')
+        return CaptureLane(interface, cpus=cpus, anomaly_threshold=self.anomaly_threshold, sampler=sampler)
+    
+    @property
+    def total_packets(self) -> int:
+        return sum(lane.total_packets for lane in self.lanes)
+    
+    @property
+    def buffer_size(self) -> int:
+        return sum(len(lane.buffer) for lane in self.lanes)
+    
+    @property
+    def anomaly(self) -> Optional[EwmaAnomalyScorer]:
+        """Anomaly scorer of the first lane (each interface has its own)"""
+        return self.lanes[0].anomaly
+    
+    @property
+    def model(self):
+        """Model currently serving predictions (None = rule-based)"""
+        return self._serving[0]
+    
+    @property
+    def model_version(self) -> Optional[str]:
+        return self._serving[1]
+    
+    def enable_model_registry(self, **kwargs):
+        """
+        Hot-reload new model files from the model directory (must run before start())
+        
+        Args:
+            **kwargs: Passed to utils.model_registry.ModelRegistry
+        """
+        from utils.model_registry import ModelRegistry
+        self.registry = ModelRegistry(install=self._install_model, **kwargs)
+        if self.model is not None:
+            # The startup model is the rollback target for the first reload
+            self.registry.activate(self.model, self.model_version, source=self.model_path, validate=False)
+    
+    def enable_online_learning(self, **kwargs):
+        """
+        Retrain on labeled windows in the background and hot-swap the model
+        
+        Args:
+            **kwargs: Passed to utils.online_learning.OnlineModelUpdater
+        """
+        from utils.online_learning import OnlineModelUpdater
+        self.online = OnlineModelUpdater(
+            get_model=lambda: self.model,
+            set_model=self._swap_model,
+            **kwargs
+        )
+    
+    def _install_model(self, model, version: Optional[str]):
+        """Make a model live; predict_threat picks it up on its next call"""
+        # A single reference assignment, so in-flight predictions finish on the old model
+        self._serving = (model, version)
+        self.m_model_swaps.inc()
+    
+    def _swap_model(self, model, info: Dict):
+        """Install a model produced at runtime (online learning)"""
+        source = info.get('source', 'unknown')
+        # Derived versions name the artifact they started from, e.g. threat_detector-3f2a…+online-20251019142501
+        base = (self.model_version or 'model').split('+')[0]
+        version = info.get('version') or f"{base}+{source}-{datetime.now():%Y%m%d%H%M%S}"
+        if self.registry:
+            # Goes through validation and lands in the rollback history
+            self.registry.activate(model, version, source=source)
+        else:
+            self._install_model(model, version)
+            logging.info(f"🔁 Model swapped in: {version} ({source})")
+    
     def _load_model(self, model_path: str):
         """Load the trained ML model"""
         try:
             import joblib
-            self.model = joblib.load(model_path)
-            logging.info(f"✅ ML model loaded from {model_path}")
+            from utils.model_registry import model_version
+            self._serving = (joblib.load(model_path), model_version(model_path))
+            logging.info(f"✅ ML model {self.model_version} loaded from {model_path}")
         except Exception as e:
             logging.warning(f"⚠️ Could not load model: {e}")
             logging.warning("Using rule-based detection instead")
-            self.model = None
+            self._serving = (None, None)
     
-    def _packet_callback(self, packet):
+    def _packet_callback(self, packet, lane: Optional[CaptureLane] = None):
         """Callback function for each captured packet"""
+        started = time.perf_counter()
         try:
             if IP not in packet:
                 return
             
+            lane = lane or self.lanes[0]
+            weight = 1
+            if lane.sampler:
+                # Decide before parsing so skipped packets cost almost nothing
+                ip = packet[IP]
+                lane.sampler.observe_lag(time.time() - float(packet.time))
+                weight = lane.sampler.keep(ip.proto, ip.src, getattr(ip.payload, 'sport', None),
+                                           ip.dst, getattr(ip.payload, 'dport', None))
+                if not weight:
+                    self.m_sampled_out.inc()
+                    return
+            
             # Extract packet information
             packet_data = {
                 'timestamp': datetime.now(),
@@ -94,129 +378,87 @@ class RealTimeAnalyzer:
             if TCP in packet:
                 packet_data['src_port'] = packet[TCP].sport
                 packet_data['dst_port'] = packet[TCP].dport
-                packet_data['flags'] = str(packet[TCP].flags)
+                packet_data['flags'] = int(packet[TCP].flags)  # uint8 bitfield (utils.syn_flood.TCP_*)
             
             # UDP specific features
             elif UDP in packet:
                 packet_data['src_port'] = packet[UDP].sport
                 packet_data['dst_port'] = packet[UDP].dport
+                if packet_data['src_port'] == 53 or packet_data['dst_port'] == 53:
+                    # (qname, qtype, rcode, is_response) or None
+                    packet_data['dns'] = parse_dns(bytes(packet[UDP].payload))
             
             # ICMP specific features
             elif ICMP in packet:
                 packet_data['icmp_type'] = packet[ICMP].type
             
-            # Add to buffer
-            self.packet_buffer.append(packet_data)
-            self.total_packets += 1
+            if lane.sampler:
+                # Packets this one stands for; feature extraction scales counts by it
+                packet_data['weight'] = weight
+            
+            # Add to the interface's buffer
+            lane.add(packet_data)
+            self.m_packets.inc()
             
         except Exception as e:
+            self.m_callback_errors.inc()
             logging.error(f"Error processing packet: {e}")
+        finally:
+            elapsed = time.perf_counter() - started
+            self.m_callback.observe(elapsed)
+            self.m_stage.observe(elapsed, stage='capture')
+    
+    def _start_sniffer(self, lane: CaptureLane):
+        """Start an AsyncSniffer for one interface; stop() interrupts it without waiting for a packet"""
+        def pin():
+            # Runs in the sniffer thread and pins only that thread (Linux)
+            try:
+                os.sched_setaffinity(threading.get_native_id(), lane.cpus)
+            except (AttributeError, OSError) as e:
+                logging.warning(f"⚠️ Could not pin capture on {lane.name} to CPUs {sorted(lane.cpus)}: {e}")
+        
+        lane.sniffer = AsyncSniffer(
+            prn=lambda packet: self._packet_callback(packet, lane),
+            iface=lane.interface,
+            store=False,
+            filter=self.capture_filter,
+            started_callback=pin if lane.cpus else None
+        )
+        lane.sniffer.start()
     
-    def _capture_packets(self, interface=None):
-        """Continuous packet capture in a separate thread"""
-        logging.info("📡 Starting packet capture thread...")
+    def _capture_packets(self, lane: CaptureLane):
+        """Wait on one interface's sniffer and handle its failure"""
+        logging.info(f"📡 Starting packet capture thread on {lane.name}...")
         try:
-            sniff(
-                prn=self._packet_callback,
-                iface=interface,
-                store=False,
-                filter="ip",
-                stop_filter=lambda _: not self.running
-            )
+            lane.sniffer.join()
         except Exception as e:
-            logging.error(f"Packet capture error: {e}")
-            self.running = False
+            logging.error(f"Packet capture error on {lane.name}: {e}")
+            lane.error = str(e)
+            # Keep analyzing the other interfaces; stop only when none is left
+            if not any(l.is_alive() for l in self.lanes if l is not lane):
+                self.running = False
+                self._stop_event.set()
     
-    def extract_flow_features(self, packets: List[Dict]) -> Dict:
+    def extract_flow_features(self, packets) -> Dict:
         """
         Extract aggregated flow-level features from packet window
+        (shared with training via feature_extractor)
         
         Args:
-            packets: List of packet dictionaries
+            packets: List of packet dictionaries or a DataFrame of them
             
         Returns:
             Dictionary of extracted features
         """
-        if not packets:
-            return self._get_default_features()
-        
-        # Convert to DataFrame for easier analysis
-        df = pd.DataFrame(packets)
-        
-        # Basic statistics
-        features = {
-            # Packet count features
-            'total_packets': len(df),
-            'unique_src_ips': df['src_ip'].nunique(),
-            'unique_dst_ips': df['dst_ip'].nunique(),
-            'unique_src_ports': df['src_port'].nunique() if 'src_port' in df else 0,
-            'unique_dst_ports': df['dst_port'].nunique() if 'dst_port' in df else 0,
-            
-            # Size features
-            'total_bytes': df['size'].sum(),
-            'mean_packet_size': df['size'].mean(),
-            'max_packet_size': df['size'].max(),
-            'min_packet_size': df['size'].min(),
-            'std_packet_size': df['size'].std() if len(df) > 1 else 0,
-            
-            # Protocol distribution
-            'tcp_packets': (df['protocol'] == 6).sum(),
-            'udp_packets': (df['protocol'] == 17).sum(),
-            'icmp_packets': (df['protocol'] == 1).sum(),
-            'other_protocol_packets': ((df['protocol'] != 6) & 
-                                      (df['protocol'] != 17) & 
-                                      (df['protocol'] != 1)).sum(),
-            
-            # Port analysis (common ports)
-            'http_packets': ((df['dst_port'] == 80) | (df['src_port'] == 80)).sum() if 'dst_port' in df else 0,
-            'https_packets': ((df['dst_port'] == 443) | (df['src_port'] == 443)).sum() if 'dst_port' in df else 0,
-            'dns_packets': ((df['dst_port'] == 53) | (df['src_port'] == 53)).sum() if 'dst_port' in df else 0,
-            'ssh_packets': ((df['dst_port'] == 22) | (df['src_port'] == 22)).sum() if 'dst_port' in df else 0,
-            
-            # TTL features
-            'mean_ttl': df['ttl'].mean() if 'ttl' in df else 0,
-            'min_ttl': df['ttl'].min() if 'ttl' in df else 0,
-            'max_ttl': df['ttl'].max() if 'ttl' in df else 0,
-            
-            # Time-based features
-            'duration': (df['timestamp'].max() - df['timestamp'].min()).total_seconds() if len(df) > 1 else 0,
-            'packets_per_second': len(df) / max(1, (df['timestamp'].max() - df['timestamp'].min()).total_seconds()) if len(df) > 1 else 0,
-        }
-        
-        # IP distribution analysis
-        top_src_ip = df['src_ip'].value_counts().iloc[0] if len(df) > 0 else 0
-        top_dst_ip = df['dst_ip'].value_counts().iloc[0] if len(df) > 0 else 0
-        
-        features['max_src_ip_count'] = top_src_ip
-        features['max_dst_ip_count'] = top_dst_ip
-        features['src_ip_entropy'] = self._calculate_entropy(df['src_ip'])
-        features['dst_ip_entropy'] = self._calculate_entropy(df['dst_ip'])
-        
-        return features
+        return extract_flow_features(packets)
     
     def _calculate_entropy(self, series):
         """Calculate Shannon entropy of a series"""
-        try:
-            value_counts = series.value_counts()
-            probabilities = value_counts / len(series)
-            entropy = -np.sum(probabilities * np.log2(probabilities + 1e-9))
-            return entropy
-        except:
-            return 0
+        return calculate_entropy(series)
     
     def _get_default_features(self) -> Dict:
         """Return default features when no packets available"""
-        return {
-            'total_packets': 0, 'unique_src_ips': 0, 'unique_dst_ips': 0,
-            'unique_src_ports': 0, 'unique_dst_ports': 0, 'total_bytes': 0,
-            'mean_packet_size': 0, 'max_packet_size': 0, 'min_packet_size': 0,
-            'std_packet_size': 0, 'tcp_packets': 0, 'udp_packets': 0,
-            'icmp_packets': 0, 'other_protocol_packets': 0, 'http_packets': 0,
-            'https_packets': 0, 'dns_packets': 0, 'ssh_packets': 0,
-            'mean_ttl': 0, 'min_ttl': 0, 'max_ttl': 0, 'duration': 0,
-            'packets_per_second': 0, 'max_src_ip_count': 0,
-            'max_dst_ip_count': 0, 'src_ip_entropy': 0, 'dst_ip_entropy': 0
-        }
+        return default_features()
     
     def predict_threat(self, features: Dict) -> Dict:
         """
@@ -236,23 +478,28 @@ class RealTimeAnalyzer:
             'features': features
         }
         
-        if self.model is not None:
+        # Read the reference once: a hot swap mid-call must not mix two models
+        model, version = self._serving
+        if model is not None:
             # ML-based prediction
             try:
-                # Prepare features for model (ensure correct order)
-                feature_values = [features.get(k, 0) for k in sorted(features.keys())]
-                X = np.array(feature_values).reshape(1, -1)
+                # Prepare features in the column order the model was trained on
+                names = list(getattr(model, 'feature_names_in_', FEATURE_NAMES))
+                X = pd.DataFrame([[features.get(k, 0) for k in names]], columns=names)
                 
                 # Get prediction
-                y_pred = self.model.predict(X)[0]
+                inference_started = time.perf_counter()
+                y_pred = model.predict(X)[0]
                 
                 # Get probability if available
-                if hasattr(self.model, 'predict_proba'):
-                    y_proba = self.model.predict_proba(X)[0]
+                if hasattr(model, 'predict_proba'):
+                    y_proba = model.predict_proba(X)[0]
                     prediction['confidence'] = float(y_proba[1]) if y_pred == 1 else float(y_proba[0])
+                self.m_inference.observe(time.perf_counter() - inference_started)
                 
                 prediction['is_threat'] = bool(y_pred == 1)
                 prediction['threat_type'] = 'ml_detected_threat' if y_pred == 1 else 'normal'
+                prediction['model_version'] = version
                 
             except Exception as e:
                 logging.error(f"ML prediction error: {e}")
@@ -270,8 +517,16 @@ class RealTimeAnalyzer:
         threat_type = 'normal'
         confidence = 0.0
         
+        # Rule 0: SYN flood (mostly unanswered SYNs, or many half-open connections to one host)
+        syn_flood = features.get('syn_packets', 0) > 100 and features.get('syn_no_ack_ratio', 0) > 0.8
+        if syn_flood or features.get('max_half_open_per_dst', 0) > 200:
+            is_threat = True
+            threat_type = 'syn_flood'
+            confidence = min(max(features.get('syn_no_ack_ratio', 0),
+                                 features.get('max_half_open_per_dst', 0) / 400), 1.0)
+        
         # Rule 1: High packet rate (possible DoS)
-        if features['packets_per_second'] > 100:
+        elif features['packets_per_second'] > 100:
             is_threat = True
             threat_type = 'possible_dos_attack'
             confidence = min(features['packets_per_second'] / 200, 1.0)
@@ -299,63 +554,297 @@ class RealTimeAnalyzer:
             'is_threat': is_threat,
             'threat_type': threat_type,
             'confidence': confidence,
-            'features': features
+            'features': features,
+            'model_version': 'rules'
         }
     
+    # Threat type reported when a host exceeds its own limit for a metric
+    HOST_THREAT_TYPES = {
+        'pps': 'possible_dos_attack',
+        'bytes_per_second': 'host_traffic_spike',
+        'fan_out': 'host_fan_out_spike',
+        'port_diversity': 'port_scan_detected',
+    }
+    
+    def _check_host_baselines(self, frame: pd.DataFrame, seconds: float) -> Dict[str, List[Dict]]:
+        """
+        Compare each internal source in the window with its own baseline, then learn from it
+        
+        Args:
+            frame: Packets captured since the previous tick, merged over all lanes
+            seconds: Time since the previous tick (the span frame covers)
+            
+        Returns:
+            Alerts per host, each list worst first
+        """
+        internal = frame[frame['src_ip'].map(is_internal_ip)]
+        if internal.empty:
+            return {}
+        
+        # Sampled capture: each kept packet stands for 'weight' packets (unsampled lanes
+        # leave it missing in the merged frame)
+        weight = internal['weight'].fillna(1) if 'weight' in internal else 1
+        per_host = internal.assign(packets=weight, bytes=internal['size'] * weight).groupby('src_ip').agg(
+            packets=('packets', 'sum'),
+            bytes=('bytes', 'sum'),
+            fan_out=('dst_ip', 'nunique'),
+            port_diversity=('dst_port', 'nunique'),
+        )
+        values = np.column_stack([
+            per_host['packets'] / seconds,
+            per_host['bytes'] / seconds,
+            per_host['fan_out'],
+            per_host['port_diversity'],
+        ])
+        limits = self.host_baselines.observe(per_host.index, values, time.time())
+        
+        alerts = {}
+        rows, cols = np.nonzero(values > limits)
+        for i, j in zip(rows, cols):
+            alerts.setdefault(per_host.index[i], []).append({
+                'host': per_host.index[i],
+                'metric': HOST_METRICS[j],
+                'value': float(values[i, j]),
+                'limit': float(limits[i, j]),
+            })
+        for host_alerts in alerts.values():
+            host_alerts.sort(key=lambda a: a['value'] / max(a['limit'], 1e-9), reverse=True)
+        return alerts
+    
+    def _check_outbound(self, packets: pd.DataFrame) -> List[Dict]:
+        """
+        Account new packets from internal hosts to external destinations
+        
+        Args:
+            packets: Packets not seen by a previous window
+            
+        Returns:
+            Exfiltration alerts from OutboundAccounting.check
+        """
+        now = time.time()
+        if not packets.empty:
+            outbound = packets[packets['src_ip'].map(is_internal_ip) & ~packets['dst_ip'].map(is_internal_ip)]
+            if not outbound.empty:
+                weight = outbound['weight'] if 'weight' in outbound else 1
+                sent = (outbound['size'] * weight).groupby(outbound['src_ip']).sum()
+                flows = outbound.drop_duplicates(['src_ip', 'dst_ip', 'dst_port']).groupby('src_ip').size()
+                self.outbound.add(sent.index, sent.to_numpy(), flows.reindex(sent.index).to_numpy(), now)
+        return self.outbound.check(now)
+    
     def _analysis_loop(self):
         """Continuous analysis loop in separate thread"""
         logging.info("🔍 Starting analysis thread...")
         
-        while self.running:
+        # Wait for window duration (stop() ends the wait immediately)
+        while not self._stop_event.wait(self.window_size):
+            for lane in self.lanes:
+                if lane.sampler:
+                    lane.sampler.adjust()
+            self._analysis_tick()
+    
+    def _analysis_tick(self):
+        """Drain every lane on the shared clock, check host baselines once, then analyze each lane"""
+        # Tumbling window: only the packets captured since the previous tick,
+        # the same windows featurize_windows builds for training
+        now = time.perf_counter()
+        seconds = max(now - self.last_tick_at, 1e-3)
+        self.last_tick_at = now
+        frames = []
+        for lane in self.lanes:
+            packets, total = lane.drain()
+            self._record_window_rate(lane, total, len(packets))
+            frames.append(pd.DataFrame(packets))
+        
+        # Host baselines are shared, so a host seen on several interfaces must be
+        # observed once per period at its full rate, not once per lane at partial rates
+        host_alerts = {}
+        started = time.perf_counter()
+        try:
+            active = [frame for frame in frames if not frame.empty]
+            if active:
+                host_alerts = self._check_host_baselines(pd.concat(active, ignore_index=True), seconds)
+        except Exception as e:
+            logging.error(f"Host baseline error: {e}")
+        self.m_stage.observe(time.perf_counter() - started, stage='baseline')
+        
+        for lane, frame in zip(self.lanes, frames):
             try:
-                # Wait for window duration
-                time.sleep(self.window_size)
-                
-                # Get packets from buffer
-                packets = list(self.packet_buffer)
-                
-                if len(packets) == 0:
-                    continue
-                
-                # Extract features
-                features = self.extract_flow_features(packets)
-                
-                # Predict threat
-                prediction = self.predict_threat(features)
-                
-                # Add to prediction queue
-                try:
-                    self.prediction_queue.put_nowait(prediction)
-                except queue.Full:
-                    # Remove oldest prediction and add new one
-                    try:
-                        self.prediction_queue.get_nowait()
-                        self.prediction_queue.put_nowait(prediction)
-                    except:
-                        pass
-                
-                self.total_predictions += 1
-                
-                if prediction['is_threat']:
-                    self.threats_detected += 1
-                    logging.warning(
-                        f"⚠️ THREAT DETECTED: {prediction['threat_type']} "
-                        f"(confidence: {prediction['confidence']:.2%})"
-                    )
-                else:
-                    logging.info(
-                        f"✅ Normal traffic (packets: {features['total_packets']}, "
-                        f"bytes: {features['total_bytes']})"
-                    )
-                
-                # Save prediction to file for dashboard
-                self._save_prediction_for_dashboard(prediction)
-                
-                # Update stats file for dashboard
-                self._update_stats_for_dashboard()
-                
+                self._analyze_window(lane, frame, host_alerts)
             except Exception as e:
-                logging.error(f"Analysis loop error: {e}")
+                logging.error(f"Analysis loop error on {lane.name}: {e}")
+    
+    def _analyze_window(self, lane: CaptureLane, frame: pd.DataFrame, host_alerts: Dict[str, List[Dict]]):
+        """
+        Featurize one interface's window, predict, and publish the result
+        
+        Args:
+            lane: Lane the window was drained from
+            frame: Packets captured on the lane since the previous tick
+            host_alerts: Host baseline alerts of this tick; the first lane carrying a host claims its alerts
+        """
+        # Age connection state every window, so a quiet link still forgets stale entries
+        now = _packet_clock()
+        self.half_open.expire(now)
+        self.conntrack.expire(now)
+        
+        if frame.empty:
+            # Sessions that timed out on the quiet link are still archived
+            sessions = self.conntrack.drain()
+            if self.sessions_file:
+                append_sessions(sessions, self.sessions_file)
+            return
+        
+        # Extract features
+        started = time.perf_counter()
+        features = self.extract_flow_features(frame)
+        half_open = self.half_open.update(frame)
+        features['max_half_open_per_dst'] = half_open['max_half_open_per_dst']
+        if 'weight' in frame:
+            # Sampled capture only tracks the kept share of half-open connections
+            features['max_half_open_per_dst'] *= frame['weight'].mean()
+        self.m_stage.observe(time.perf_counter() - started, stage='feature')
+        
+        started = time.perf_counter()
+        self.conntrack.update_frame(frame)
+        sessions = self.conntrack.drain()
+        self.m_stage.observe(time.perf_counter() - started, stage='conntrack')
+        
+        started = time.perf_counter()
+        if 'dns' in frame:
+            dns_packets = frame[frame['dns'].notna()]
+            for src, dst, dns in zip(dns_packets['src_ip'], dns_packets['dst_ip'], dns_packets['dns']):
+                self.dns.observe(src, dst, dns)
+        dns_alerts = self.dns.evaluate(time.time())
+        self.m_stage.observe(time.perf_counter() - started, stage='dns')
+        
+        started = time.perf_counter()
+        exfil_alerts = self._check_outbound(frame)
+        self.m_stage.observe(time.perf_counter() - started, stage='exfil')
+        
+        started = time.perf_counter()
+        self.beacons.observe(frame)
+        beacon_alerts = self.beacons.score(time.time())
+        self.m_stage.observe(time.perf_counter() - started, stage='beacon')
+        
+        # Predict threat
+        started = time.perf_counter()
+        prediction = self.predict_threat(features)
+        self.m_stage.observe(time.perf_counter() - started, stage='predict')
+        prediction['interface'] = lane.name
+        prediction['sessions'] = session_features(sessions)
+        if dns_alerts:
+            prediction['dns_alerts'] = dns_alerts
+            if not prediction['is_threat']:
+                prediction['is_threat'] = True
+                prediction['threat_type'] = dns_alerts[0]['type']
+                prediction['confidence'] = 0.8
+        if beacon_alerts:
+            prediction['beacon_alerts'] = beacon_alerts
+            if not prediction['is_threat']:
+                prediction['is_threat'] = True
+                prediction['threat_type'] = 'c2_beaconing'
+                prediction['confidence'] = max(0.5, 1 - min(a['cv'] for a in beacon_alerts))
+        if exfil_alerts:
+            prediction['exfil_alerts'] = exfil_alerts
+            if not prediction['is_threat']:
+                worst = max(exfil_alerts, key=lambda a: a['bytes'] / a['limit'])
+                prediction['is_threat'] = True
+                prediction['threat_type'] = 'data_exfiltration'
+                prediction['confidence'] = min(0.5 * worst['bytes'] / worst['limit'], 1.0)
+        
+        alerts = [a for host in frame['src_ip'].unique() for a in host_alerts.pop(host, ())]
+        if alerts:
+            alerts.sort(key=lambda a: a['value'] / max(a['limit'], 1e-9), reverse=True)
+            prediction['host_alerts'] = alerts
+            if not prediction['is_threat']:
+                worst = alerts[0]
+                prediction['is_threat'] = True
+                prediction['threat_type'] = self.HOST_THREAT_TYPES[worst['metric']]
+                prediction['confidence'] = min(0.5 * worst['value'] / max(worst['limit'], 1e-9), 1.0)
+        
+        if lane.anomaly:
+            started = time.perf_counter()
+            prediction.update(lane.anomaly.score(features))
+            if prediction['is_anomaly']:
+                self.m_anomalies.inc()
+            self.m_stage.observe(time.perf_counter() - started, stage='anomaly')
+        
+        sink_started = time.perf_counter()
+        
+        # Stable id so analysts can label this window later (online learning)
+        prediction['window_id'] = f"{datetime.now():%Y%m%d%H%M%S%f}-{self.total_predictions}"
+        if self.online:
+            self.online.record_window(prediction['window_id'], features)
+        
+        # Add to prediction queue
+        try:
+            self.prediction_queue.put_nowait(prediction)
+        except queue.Full:
+            # Remove oldest prediction and add new one
+            self.m_queue_drops.inc()
+            try:
+                self.prediction_queue.get_nowait()
+                self.prediction_queue.put_nowait(prediction)
+            except:
+                pass
+        
+        self.total_predictions += 1
+        lane.predictions += 1
+        self.m_predictions.inc()
+        self.last_prediction_at = datetime.now().isoformat()
+        
+        if prediction['is_threat']:
+            self.threats_detected += 1
+            lane.threats += 1
+            self.m_threats.inc()
+            logging.warning(
+                f"⚠️ THREAT DETECTED on {lane.name}: {prediction['threat_type']} "
+                f"(confidence: {prediction['confidence']:.2%})"
+            )
+        else:
+            logging.info(
+                f"✅ Normal traffic on {lane.name} (packets: {features['total_packets']}, "
+                f"bytes: {features['total_bytes']})"
+            )
+        
+        # Save prediction to file for dashboard
+        self._save_prediction_for_dashboard(prediction)
+        
+        # Archive finished sessions
+        if self.sessions_file:
+            append_sessions(sessions, self.sessions_file)
+        
+        # Update stats file for dashboard
+        self._update_stats_for_dashboard()
+        
+        # Notify subscribers that new data is available
+        if self.publisher:
+            self.publisher.publish(TOPIC_PREDICTIONS, prediction)
+            self.publisher.publish(TOPIC_STATS, self.get_statistics())
+        
+        self.m_stage.observe(time.perf_counter() - sink_started, stage='sink')
+        self.m_pipeline.observe((datetime.now() - frame['timestamp'].iloc[-1]).total_seconds())
+        
+        if self.metrics_file:
+            try:
+                self.metrics.write_textfile(self.metrics_file)
+            except Exception as e:
+                logging.error(f"Error writing metrics file: {e}")
+    
+    def _record_window_rate(self, lane: CaptureLane, total: int, analyzed: int) -> int:
+        """Update packets/sec and count packets evicted before they were analyzed; returns new packets"""
+        now = time.perf_counter()
+        new_packets = total - lane.analyzed_upto
+        
+        if new_packets > analyzed:
+            self.m_buffer_drops.inc(new_packets - analyzed)
+        lane.window_seconds = max(now - lane.last_window_at, 1e-3)
+        lane.pps = new_packets / lane.window_seconds
+        self.m_pps.set(sum(l.pps for l in self.lanes))
+        
+        lane.analyzed_upto = total
+        lane.last_window_at = now
+        return new_packets
     
     def _save_prediction_for_dashboard(self, prediction: Dict):
         """Save prediction to JSON file for dashboard consumption"""
@@ -379,7 +868,7 @@ class RealTimeAnalyzer:
             
             # Save back
             with open(predictions_file, 'w') as f:
-                json.dump(predictions, f, indent=2)
+                json.dump(predictions, f, indent=2, default=_json_default)
         except Exception as e:
             logging.error(f"Error saving prediction for dashboard: {e}")
     
@@ -395,8 +884,9 @@ class RealTimeAnalyzer:
                 'total_packets': self.total_packets,
                 'total_predictions': self.total_predictions,
                 'threats_detected': self.threats_detected,
-                'buffer_size': len(self.packet_buffer),
+                'buffer_size': self.buffer_size,
                 'prediction_queue_size': self.prediction_queue.qsize(),
+                'interfaces': {lane.name: lane.get_status() for lane in self.lanes},
                 'last_update': datetime.now().isoformat()
             }
             
@@ -405,21 +895,46 @@ class RealTimeAnalyzer:
         except Exception as e:
             logging.error(f"Error updating stats for dashboard: {e}")
     
-    def start(self, interface=None):
-        """Start the real-time analysis pipeline"""
+    def start(self, interface=None, pin_cpus=False):
+        """
+        Start the real-time analysis pipeline
+        
+        Args:
+            interface: Interface name, list of names (one capture thread each) or None for the default
+            pin_cpus: Pin each capture thread to its own CPU (round-robin over the allowed CPUs)
+        """
         if self.running:
             logging.warning("Analyzer already running")
             return
         
+        interfaces = [interface] if interface is None or isinstance(interface, str) else list(interface)
+        cpus = sorted(os.sched_getaffinity(0)) if pin_cpus and hasattr(os, 'sched_getaffinity') else []
+        self.lanes = [
+            self._new_lane(name, cpus={cpus[i % len(cpus)]} if cpus else None)
+            for i, name in enumerate(interfaces)
+        ]
+        self.last_tick_at = time.perf_counter()
+        
         self.running = True
+        self.stop_requested.clear()
+        self._stop_event.clear()
+        self.publisher = start_publisher()
+        self._start_control()
+        if self.online:
+            self.online.start()
+        if self.registry:
+            self.registry.start()
         
-        # Start capture thread
-        self.capture_thread = threading.Thread(
-            target=self._capture_packets,
-            args=(interface,),
-            daemon=True
-        )
-        self.capture_thread.start()
+        # Start one sniffer (and a thread watching it) per interface
+        for lane in self.lanes:
+            self._start_sniffer(lane)
+            lane.thread = threading.Thread(
+                target=self._capture_packets,
+                args=(lane,),
+                name=f"capture-{lane.name}",
+                daemon=True
+            )
+            lane.thread.start()
         
         # Start analysis thread
         self.analysis_thread = threading.Thread(
@@ -428,19 +943,91 @@ class RealTimeAnalyzer:
         )
         self.analysis_thread.start()
         
-        logging.info("🚀 Real-time analyzer started")
+        logging.info(f"🚀 Real-time analyzer started on {', '.join(lane.name for lane in self.lanes)}")
+    
+    def _start_control(self):
+        """Expose status/health/stats/stop on the local control endpoint"""
+        self.control = start_control_server('realtime_analyzer')
+        if not self.control:
+            return
+        self.control.add_route('GET', '/health', self.get_health)
+        self.control.add_route('GET', '/stats', self.get_statistics)
+        self.control.add_route('GET', '/metrics', self.metrics.render)
+        self.control.add_route('POST', '/stop', self.request_stop)
+        if self.online:
+            self.control.add_route('GET', '/online', self.online.get_status)
+        if self.anomaly:
+            self.control.add_route('GET', '/anomaly', lambda: {
+                lane.name: lane.anomaly.get_status() for lane in self.lanes
+            })
+        self.control.add_route('GET', '/baselines', self.host_baselines.get_status)
+        self.control.add_route('GET', '/half_open', self.half_open.get_status)
+        self.control.add_route('GET', '/conntrack', self.conntrack.get_status)
+        self.control.add_route('GET', '/dns', self.dns.get_status)
+        self.control.add_route('GET', '/outbound', self.outbound.get_status)
+        self.control.add_route('GET', '/beacons', self.beacons.get_status)
+        if self.registry:
+            self.control.add_route('GET', '/model', self.registry.get_status)
+            self.control.add_route('POST', '/model/rollback', self.registry.rollback)
+    
+    def request_stop(self) -> Dict:
+        """Ask the owner of the analyzer (main loop) to shut down gracefully"""
+        self.stop_requested.set()
+        return {'stopping': True}
+    
+    def get_health(self) -> Dict:
+        """Liveness of the capture/analysis threads"""
+        capture_alive = {lane.name: lane.is_alive() for lane in self.lanes}
+        analysis_alive = bool(self.analysis_thread and self.analysis_thread.is_alive())
+        return {
+            'ok': self.running and all(capture_alive.values()) and analysis_alive,
+            'capture_thread': all(capture_alive.values()),
+            'capture_threads': capture_alive,
+            'analysis_thread': analysis_alive,
+            'last_prediction': self.last_prediction_at
+        }
     
     def stop(self):
         """Stop the analysis pipeline gracefully"""
         logging.info("🛑 Stopping analyzer...")
+        was_running = self.running
         self.running = False
+        self._stop_event.set()
         
-        # Wait for threads to finish
-        if self.capture_thread:
-            self.capture_thread.join(timeout=5)
+        # Interrupt the sniffers (idle links included) and wait for threads to finish
+        for lane in self.lanes:
+            if lane.sniffer and not stop_sniffer(lane.sniffer):
+                logging.warning(f"⚠️ Capture on {lane.name} did not stop in time")
+            if lane.thread:
+                lane.thread.join(timeout=5)
         if self.analysis_thread:
             self.analysis_thread.join(timeout=5)
         
+        # Flush the partial windows so buffered packets are not lost
+        if was_running:
+            try:
+                self._analysis_tick()
+            except Exception as e:
+                logging.error(f"Error flushing final window: {e}")
+            self._update_stats_for_dashboard()
+        
+        if self.online:
+            self.online.stop()
+        if self.registry:
+            self.registry.stop()
+        if self.baselines_file:
+            self.host_baselines.save(self.baselines_file)
+        if self.sessions_file:
+            append_sessions(self.conntrack.flush(), self.sessions_file)
+        if self.outbound_file:
+            self.outbound.save(self.outbound_file)
+        if self.publisher:
+            self.publisher.close()
+            self.publisher = None
+        if self.control:
+            self.control.close()
+            self.control = None
+        
         logging.info("✅ Analyzer stopped")
     
     def get_latest_prediction(self) -> Optional[Dict]:
@@ -456,8 +1043,10 @@ class RealTimeAnalyzer:
             'total_packets': self.total_packets,
             'total_predictions': self.total_predictions,
             'threats_detected': self.threats_detected,
-            'buffer_size': len(self.packet_buffer),
-            'prediction_queue_size': self.prediction_queue.qsize()
+            'buffer_size': self.buffer_size,
+            'prediction_queue_size': self.prediction_queue.qsize(),
+            'model_version': self.model_version,
+            'interfaces': {lane.name: lane.get_status() for lane in self.lanes}
         }
 
 
@@ -468,8 +1057,52 @@ def main():
     parser = argparse.ArgumentParser(description="Real-time Network Traffic Analyzer")
     parser.add_argument(
         "--interface",
+        nargs="+",
+        default=None,
+        help="Network interface(s) to capture packets, one capture thread each (default: system default)"
+    )
+    parser.add_argument(
+        "--pin-cpus",
+        action="store_true",
+        help="Pin each interface's capture thread to its own CPU"
+    )
+    parser.add_argument(
+        "--bpf-exclude-net",
+        action="append",
+        default=[],
+        metavar="CIDR",
+        help="Drop traffic to/from this network in the kernel (repeatable)"
+    )
+    parser.add_argument(
+        "--bpf-exclude-port",
+        action="append",
+        type=int,
+        default=[],
+        metavar="PORT",
+        help="Drop TCP/UDP traffic on this port in the kernel (repeatable)"
+    )
+    parser.add_argument(
+        "--bpf",
         default=None,
-        help="Network interface to capture packets (default: system default)"
+        help="Extra BPF expression captured packets must match"
+    )
+    parser.add_argument(
+        "--sampling",
+        choices=["packet", "flow"],
+        default=None,
+        help="Sample 1-in-N packets or flows when the packet callback lags (default: never sample)"
+    )
+    parser.add_argument(
+        "--max-sample-rate",
+        type=int,
+        default=64,
+        help="With --sampling, largest N, a power of two (default: 64)"
+    )
+    parser.add_argument(
+        "--sampling-lag",
+        type=float,
+        default=0.5,
+        help="With --sampling, callback lag in seconds that doubles N (default: 0.5)"
     )
     parser.add_argument(
         "--window",
@@ -482,23 +1115,109 @@ def main():
         default=None,
         help="Path to trained ML model (joblib format)"
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time hot-loop stages and write a profile report to data/profile/ at exit"
+    )
+    parser.add_argument(
+        "--profile-sample",
+        type=int,
+        default=10,
+        help="With --profile, time 1 in N calls of each stage (default: 10)"
+    )
+    parser.add_argument(
+        "--profile-windows",
+        type=int,
+        default=0,
+        help="With --profile, run cProfile and tracemalloc for the first N windows (default: 0)"
+    )
+    parser.add_argument(
+        "--online-learning",
+        action="store_true",
+        help="Retrain on analyst-labeled windows in the background and hot-swap the model"
+    )
+    parser.add_argument(
+        "--labels-file",
+        default='data/window_labels.jsonl',
+        help="With --online-learning, JSONL of window labels (default: data/window_labels.jsonl)"
+    )
+    parser.add_argument(
+        "--anchor-data",
+        default=None,
+        help="With --online-learning, training set (CSV/.pkl with features + label) kept in every refit"
+    )
+    parser.add_argument(
+        "--retrain-interval",
+        type=int,
+        default=300,
+        help="With --online-learning, seconds between retraining checks (default: 300)"
+    )
+    parser.add_argument(
+        "--anomaly-threshold",
+        type=float,
+        default=3.0,
+        help="Anomaly score (RMS feature z-score vs. EWMA baseline) that flags a window; 0 disables (default: 3.0)"
+    )
+    parser.add_argument(
+        "--watch-models",
+        action="store_true",
+        help="Hot-reload new model files from the model directory (rollback via POST /model/rollback)"
+    )
+    parser.add_argument(
+        "--model-dir",
+        default=None,
+        help="With --watch-models, directory to watch (default: directory of --model, else models/)"
+    )
+    parser.add_argument(
+        "--model-poll",
+        type=float,
+        default=5.0,
+        help="With --watch-models, seconds between directory scans (default: 5)"
+    )
     args = parser.parse_args()
     
     # Create analyzer
     analyzer = RealTimeAnalyzer(
         window_size=args.window,
-        model_path=args.model
+        model_path=args.model,
+        anomaly_threshold=args.anomaly_threshold,
+        capture_filter=build_bpf_filter(args.bpf_exclude_net, args.bpf_exclude_port, args.bpf),
+        sampling=args.sampling,
+        max_sample_rate=args.max_sample_rate,
+        sampling_lag=args.sampling_lag
     )
+    if args.watch_models:
+        analyzer.enable_model_registry(
+            model_dir=args.model_dir or (os.path.dirname(args.model) if args.model else 'models') or '.',
+            poll_interval=args.model_poll
+        )
+    if args.online_learning:
+        analyzer.enable_online_learning(
+            labels_file=args.labels_file,
+            anchor_file=args.anchor_data,
+            retrain_interval=args.retrain_interval
+        )
+    signal.signal(signal.SIGTERM, lambda *_: analyzer.request_stop())
+    
+    profiler = None
+    if args.profile:
+        from utils.profiling import StageProfiler
+        profiler = StageProfiler(
+            sample_every=args.profile_sample,
+            profile_windows=args.profile_windows
+        )
+        analyzer.enable_profiling(profiler)
+        profiler.start()
     
     try:
         # Start analyzer
-        analyzer.start(interface=args.interface)
+        analyzer.start(interface=args.interface, pin_cpus=args.pin_cpus)
         
         logging.info("Press Ctrl+C to stop...")
         
-        # Keep running and print statistics periodically
-        while True:
-            time.sleep(10)
+        # Keep running and print statistics periodically (until Ctrl+C or POST /stop)
+        while not analyzer.stop_requested.wait(10):
             stats = analyzer.get_statistics()
             logging.info(
                 f"📊 Stats - Packets: {stats['total_packets']}, "
@@ -510,6 +1229,8 @@ def main():
         logging.info("\n🛑 Stopping analyzer...")
     finally:
         analyzer.stop()
+        if profiler:
+            profiler.finish()
         logging.info("👋 Goodbye!")
 
 
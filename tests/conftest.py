@@ -0,0 +1,6 @@
+"""pytest setup: make the repository root importable (run from the root: python -m pytest)"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
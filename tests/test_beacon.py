@@ -0,0 +1,94 @@
+"""Tests for utils.beacon"""
+
+import pandas as pd
+
+from utils.beacon import BeaconDetector
+
+
+def _check_ins(times, src='10.0.0.5', dst='93.184.216.10', dport=443):
+    return pd.DataFrame({
+        'timestamp': pd.to_datetime(times, unit='s'),
+        'src_ip': src, 'dst_ip': dst, 'dst_port': dport,
+    })
+
+
+def test_regular_check_ins_alert():
+    detector = BeaconDetector()
+    times = [1000.0 + 60 * i + (0.5 if i % 2 else 0.0) for i in range(12)]
+    detector.observe(_check_ins(times))
+    (alert,) = detector.score(now=times[-1], force=True)
+    assert alert['type'] == 'c2_beaconing'
+    assert (alert['src_ip'], alert['dst_ip'], alert['dst_port']) == ('10.0.0.5', '93.184.216.10', 443)
+    assert abs(alert['period_seconds'] - 60) < 1
+    # Not raised again within realert
+    assert detector.score(now=times[-1] + 120, force=True) == []
+
+
+def test_irregular_traffic_does_not_alert():
+    detector = BeaconDetector()
+    gaps = [3, 90, 15, 200, 7, 40, 130, 22, 60, 11]
+    times = [1000.0 + sum(gaps[:i]) for i in range(len(gaps) + 1)]
+    detector.observe(_check_ins(times))
+    assert detector.score(now=times[-1], force=True) == []
+
+
+def test_bursts_count_as_one_check_in():
+    detector = BeaconDetector(min_gap=1.0)
+    times = [t + offset for t in (1000.0, 1060.0, 1120.0) for offset in (0.0, 0.1, 0.2)]
+    detector.observe(_check_ins(times))
+    assert detector.count[detector.index[('10.0.0.5', '93.184.216.10', 443)]] == 3
+
+
+def test_burst_continuing_across_batches_is_one_check_in():
+    detector = BeaconDetector(min_gap=1.0)
+    detector.observe(_check_ins([1000.0, 1000.4]))
+    detector.observe(_check_ins([1000.8, 1061.0]))
+    assert detector.count[detector.index[('10.0.0.5', '93.184.216.10', 443)]] == 2
+
+
+def test_fast_polling_below_min_period_is_not_beaconing():
+    detector = BeaconDetector(min_period=5.0, min_gap=1.0)
+    detector.observe(_check_ins([1000.0 + 2 * i for i in range(20)]))
+    assert detector.score(now=1040.0, force=True) == []
+
+
+def test_ring_keeps_only_the_latest_check_ins():
+    detector = BeaconDetector(ring_size=8, min_events=8)
+    # Irregular history, then regular check-ins that fill the whole ring
+    early = [1000.0, 1003.0, 1090.0, 1100.0, 1290.0]
+    regular = [2000.0 + 30 * i for i in range(8)]
+    detector.observe(_check_ins(early + regular))
+    row = detector.index[('10.0.0.5', '93.184.216.10', 443)]
+    assert detector.count[row] == 13
+    assert sorted(detector.times[row]) == regular
+    (alert,) = detector.score(now=regular[-1], force=True)
+    assert alert['check_ins'] == 13
+
+
+def test_scoring_runs_at_most_every_score_interval():
+    detector = BeaconDetector(score_interval=60.0, realert=0.0)
+    detector.observe(_check_ins([1000.0 + 60 * i for i in range(10)]))
+    assert len(detector.score(now=2000.0)) == 1
+    assert detector.score(now=2030.0) == []
+    assert len(detector.score(now=2060.0)) == 1
+
+
+def test_portless_pairs_report_no_port():
+    detector = BeaconDetector()
+    detector.observe(_check_ins([1000.0 + 60 * i for i in range(10)], dport=None))
+    (alert,) = detector.score(now=2000.0, force=True)
+    assert alert['dst_port'] is None
+
+
+def test_internal_traffic_is_ignored():
+    detector = BeaconDetector()
+    detector.observe(_check_ins([1000.0 + 60 * i for i in range(12)], dst='10.0.0.9'))
+    assert len(detector) == 0
+
+
+def test_eviction_at_cap_drops_least_recently_active():
+    detector = BeaconDetector(max_pairs=2)
+    detector.observe(_check_ins([1000.0], dst='93.184.216.1'))
+    detector.observe(_check_ins([1010.0], dst='93.184.216.2'))
+    detector.observe(_check_ins([1020.0], dst='93.184.216.3'))
+    assert sorted(dst for _, dst, _ in detector.pairs) == ['93.184.216.2', '93.184.216.3']
@@ -0,0 +1,128 @@
+"""Tests for utils.conntrack"""
+
+import csv
+
+import pandas as pd
+
+from utils.conntrack import (ConnTracker, append_sessions, session_features, SESSION_FIELDS,
+                             ESTABLISHED, FIN_WAIT, SYN_RECV, SYN_SENT, UDP, PROTO_TCP, PROTO_UDP)
+from utils.syn_flood import TCP_SYN, TCP_ACK, TCP_FIN, TCP_RST
+
+CLIENT = ('10.0.0.5', 50000)
+SERVER = ('93.184.216.34', 443)
+KEY = (PROTO_TCP, *CLIENT, *SERVER)
+
+
+def send(tracker, t, flags, reply=False, size=60):
+    src, dst = (SERVER, CLIENT) if reply else (CLIENT, SERVER)
+    tracker.update(t, *src, *dst, PROTO_TCP, size, flags)
+
+
+def test_handshake_states_follow_both_directions():
+    tracker = ConnTracker()
+    send(tracker, 1000.0, TCP_SYN)
+    assert tracker.table[KEY].state == SYN_SENT
+    send(tracker, 1000.01, TCP_SYN | TCP_ACK, reply=True)
+    assert tracker.table[KEY].state == SYN_RECV
+    send(tracker, 1000.02, TCP_ACK)
+    conn = tracker.table[KEY]
+    assert conn.state == ESTABLISHED
+    assert (conn.orig_packets, conn.reply_packets) == (2, 1)
+
+
+def test_mid_stream_pickup_is_established():
+    tracker = ConnTracker()
+    send(tracker, 1000.0, TCP_ACK, size=1500)
+    assert tracker.table[KEY].state == ESTABLISHED
+
+
+def test_half_close_waits_for_the_other_side():
+    tracker = ConnTracker(timeouts={'CLOSED': 5})
+    send(tracker, 1000.0, TCP_ACK)
+    send(tracker, 1001.0, TCP_FIN | TCP_ACK)
+    assert tracker.table[KEY].state == FIN_WAIT
+    send(tracker, 1001.5, TCP_FIN | TCP_ACK, reply=True)
+    # Fully closed connections linger only for the short CLOSED timeout
+    tracker.expire(1007.0)
+    (session,) = tracker.drain()
+    assert (session['state'], session['close_reason']) == ('CLOSED', 'timeout')
+    assert session['end'] == pd.Timestamp(1001.5, unit='s').isoformat()
+
+
+def test_reset_from_the_server_closes_immediately():
+    tracker = ConnTracker()
+    send(tracker, 1000.0, TCP_SYN)
+    send(tracker, 1000.01, TCP_RST | TCP_ACK, reply=True)
+    (session,) = tracker.drain()
+    assert session['close_reason'] == 'reset'
+    assert len(tracker) == 0
+
+
+def test_expire_times_out_a_quiet_table_without_packets():
+    tracker = ConnTracker(timeouts={'UDP': 60})
+    tracker.update(1000.0, '10.0.0.5', 5353, '10.0.0.9', 53, PROTO_UDP, 80)
+    tracker.expire(1059.0)
+    assert tracker.drain() == []
+    tracker.expire(1061.0)
+    (session,) = tracker.drain()
+    assert (session['state'], session['close_reason']) == (UDP, 'timeout')
+    # The record ends at the last packet, not when expiry ran
+    assert session['end'] == pd.Timestamp(1000.0, unit='s').isoformat()
+    assert tracker.expired == 1
+
+
+def test_activity_reschedules_the_timer():
+    tracker = ConnTracker(timeouts={'UDP': 60})
+    for t in range(1000, 1300, 30):
+        tracker.update(float(t), '10.0.0.5', 5353, '10.0.0.9', 53, PROTO_UDP, 80)
+        tracker.expire(t + 1.0)
+    assert tracker.drain() == []
+
+
+def test_timeout_longer_than_the_wheel_waits_for_a_later_lap():
+    tracker = ConnTracker(timeouts={'ESTABLISHED': 100}, wheel_size=16)
+    send(tracker, 1000.0, TCP_ACK)
+    for t in range(1001, 1100):
+        tracker.expire(float(t))
+    assert len(tracker) == 1
+    tracker.expire(1101.0)
+    assert len(tracker) == 0
+
+
+def test_cap_evicts_least_recently_active():
+    tracker = ConnTracker(max_entries=2)
+    tracker.update(1000.0, '10.0.0.1', 1, '10.0.0.9', 53, PROTO_UDP, 80)
+    tracker.update(1000.1, '10.0.0.2', 1, '10.0.0.9', 53, PROTO_UDP, 80)
+    tracker.update(1000.2, '10.0.0.1', 1, '10.0.0.9', 53, PROTO_UDP, 80)
+    tracker.update(1000.3, '10.0.0.3', 1, '10.0.0.9', 53, PROTO_UDP, 80)
+    (session,) = tracker.drain()
+    assert (session['src_ip'], session['close_reason']) == ('10.0.0.2', 'evicted')
+
+
+def test_update_frame_skips_portless_packets():
+    tracker = ConnTracker()
+    frame = pd.DataFrame({
+        'timestamp': pd.to_datetime([1000.0, 1000.5, 1001.0], unit='s'),
+        'src_ip': ['10.0.0.5'] * 3, 'dst_ip': ['203.0.113.7'] * 3,
+        'src_port': [50000, 50001, None], 'dst_port': [22, 22, None],
+        'protocol': [6, 6, 1], 'size': [60, 60, 84], 'flags': [TCP_SYN, TCP_SYN, None],
+    })
+    tracker.update_frame(frame)
+    assert len(tracker) == 2
+    features = session_features(tracker.flush())
+    assert features['unanswered_sessions'] == 2
+    assert features['sessions_closed'] == 2
+
+
+def test_append_sessions_writes_header_once(tmp_path):
+    path = str(tmp_path / 'sessions.csv')
+    tracker = ConnTracker()
+    tracker.update(1000.0, '10.0.0.5', 5353, '10.0.0.9', 53, PROTO_UDP, 80)
+    append_sessions(tracker.flush(), path)
+    append_sessions([], path)
+    tracker.update(1001.0, '10.0.0.6', 5353, '10.0.0.9', 53, PROTO_UDP, 80)
+    append_sessions(tracker.flush(), path)
+    with open(path, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [r['src_ip'] for r in rows] == ['10.0.0.5', '10.0.0.6']
+    assert list(rows[0]) == SESSION_FIELDS
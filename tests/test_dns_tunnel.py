@@ -0,0 +1,130 @@
+"""Tests for utils.dns_tunnel"""
+
+import random
+import string
+import struct
+
+from utils.dns_tunnel import (DnsTunnelDetector, DistinctSketch, parse_dns, registered_domain, label_entropy,
+                              RCODE_NXDOMAIN)
+
+
+def dns_message(qname, qtype=1, flags=0x0100):
+    """Wire-format DNS message with a single question"""
+    header = struct.pack('!HHHHHH', 0x1234, flags, 1, 0, 0, 0)
+    name = b''.join(bytes([len(label)]) + label.encode() for label in qname.split('.')) + b'\x00'
+    return header + name + struct.pack('!HH', qtype, 1)
+
+
+def test_parse_query_and_response():
+    assert parse_dns(dns_message('WWW.Example.com', qtype=16)) == ('www.example.com', 16, 0, False)
+    response = dns_message('nope.example.com', flags=0x8180 | RCODE_NXDOMAIN)
+    assert parse_dns(response) == ('nope.example.com', 1, RCODE_NXDOMAIN, True)
+
+
+def test_parse_rejects_malformed_payloads():
+    message = dns_message('www.example.com')
+    assert parse_dns(message[:11]) is None  # short header
+    assert parse_dns(message[:20]) is None  # truncated name
+    assert parse_dns(message[:-2]) is None  # missing qtype/qclass
+    assert parse_dns(struct.pack('!HHHHHH', 1, 0, 0, 0, 0, 0)) is None  # no question
+    assert parse_dns(message[:12] + b'\xc0\x0c' + message[-4:]) is None  # compression pointer
+
+
+def test_parse_rejects_names_over_255_bytes():
+    long_name = '.'.join(['a' * 63] * 4)  # 4 * 64 = 256 bytes on the wire
+    assert parse_dns(dns_message(long_name)) is None
+    assert parse_dns(dns_message('.'.join(['a' * 63] * 3)))[0].count('.') == 2
+
+
+def test_distinct_sketch_estimate_is_close_and_ignores_repeats():
+    sketch = DistinctSketch()
+    for i in range(1000):
+        sketch.add(f'label{i}')
+        sketch.add(f'label{i}')
+    assert 600 < sketch.estimate() < 1400
+    small = DistinctSketch()
+    for i in range(5):
+        small.add(f'x{i}')
+    assert 3 <= small.estimate() <= 8
+
+
+def test_registered_domain_and_entropy():
+    assert registered_domain('a.b.example.com') == 'example.com'
+    assert registered_domain('www.a.example.co.uk') == 'example.co.uk'
+    assert label_entropy('aaaa') == 0.0
+    assert label_entropy('abcd') == 2.0
+
+
+def _random_label(rng, n=40):
+    return ''.join(rng.choice(string.ascii_lowercase + string.digits) for _ in range(n))
+
+
+def test_encoded_subdomains_raise_tunneling_alert():
+    rng = random.Random(0)
+    detector = DnsTunnelDetector(exfil_bytes=10 ** 9)
+    for _ in range(100):
+        detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(f'{_random_label(rng)}.evil.com')))
+    (alert,) = detector.evaluate(now=1000.0)
+    assert alert['type'] == 'dns_tunneling'
+    assert (alert['client'], alert['domain']) == ('10.0.0.5', 'evil.com')
+    # Raised once per interval
+    assert detector.evaluate(now=1001.0) == []
+
+
+def test_large_query_volume_raises_exfiltration_alert():
+    rng = random.Random(1)
+    detector = DnsTunnelDetector(exfil_bytes=2048)
+    for _ in range(100):
+        detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(f'{_random_label(rng)}.evil.com')))
+    assert [a['type'] for a in detector.evaluate(now=1000.0)] == ['data_exfiltration']
+
+
+def test_ordinary_lookups_do_not_alert():
+    detector = DnsTunnelDetector()
+    for name in ['www.example.com', 'mail.example.com', 'api.github.com'] * 50:
+        detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(name)))
+        detector.observe('10.0.0.53', '10.0.0.5', parse_dns(dns_message(name, flags=0x8180)))
+    assert detector.evaluate(now=1000.0) == []
+
+
+def test_nxdomain_burst_alert():
+    detector = DnsTunnelDetector()
+    rng = random.Random(2)
+    for _ in range(30):
+        detector.observe('10.0.0.53', '10.0.0.7',
+                         parse_dns(dns_message(f'{_random_label(rng, 12)}.com', flags=0x8180 | RCODE_NXDOMAIN)))
+    (alert,) = detector.evaluate(now=1000.0)
+    assert alert['type'] == 'dns_nxdomain_burst'
+    assert alert['client'] == '10.0.0.7'
+
+
+def test_queries_below_min_queries_are_not_judged():
+    rng = random.Random(3)
+    detector = DnsTunnelDetector(min_queries=20)
+    for _ in range(19):
+        detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(f'{_random_label(rng)}.evil.com')))
+    assert detector.evaluate(now=1000.0) == []
+
+
+def test_least_recently_active_pair_is_dropped_first():
+    detector = DnsTunnelDetector(max_pairs=3)
+    for name in ['www.a.com', 'www.b.com', 'www.c.com', 'mail.a.com', 'www.d.com']:
+        detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(name)))
+    assert [domain for _, domain in detector.pairs] == ['c.com', 'a.com', 'd.com']
+
+
+def test_new_interval_clears_statistics_and_allows_realerting():
+    rng = random.Random(4)
+    detector = DnsTunnelDetector(interval=60.0, exfil_bytes=10 ** 9)
+
+    def burst():
+        for _ in range(100):
+            detector.observe('10.0.0.5', '10.0.0.53', parse_dns(dns_message(f'{_random_label(rng)}.evil.com')))
+
+    burst()
+    assert len(detector.evaluate(now=1000.0)) == 1
+    assert detector.evaluate(now=1060.0) == []  # already raised; interval ends and resets here
+    assert len(detector.pairs) == 0
+    burst()
+    assert len(detector.evaluate(now=1070.0)) == 1
+    assert detector.alerts_raised == 2
@@ -0,0 +1,113 @@
+"""Tests for utils.exfil"""
+
+import numpy as np
+
+from utils.exfil import OutboundAccounting
+
+BUCKET = 60
+
+
+def _table(**kwargs):
+    options = dict(bucket_seconds=BUCKET, n_buckets=32, horizons=(1,), min_history=4, min_bytes=1000)
+    options.update(kwargs)
+    return OutboundAccounting(**options)
+
+
+def _history(table, host='10.0.0.5', buckets=10, start=0.0):
+    rng = np.random.default_rng(0)
+    for b in range(buckets):
+        table.add([host], [10_000 + rng.integers(-500, 500)], [3], now=start + b * BUCKET)
+    return start + buckets * BUCKET
+
+
+def test_burst_over_history_alerts_once_per_bucket():
+    table = _table()
+    now = _history(table)
+    table.add(['10.0.0.5'], [5_000_000], [40], now=now)
+    (alert,) = table.check(now)
+    assert alert['type'] == 'data_exfiltration'
+    assert alert['host'] == '10.0.0.5'
+    assert alert['flows'] == 40
+    assert table.check(now + 1) == []
+
+
+def test_steady_traffic_does_not_alert():
+    table = _table()
+    now = _history(table, buckets=20)
+    table.add(['10.0.0.5'], [10_000], [3], now=now)
+    assert table.check(now) == []
+
+
+def test_new_host_is_not_judged_without_history():
+    table = _table()
+    _history(table, host='10.0.0.5')
+    table.add(['10.0.0.6'], [5_000_000], [1], now=10 * BUCKET)
+    assert table.check(10 * BUCKET) == []
+
+
+def test_slow_leak_is_caught_by_the_long_horizon_only():
+    table = _table(n_buckets=64, horizons=(1, 6))
+    for b in range(20):
+        table.add(['10.0.0.5'], [5_000 if b % 2 else 15_000], [2], now=b * BUCKET)
+    # Each bucket stays within the host's normal spread, the 6-bucket total does not
+    for b in range(20, 26):
+        table.add(['10.0.0.5'], [20_000], [1], now=b * BUCKET)
+    alerts = table.check(25 * BUCKET)
+    assert [a['window_seconds'] for a in alerts] == [6 * BUCKET]
+    assert alerts[0]['bytes'] == 6 * 20_000
+
+
+def test_min_bytes_floor_ignores_small_spikes():
+    table = _table(min_bytes=1e6)
+    now = _history(table)
+    table.add(['10.0.0.5'], [500_000], [1], now=now)
+    assert table.check(now) == []
+
+
+def test_ring_forgets_buckets_older_than_its_length():
+    table = _table(n_buckets=8)
+    table.add(['10.0.0.5'], [1_000], [1], now=0.0)
+    table.add(['10.0.0.5'], [2_000], [1], now=3 * BUCKET)
+    table.check(8 * BUCKET)  # bucket 0 is reused for epoch 8
+    assert table.bytes[0].sum() == 2_000
+    # A gap longer than the whole ring clears everything
+    table.check(100 * BUCKET)
+    assert table.bytes[0].sum() == 0
+
+
+def test_table_grows_past_its_initial_capacity():
+    table = _table()
+    hosts = [f'10.0.{i // 250}.{i % 250}' for i in range(600)]
+    table.add(hosts, [100] * 600, [1] * 600, now=0.0)
+    assert len(table) == 600
+    assert table.bytes[:600, 0].sum() == 60_000
+
+
+def test_eviction_at_cap_drops_least_recently_seen():
+    table = _table(max_hosts=2)
+    table.add(['10.0.0.1'], [1], [1], now=0.0)
+    table.add(['10.0.0.2'], [1], [1], now=10.0)
+    table.add(['10.0.0.3'], [1], [1], now=20.0)
+    assert sorted(table.hosts) == ['10.0.0.2', '10.0.0.3']
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'outbound.npz')
+    table = _table()
+    now = _history(table)
+    table.save(path)
+
+    restored = _table()
+    assert restored.load(path)
+    assert restored.hosts == table.hosts
+    assert restored.epoch == table.epoch
+    np.testing.assert_array_equal(restored.bytes[:1], table.bytes[:1])
+    # History survives the restart, so a burst is still caught
+    restored.add(['10.0.0.5'], [5_000_000], [40], now=now)
+    assert len(restored.check(now)) == 1
+
+
+def test_load_rejects_changed_layout(tmp_path):
+    path = str(tmp_path / 'outbound.npz')
+    _table().save(path)
+    assert not _table(n_buckets=16).load(path)
@@ -0,0 +1,107 @@
+"""Tests for utils.host_baselines"""
+
+import numpy as np
+
+from utils.host_baselines import HostBaselines, HOST_METRICS, is_internal_ip
+
+
+def _values(n, pps=10.0):
+    return np.tile([pps, 1000.0, 3.0, 2.0], (n, 1))
+
+
+def test_is_internal_ip():
+    assert is_internal_ip('10.1.2.3')
+    assert is_internal_ip('192.168.0.7')
+    assert not is_internal_ip('8.8.8.8')
+    assert not is_internal_ip('not-an-ip')
+
+
+def test_eviction_at_cap_keeps_the_whole_new_batch():
+    table = HostBaselines(max_hosts=2)
+    table.observe(['a', 'b'], _values(2), now=100.0)
+    table.observe(['c', 'd'], _values(2), now=200.0)
+    assert sorted(table.hosts) == ['c', 'd']
+    assert set(table.index) == {'c', 'd'}
+
+
+def test_eviction_drops_least_recently_seen():
+    table = HostBaselines(max_hosts=2)
+    table.observe(['a'], _values(1), now=100.0)
+    table.observe(['b'], _values(1), now=200.0)
+    table.observe(['a'], _values(1), now=300.0)
+    table.observe(['c'], _values(1), now=400.0)
+    assert sorted(table.hosts) == ['a', 'c']
+
+
+def test_spike_exceeds_warmed_up_limit():
+    table = HostBaselines(warmup=5, k=4.0)
+    rng = np.random.default_rng(0)
+    for i in range(20):
+        table.observe(['10.0.0.5'], _values(1, pps=10 + rng.normal()), now=60.0 * i)
+    limits = table.observe(['10.0.0.5'], _values(1, pps=500.0), now=60.0 * 20)
+    pps = HOST_METRICS.index('pps')
+    assert limits[0, pps] < 500.0
+    # A normal window stays under the limit
+    assert table.limit('10.0.0.5', 'pps', np.inf) > 12.0
+
+
+def test_windows_over_the_limit_barely_move_the_baseline():
+    table = HostBaselines(warmup=5, half_life=60.0)
+    for i in range(10):
+        table.observe(['10.0.0.5'], _values(1, pps=10.0 + i % 2), now=60.0 * i)
+    pps = HOST_METRICS.index('pps')
+    before = table.mean[table.index['10.0.0.5'], pps]
+    # One half-life elapsed, so a normal window would move the mean halfway
+    limits = table.observe(['10.0.0.5'], _values(1, pps=1000.0), now=600.0)
+    assert limits[0, pps] < 1000.0
+    after = table.mean[table.index['10.0.0.5'], pps]
+    assert 0 < after - before <= 0.05 * (1000.0 - before) + 1e-9
+
+
+def test_floor_applies_to_quiet_hosts():
+    table = HostBaselines(warmup=2, floors={'pps': 50})
+    for i in range(5):
+        table.observe(['10.0.0.8'], _values(1, pps=1.0), now=60.0 * i)
+    assert table.limit('10.0.0.8', 'pps', 0.0) == 50
+
+
+def test_warming_host_uses_defaults():
+    table = HostBaselines(warmup=10, defaults={'pps': 1000})
+    limits = table.observe(['10.0.0.9'], _values(1), now=0.0)
+    assert limits[0, HOST_METRICS.index('pps')] == 1000
+    assert table.limit('10.0.0.9', 'pps', 42.0) == 42.0
+
+
+def test_save_load_round_trip(tmp_path):
+    path = str(tmp_path / 'baselines.npz')
+    table = HostBaselines()
+    for i in range(3):
+        table.observe(['10.0.0.1', '10.0.0.2'], _values(2, pps=5.0 + i), now=60.0 * i)
+    table.save(path)
+
+    restored = HostBaselines()
+    assert restored.load(path)
+    assert restored.hosts == table.hosts
+    n = len(table)
+    np.testing.assert_allclose(restored.mean[:n], table.mean[:n])
+    np.testing.assert_allclose(restored.var[:n], table.var[:n])
+    np.testing.assert_array_equal(restored.samples[:n], table.samples[:n])
+
+
+def test_load_keeps_most_recent_rows_up_to_max_hosts(tmp_path):
+    path = str(tmp_path / 'baselines.npz')
+    table = HostBaselines()
+    table.observe([f'10.0.0.{i}' for i in range(5)], _values(5), now=0.0)
+    table.save(path)
+
+    smaller = HostBaselines(max_hosts=3)
+    assert smaller.load(path)
+    assert smaller.hosts == ['10.0.0.2', '10.0.0.3', '10.0.0.4']
+    assert smaller.index['10.0.0.4'] == 2
+
+
+def test_load_rejects_missing_or_changed_file(tmp_path):
+    assert not HostBaselines().load(str(tmp_path / 'missing.npz'))
+    path = tmp_path / 'old.npz'
+    np.savez(path, metrics=np.array(['pps']), hosts=np.array(['10.0.0.1']))
+    assert not HostBaselines().load(str(path))
@@ -0,0 +1,117 @@
+"""Tests for utils.load_shedding"""
+
+import pytest
+
+from utils.load_shedding import AdaptiveSampler, build_bpf_filter
+
+
+def test_build_bpf_filter():
+    assert build_bpf_filter() == 'ip'
+    assert build_bpf_filter(['10.0.5.7/24'], [873], extra='tcp') == \
+        'ip and not net 10.0.5.0/24 and not port 873 and (tcp)'
+
+
+def test_build_bpf_filter_normalizes_addresses_and_port_bounds():
+    assert build_bpf_filter(['10.0.5.7'], [0, 65535]) == \
+        'ip and not net 10.0.5.7/32 and not port 0 and not port 65535'
+
+
+def test_build_bpf_filter_rejects_bad_input():
+    with pytest.raises(ValueError):
+        build_bpf_filter(exclude_ports=[70000])
+    with pytest.raises(ValueError):
+        build_bpf_filter(exclude_nets=['not-a-network'])
+
+
+def test_sampler_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        AdaptiveSampler(mode='byte')
+    with pytest.raises(ValueError):
+        AdaptiveSampler(max_rate=12)
+
+
+def test_lag_raises_rate_and_calm_lowers_it():
+    sampler = AdaptiveSampler(max_rate=4, high_lag=0.5, low_lag=0.05, calm_windows=2)
+    for expected in (2, 4, 4):
+        sampler.observe_lag(1.0)
+        assert sampler.adjust() == expected
+    sampler.observe_lag(0.01)
+    assert sampler.adjust() == 4  # one calm window is not enough
+    sampler.observe_lag(0.01)
+    assert sampler.adjust() == 2
+
+
+def test_moderate_lag_holds_rate():
+    sampler = AdaptiveSampler(high_lag=0.5, low_lag=0.05, calm_windows=1)
+    sampler.observe_lag(1.0)
+    sampler.adjust()
+    sampler.observe_lag(0.2)
+    assert sampler.adjust() == 2
+
+
+def test_moderate_lag_breaks_the_calm_streak():
+    sampler = AdaptiveSampler(high_lag=0.5, low_lag=0.05, calm_windows=2)
+    sampler.observe_lag(1.0)
+    sampler.adjust()
+    for lag in (0.01, 0.2, 0.01):
+        sampler.observe_lag(lag)
+        assert sampler.adjust() == 2
+    sampler.observe_lag(0.01)
+    assert sampler.adjust() == 1
+
+
+def test_adjust_judges_only_the_last_window():
+    sampler = AdaptiveSampler(high_lag=0.5, low_lag=0.05, calm_windows=1)
+    for lag in (0.9, 0.1, 0.02):
+        sampler.observe_lag(lag)
+    assert sampler.adjust() == 2
+    # No callbacks since: the worst lag was reset, so the window counts as calm
+    assert sampler.adjust() == 1
+    assert sampler.adjust() == 1
+    assert sampler.get_status()['last_lag_seconds'] == 0.0
+
+
+def test_unsampled_keeps_everything():
+    sampler = AdaptiveSampler()
+    assert all(sampler.keep(6, '10.0.0.1', i, '10.0.0.2', 80) == 1 for i in range(100))
+    assert sampler.kept == sampler.seen == 100
+
+
+def test_packet_mode_keeps_one_in_n_with_weight():
+    sampler = AdaptiveSampler(mode='packet')
+    sampler.rate = 4
+    weights = [sampler.keep(6, '10.0.0.1', 1234, '10.0.0.2', 80) for _ in range(100)]
+    assert sum(1 for w in weights if w) == 25
+    assert set(weights) == {0, 4}
+
+
+def test_flow_mode_keeps_both_directions_of_a_flow():
+    sampler = AdaptiveSampler(mode='flow')
+    sampler.rate = 8
+    kept = 0
+    for port in range(1000, 1400):
+        forward = sampler.keep(6, '10.0.0.1', port, '10.0.0.2', 80)
+        assert forward == sampler.keep(6, '10.0.0.2', 80, '10.0.0.1', port)
+        kept += bool(forward)
+    assert 0 < kept < 400
+
+
+def test_flow_mode_raising_the_rate_only_drops_flows():
+    sampler = AdaptiveSampler(mode='flow')
+    flows = [(6, '10.0.0.1', port, '10.0.0.2', 443) for port in range(1000, 2000)]
+    kept = {}
+    for rate in (2, 4, 8):
+        sampler.rate = rate
+        kept[rate] = {flow for flow in flows if sampler.keep(*flow)}
+    assert kept[8] <= kept[4] <= kept[2]
+    assert len(kept[8]) < len(kept[2])
+
+
+def test_flow_mode_handles_portless_packets():
+    sampler = AdaptiveSampler(mode='flow')
+    sampler.rate = 2
+    for i in range(50):
+        src, dst = f'10.0.0.{i}', '10.0.1.1'
+        assert sampler.keep(1, src, None, dst, None) == sampler.keep(1, dst, None, src, None)
+    assert sampler.seen == 100
+    assert sampler.kept % 2 == 0
@@ -0,0 +1,94 @@
+"""Tests for utils.syn_flood"""
+
+import numpy as np
+import pandas as pd
+
+from utils.syn_flood import HalfOpenTable, flag_array, TCP_SYN, TCP_ACK, TCP_RST
+
+SYN_ACK = TCP_SYN | TCP_ACK
+SERVER = ('10.0.0.1', 80)
+
+
+def tcp(rows):
+    """Packet records from (seconds, src, sport, dst, dport, flags) tuples"""
+    frame = pd.DataFrame(list(rows), columns=['timestamp', 'src_ip', 'src_port', 'dst_ip', 'dst_port', 'flags'])
+    frame['timestamp'] = pd.to_datetime(frame['timestamp'], unit='s')
+    return frame
+
+
+def syn(t, client, sport, server=SERVER):
+    return (t, client, sport, *server, TCP_SYN)
+
+
+def test_flag_array_treats_non_tcp_as_no_flags():
+    flags = flag_array(pd.Series([TCP_SYN, None, np.nan, SYN_ACK], dtype=object))
+    assert flags.dtype == np.uint8
+    assert flags.tolist() == [TCP_SYN, 0, 0, SYN_ACK]
+
+
+def test_flood_of_unanswered_syns_counts_per_destination():
+    table = HalfOpenTable()
+    flood = [syn(1000 + i * 0.001, f'198.51.100.{i % 250}', 1024 + i) for i in range(500)]
+    normal = [syn(1000.5, '192.0.2.9', 5555, server=('10.0.0.2', 443))]
+    result = table.update(tcp(flood + normal))
+    assert result == {'max_half_open_per_dst': 500, 'half_open_top_dst': '10.0.0.1'}
+
+
+def test_handshake_ack_in_a_later_window_closes_the_entry():
+    table = HalfOpenTable()
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000), (1000.01, *SERVER, '192.0.2.1', 40000, SYN_ACK)]))
+    # SYN-ACK from the server is not the client's ACK; still half-open
+    assert len(table) == 1
+    result = table.update(tcp([(1000.02, '192.0.2.1', 40000, *SERVER, TCP_ACK)]))
+    assert len(table) == 0
+    assert result == {'max_half_open_per_dst': 0, 'half_open_top_dst': None}
+
+
+def test_server_reset_closes_the_reversed_tuple():
+    table = HalfOpenTable()
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000)]))
+    table.update(tcp([(1000.5, *SERVER, '192.0.2.1', 40000, TCP_RST | TCP_ACK)]))
+    assert len(table) == 0
+
+
+def test_syn_and_ack_in_the_same_window_never_open_an_entry():
+    table = HalfOpenTable()
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000), (1000.1, '192.0.2.1', 40000, *SERVER, TCP_ACK)]))
+    assert len(table) == 0
+
+
+def test_retransmitted_syn_keeps_first_syn_time():
+    table = HalfOpenTable(timeout=30.0)
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000)]))
+    table.update(tcp([syn(1020.0, '192.0.2.1', 40000)]))
+    assert table.entries[('192.0.2.1', 40000, *SERVER)] == 1000.0
+    assert table.expire(1031.0) == 1
+
+
+def test_update_ages_by_packet_time_not_wall_clock():
+    table = HalfOpenTable(timeout=30.0)
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000)]))
+    # Replayed traffic from long ago: nothing expires until packet time moves on
+    assert table.update(tcp([]))['max_half_open_per_dst'] == 1
+    table.update(tcp([syn(1031.0, '192.0.2.2', 40000, server=('10.0.0.2', 22))]))
+    assert list(table.entries) == [('192.0.2.2', 40000, '10.0.0.2', 22)]
+
+
+def test_expire_ages_a_quiet_table():
+    table = HalfOpenTable(timeout=30.0)
+    table.update(tcp([syn(1000.0, '192.0.2.1', 40000), syn(1010.0, '192.0.2.2', 40001)]))
+    assert table.expire(1029.0) == 0
+    assert table.expire(1035.0) == 1
+    assert table.expire(1045.0) == 1
+    assert len(table) == 0
+    assert not table.per_dst
+
+
+def test_cap_evicts_oldest_and_keeps_per_destination_counts_consistent():
+    table = HalfOpenTable(max_entries=100)
+    table.update(tcp([syn(1000 + i * 0.01, f'198.51.100.{i}', 40000 + i,
+                          server=('10.0.0.1' if i < 50 else '10.0.0.2', 80)) for i in range(150)]))
+    assert len(table) == 100
+    assert table.evicted == 50
+    # The 50 oldest were all to 10.0.0.1
+    assert dict(table.per_dst) == {'10.0.0.2': 100}
@@ -3,18 +3,42 @@ import json
 import os
 import logging
 from collections import defaultdict
+import numpy as np
+from utils.host_baselines import HostBaselines, is_internal_ip
+from utils.exfil import OutboundAccounting
 
 # Setup logger
 logging.basicConfig(level=logging.INFO, format="%(asctime)s [INFO] %(message)s")
 
 class ThreatDetector:
-    def __init__(self):
+    def __init__(self, baselines_file=os.path.join("data", "host_baselines_detector.npz"),
+                 outbound_file=os.path.join("data", "outbound_history_detector.npz")):
         self.packet_count = defaultdict(int)
         self.port_activity = defaultdict(set)
+        self.byte_count = defaultdict(int)
+        self.peer_activity = defaultdict(set)
         self.last_reset = time.time()
         self.reset_interval = 60  # reset stats every 60 seconds
         self.threat_log_path = os.path.join("data", "threat_logs.json")
 
+        # Per-host limits learned from previous intervals (the fixed values are the warmup defaults)
+        self.baselines_file = baselines_file
+        self.baselines = HostBaselines(
+            defaults={'pps': 100 / self.reset_interval, 'port_diversity': 10},
+            floors={'pps': 20 / self.reset_interval, 'bytes_per_second': 1000, 'fan_out': 5, 'port_diversity': 5},
+        )
+        if baselines_file:
+            self.baselines.load(baselines_file)
+        self.limits = {}  # src -> (packet limit, port limit) for the current interval
+
+        # Internal -> external bytes and flows, bucketed per host for exfiltration checks
+        self.outbound_file = outbound_file
+        self.outbound = OutboundAccounting()
+        if outbound_file:
+            self.outbound.load(outbound_file)
+        self.outbound_bytes = defaultdict(int)
+        self.outbound_flows = defaultdict(set)
+
         if not os.path.exists("data"):
             os.makedirs("data")
 
@@ -37,30 +61,88 @@ class ThreatDetector:
 
         # Reset every minute
         if current_time - self.last_reset > self.reset_interval:
+            self._update_baselines(current_time)
+            self._check_outbound(current_time)
             self.packet_count.clear()
             self.port_activity.clear()
+            self.byte_count.clear()
+            self.peer_activity.clear()
+            self.limits.clear()
             self.last_reset = current_time
 
         # Count packets per source
         self.packet_count[src] += 1
+        self.byte_count[src] += size
+        self.peer_activity[src].add(dst)
 
         # Track distinct ports per source
         if dport:
             self.port_activity[src].add(dport)
 
+        # Outbound traffic of internal hosts
+        src_internal = is_internal_ip(src)
+        if src_internal and not is_internal_ip(dst):
+            self.outbound_bytes[src] += size
+            self.outbound_flows[src].add((dst, dport))
+
+        limits = self.limits.get(src)
+        if limits is None:
+            limits = self.limits[src] = (
+                self.baselines.limit(src, 'pps', 100 / self.reset_interval) * self.reset_interval,
+                self.baselines.limit(src, 'port_diversity', 10),
+            )
+
         # ---- RULE 1: Basic DoS Detection ----
-        if self.packet_count[src] > 100:
+        if self.packet_count[src] > limits[0]:
             self._log_threat("Possible DoS Attack", src, dst, proto, size)
 
         # ---- RULE 2: Port Scan Detection ----
-        if len(self.port_activity[src]) > 10:
+        if len(self.port_activity[src]) > limits[1]:
             self._log_threat("Port Scan Detected", src, dst, proto, size)
 
         # ---- RULE 3: Suspicious External IPs ----
-        if not src.startswith("192.168.") and not src.startswith("10."):
-            if proto == "TCP" and size > 1000:
+        if not src_internal:
+            # proto is the IP protocol number from packet_capture (6 = TCP)
+            if proto in (6, "TCP") and size > 1000:
                 self._log_threat("Suspicious Large TCP Packet", src, dst, proto, size)
 
+    def _update_baselines(self, now):
+        """Fold the finished interval of every internal source into its baseline"""
+        hosts = [src for src in self.packet_count if is_internal_ip(src)]
+        if not hosts:
+            return
+        elapsed = max(now - self.last_reset, 1e-9)
+        values = np.array([
+            [self.packet_count[h] / elapsed, self.byte_count[h] / elapsed,
+             len(self.peer_activity[h]), len(self.port_activity[h])]
+            for h in hosts
+        ])
+        self.baselines.observe(hosts, values, now)
+
+    def _check_outbound(self, now):
+        """Account the finished interval's outbound traffic and flag hosts leaking data"""
+        hosts = list(self.outbound_bytes)
+        self.outbound.add(
+            hosts,
+            [self.outbound_bytes[h] for h in hosts],
+            [len(self.outbound_flows[h]) for h in hosts],
+            now,
+        )
+        self.outbound_bytes.clear()
+        self.outbound_flows.clear()
+
+        for alert in self.outbound.check(now):
+            window = f"{alert['window_seconds'] // 60:.0f}min"
+            self._log_threat(f"Possible Data Exfiltration ({window})", alert['host'],
+                             "external", "-", int(alert['bytes']))
+
+    def close(self):
+        """Persist the per-host baselines and outbound history (call on shutdown)"""
+        if self.baselines_file:
+            self.baselines.save(self.baselines_file)
+        if self.outbound_file:
+            self.outbound.save(self.outbound_file)
+
     def _log_threat(self, threat_type, src, dst, proto, size):
         threat_data = {
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
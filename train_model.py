@@ -6,10 +6,22 @@ This is a demonstration - replace with your actual training data
 import pandas as pd
 import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.base import clone
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import classification_report, confusion_matrix
+from sklearn.metrics import classification_report, confusion_matrix, f1_score, precision_score, recall_score
 import joblib
 import os
+import io
+import json
+import time
+import hashlib
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor
+from feature_extractor import FEATURE_NAMES, packets_from_log, featurize_windows
+from utils.packet_archive import ARCHIVE_DIR, list_partitions
+
+FEATURE_CACHE_DIR = 'data/feature_cache'
+TUNING_REPORT = 'models/tuning_report.json'
 
 def generate_synthetic_training_data(n_samples=1000):
     """
@@ -50,6 +62,12 @@ def generate_synthetic_training_data(n_samples=1000):
         'max_dst_ip_count': np.random.randint(1, 20, normal_samples),
         'src_ip_entropy': np.random.uniform(0.5, 3.0, normal_samples),
         'dst_ip_entropy': np.random.uniform(0.5, 3.0, normal_samples),
+        'syn_packets': np.random.randint(0, 8, normal_samples),
+        'ack_packets': np.random.randint(5, 80, normal_samples),
+        'rst_packets': np.random.randint(0, 3, normal_samples),
+        'fin_packets': np.random.randint(0, 8, normal_samples),
+        'syn_no_ack_ratio': np.random.uniform(0, 0.15, normal_samples),
+        'max_half_open_per_dst': np.random.randint(0, 5, normal_samples),
     }
     
     # Threat traffic features (anomalous patterns)
@@ -82,6 +100,12 @@ def generate_synthetic_training_data(n_samples=1000):
         'max_dst_ip_count': np.random.randint(1, 10, threat_samples),
         'src_ip_entropy': np.random.uniform(0.1, 1.0, threat_samples),  # Low entropy
         'dst_ip_entropy': np.random.uniform(2.0, 4.0, threat_samples),  # High entropy
+        'syn_packets': np.random.randint(50, 900, threat_samples),  # SYN floods / SYN scans
+        'ack_packets': np.random.randint(0, 100, threat_samples),
+        'rst_packets': np.random.randint(0, 200, threat_samples),  # Closed ports answer scans with RST
+        'fin_packets': np.random.randint(0, 10, threat_samples),
+        'syn_no_ack_ratio': np.random.uniform(0.5, 1.0, threat_samples),
+        'max_half_open_per_dst': np.random.randint(20, 500, threat_samples),
     }
     
     # Create DataFrames
@@ -99,14 +123,137 @@ def generate_synthetic_training_data(n_samples=1000):
     
     return df
 
-def train_model(output_path='models/threat_detector.joblib'):
+def _featurize_partition(files, window_size):
+    """Featurize one hourly archive partition (runs in a worker process)"""
+    raw = pd.concat([pd.read_parquet(f) for f in files], ignore_index=True)
+    return featurize_windows(packets_from_log(raw), window_size)
+
+def _partition_cache_path(cache_dir, files, window_size):
+    """
+    Cache file for a partition's windows; the key covers the partition's
+    files (name, size, mtime), the window size and the feature schema, so
+    new data or a changed feature list invalidates it
+    """
+    key = hashlib.sha1()
+    for f in files:
+        stat = os.stat(f)
+        key.update(f"{os.path.basename(f)}:{stat.st_size}:{stat.st_mtime_ns};".encode())
+    key.update(f"{window_size}|{','.join(FEATURE_NAMES)}".encode())
+    hour_dir = os.path.dirname(files[0])
+    partition = f"{os.path.basename(os.path.dirname(hour_dir))}_{os.path.basename(hour_dir)}"
+    return os.path.join(cache_dir, f"{partition}_w{window_size}_{key.hexdigest()[:16]}.pkl")
+
+def featurize_archive(archive_dir=ARCHIVE_DIR, window_size=5, start=None, end=None,
+                      workers=None, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Featurize archived packet logs into windows, one hourly partition per task
+
+    Args:
+        archive_dir: Root of the Parquet packet archive (utils/packet_archive.py)
+        window_size: Window length in seconds (match the analyzer's --window)
+        start: Earliest packet timestamp to include
+        end: Latest packet timestamp to include
+        workers: Worker processes (default: all cores)
+        cache_dir: Directory for featurized partitions (None disables caching)
+
+    Returns:
+        DataFrame with window_start and FEATURE_NAMES columns
+    """
+    partitions = {}
+    for f in list_partitions(archive_dir, start, end):
+        partitions.setdefault(os.path.dirname(f), []).append(f)
+
+    if not partitions:
+        raise FileNotFoundError(f"No archived packets in {archive_dir}")
+
+    frames = []
+    pending = {}
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for hour_dir, files in sorted(partitions.items()):
+            cache_path = _partition_cache_path(cache_dir, files, window_size) if cache_dir else None
+            if cache_path and os.path.exists(cache_path):
+                frames.append(pd.read_pickle(cache_path))
+            else:
+                pending[pool.submit(_featurize_partition, files, window_size)] = cache_path
+
+        print(f"🧮 Featurizing {len(pending)} partitions ({len(frames)} cached)...")
+        for future, cache_path in pending.items():
+            windows = future.result()
+            if cache_path:
+                os.makedirs(cache_dir, exist_ok=True)
+                windows.to_pickle(cache_path)
+            frames.append(windows)
+
+    windows = pd.concat(frames, ignore_index=True)
+    if start is not None:
+        windows = windows[windows['window_start'] >= pd.Timestamp(start).floor(f"{window_size}s")]
+    if end is not None:
+        windows = windows[windows['window_start'] <= pd.Timestamp(end)]
+    return windows.sort_values('window_start').reset_index(drop=True)
+
+def label_windows(windows, labels_file, window_size=5):
+    """
+    Label windows from a CSV of threat intervals
+
+    The labels file has start,end columns (and an optional label column,
+    1 = threat, 0 = known-normal); a window is a threat if it overlaps any
+    threat interval. Unlisted time is labeled normal.
+
+    Args:
+        windows: DataFrame from featurize_archive
+        labels_file: CSV of labeled intervals
+        window_size: Window length in seconds
+
+    Returns:
+        windows with a label column
+    """
+    intervals = pd.read_csv(labels_file)
+    if 'label' not in intervals:
+        intervals['label'] = 1
+    intervals['start'] = pd.to_datetime(intervals['start'], format='mixed')
+    intervals['end'] = pd.to_datetime(intervals['end'], format='mixed')
+
+    window_start = windows['window_start'].to_numpy()
+    window_end = window_start + np.timedelta64(int(window_size * 1e9), 'ns')
+    label = np.zeros(len(windows), dtype=int)
+    for row in intervals[intervals['label'].astype(int) == 1].itertuples():
+        label[(window_start <= row.end.to_datetime64()) & (window_end > row.start.to_datetime64())] = 1
+
+    windows = windows.copy()
+    windows['label'] = label
+    return windows
+
+def load_log_training_data(archive_dir=ARCHIVE_DIR, labels_file='data/labels.csv', window_size=5,
+                           start=None, end=None, workers=None, cache_dir=FEATURE_CACHE_DIR):
+    """
+    Build a labeled training set from archived packet logs
+
+    Returns:
+        DataFrame with FEATURE_NAMES columns and label
+    """
+    print(f"📂 Loading archived packets from {archive_dir}...")
+    windows = featurize_archive(archive_dir, window_size, start, end, workers, cache_dir)
+    df = label_windows(windows, labels_file, window_size)
+    threats = int(df['label'].sum())
+    print(f"✅ Built {len(df)} windows ({len(df) - threats} normal, {threats} threats)")
+    return df[FEATURE_NAMES + ['label']]
+
+def train_model(output_path='models/threat_detector.joblib', source='synthetic', **log_options):
     """
     Train a Random Forest model for threat detection
+    
+    Args:
+        output_path: Where to save the trained model
+        source: 'synthetic' for generated data, 'logs' for archived packet logs
+        **log_options: Passed to load_log_training_data when source='logs'
     """
     print("🤖 Training ML model for threat detection...")
     
-    # Generate training data
-    df = generate_synthetic_training_data(n_samples=2000)
+    # Load or generate training data
+    if source == 'logs':
+        df = load_log_training_data(**log_options)
+    else:
+        df = generate_synthetic_training_data(n_samples=2000)
     
     # Split features and labels
     X = df.drop('label', axis=1)
@@ -156,5 +303,229 @@ def train_model(output_path='models/threat_detector.joblib'):
     
     return model
 
+def tuning_candidates():
+    """
+    Model families and sizes searched by --tune
+
+    Returns:
+        List of (name, unfitted estimator)
+    """
+    from sklearn.ensemble import ExtraTreesClassifier, HistGradientBoostingClassifier
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import make_pipeline
+    from sklearn.preprocessing import StandardScaler
+    from sklearn.tree import DecisionTreeClassifier
+    
+    candidates = []
+    for n_estimators in [10, 25, 50, 100, 200]:
+        for max_depth in [5, 10, None]:
+            candidates.append((
+                f"random_forest(n={n_estimators},depth={max_depth})",
+                RandomForestClassifier(n_estimators=n_estimators, max_depth=max_depth, random_state=42, n_jobs=-1)
+            ))
+    for n_estimators in [25, 100]:
+        candidates.append((
+            f"extra_trees(n={n_estimators},depth=10)",
+            ExtraTreesClassifier(n_estimators=n_estimators, max_depth=10, random_state=42, n_jobs=-1)
+        ))
+    for max_iter in [50, 200]:
+        candidates.append((
+            f"hist_gradient_boosting(iter={max_iter})",
+            HistGradientBoostingClassifier(max_iter=max_iter, random_state=42)
+        ))
+    for max_depth in [5, 10]:
+        candidates.append((f"decision_tree(depth={max_depth})", DecisionTreeClassifier(max_depth=max_depth, random_state=42)))
+    candidates.append(("logistic_regression", make_pipeline(StandardScaler(), LogisticRegression(max_iter=1000))))
+    return candidates
+
+def _latency_us(func, inputs, repeats=1):
+    """Per-call latency samples in microseconds"""
+    samples = []
+    for _ in range(repeats):
+        for item in inputs:
+            started = time.perf_counter_ns()
+            func(item)
+            samples.append((time.perf_counter_ns() - started) / 1000)
+    return np.array(samples)
+
+def evaluate_candidate(name, model, X_train, y_train, X_test, y_test, latency_rows=200):
+    """
+    Fit one candidate and measure quality, inference latency and size
+    
+    Returns:
+        Dictionary for the tuning report
+    """
+    started = time.perf_counter()
+    model.fit(X_train, y_train)
+    fit_seconds = time.perf_counter() - started
+    
+    # The analyzer scores one window at a time on a single thread
+    if 'n_jobs' in model.get_params():
+        model.set_params(n_jobs=1)
+    
+    y_pred = model.predict(X_test)
+    
+    # The analyzer's call sequence per window: predict, then predict_proba when available
+    def score(X):
+        model.predict(X)
+        if hasattr(model, 'predict_proba'):
+            model.predict_proba(X)
+    
+    # Single-row latency as the analyzer calls it (one window at a time)
+    rows = [X_test.iloc[[i]] for i in range(min(latency_rows, len(X_test)))]
+    score(rows[0])  # warm up
+    single = _latency_us(score, rows)
+    
+    # Batch latency over the whole test set
+    batch = _latency_us(score, [X_test], repeats=5)
+    
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    
+    return {
+        'name': name,
+        'model': type(model).__name__,
+        'f1': float(f1_score(y_test, y_pred, zero_division=0)),
+        'precision': float(precision_score(y_test, y_pred, zero_division=0)),
+        'recall': float(recall_score(y_test, y_pred, zero_division=0)),
+        'single_row_p50_us': float(np.percentile(single, 50)),
+        'single_row_p99_us': float(np.percentile(single, 99)),
+        'batch_rows': len(X_test),
+        'batch_per_row_us': float(np.median(batch) / len(X_test)),
+        'size_bytes': buffer.getbuffer().nbytes,
+        'fit_seconds': fit_seconds,
+    }
+
+def pareto_front(results):
+    """
+    Names of candidates not dominated on (f1 up, single-row p99 down, size down)
+    """
+    def dominates(a, b):
+        no_worse = (a['f1'] >= b['f1'] and a['single_row_p99_us'] <= b['single_row_p99_us']
+                    and a['size_bytes'] <= b['size_bytes'])
+        better = (a['f1'] > b['f1'] or a['single_row_p99_us'] < b['single_row_p99_us']
+                  or a['size_bytes'] < b['size_bytes'])
+        return no_worse and better
+    
+    return [r['name'] for r in results if not any(dominates(o, r) for o in results if o is not r)]
+
+def tune_models(df, report_path=TUNING_REPORT, latency_budget_ms=None, output_path=None):
+    """
+    Search model families/sizes and report the quality/latency/size trade-off
+    
+    Args:
+        df: Training data with FEATURE_NAMES columns and label
+        report_path: Where to write the JSON report
+        latency_budget_ms: Per-window inference budget; with output_path, the
+            best-F1 Pareto model within budget is refit and saved
+        output_path: Model output path for the selected candidate
+        
+    Returns:
+        Report dictionary
+    """
+    X = df.drop('label', axis=1)
+    y = df['label']
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    
+    candidates = tuning_candidates()
+    print(f"🔍 Evaluating {len(candidates)} candidates on {len(X_train)} train / {len(X_test)} test windows...")
+    
+    models = {}
+    results = []
+    for name, model in candidates:
+        results.append(evaluate_candidate(name, model, X_train, y_train, X_test, y_test))
+        models[name] = model
+    
+    front = pareto_front(results)
+    for r in results:
+        r['pareto'] = r['name'] in front
+    
+    print(f"\n{'candidate':40s} {'f1':>6s} {'p50 us':>9s} {'p99 us':>9s} {'batch us/row':>13s} {'size KB':>9s}")
+    for r in sorted(results, key=lambda r: (-r['f1'], r['single_row_p99_us'])):
+        marker = '⭐' if r['pareto'] else '  '
+        print(f"{marker}{r['name']:38s} {r['f1']:6.3f} {r['single_row_p50_us']:9.0f} "
+              f"{r['single_row_p99_us']:9.0f} {r['batch_per_row_us']:13.1f} {r['size_bytes'] / 1024:9.0f}")
+    
+    report = {
+        'generated_at': datetime.now().isoformat(),
+        'train_windows': len(X_train),
+        'test_windows': len(X_test),
+        'features': list(X.columns),
+        'latency_budget_ms': latency_budget_ms,
+        'pareto_front': front,
+        'candidates': results,
+        'selected': None,
+    }
+    
+    if latency_budget_ms is not None:
+        budget_us = latency_budget_ms * 1000
+        within = [r for r in results if r['pareto'] and r['single_row_p99_us'] <= budget_us]
+        if within:
+            best = max(within, key=lambda r: (r['f1'], -r['single_row_p99_us']))
+            report['selected'] = best['name']
+            print(f"\n🏆 Best within {latency_budget_ms} ms: {best['name']} (f1 {best['f1']:.3f})")
+            if output_path:
+                # Same configuration, refit on all windows (the test split included)
+                final = clone(models[best['name']])
+                final.fit(X, y)
+                os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+                joblib.dump(final, output_path)
+                print(f"✅ Model refit on {len(X)} windows and saved to {output_path}")
+        else:
+            print(f"\n⚠️ No Pareto candidate meets the {latency_budget_ms} ms budget")
+    
+    os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+    with open(report_path, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n📄 Tuning report saved to {report_path}")
+    
+    return report
+
+def main():
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Train the NetGuardAI threat detection model")
+    parser.add_argument("--source", choices=['synthetic', 'logs'], default='synthetic',
+                        help="Training data: generated samples or archived packet logs (default: synthetic)")
+    parser.add_argument("--output", default='models/threat_detector.joblib', help="Model output path")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Packet archive root (--source logs)")
+    parser.add_argument("--labels", default='data/labels.csv',
+                        help="CSV of start,end[,label] threat intervals (--source logs)")
+    parser.add_argument("--window", type=int, default=5,
+                        help="Window size in seconds; match the analyzer's --window (default: 5)")
+    parser.add_argument("--start", default=None, help="Earliest packet timestamp to train on")
+    parser.add_argument("--end", default=None, help="Latest packet timestamp to train on")
+    parser.add_argument("--workers", type=int, default=None, help="Featurization processes (default: all cores)")
+    parser.add_argument("--no-cache", action="store_true", help="Recompute featurized windows")
+    parser.add_argument("--tune", action="store_true",
+                        help="Search model families/sizes and write a quality/latency/size report")
+    parser.add_argument("--latency-budget-ms", type=float, default=None,
+                        help="With --tune, save the best Pareto model whose single-window p99 fits this budget")
+    parser.add_argument("--report", default=TUNING_REPORT, help=f"Tuning report path (default: {TUNING_REPORT})")
+    args = parser.parse_args()
+    
+    log_options = {}
+    if args.source == 'logs':
+        log_options = {
+            'archive_dir': args.archive_dir,
+            'labels_file': args.labels,
+            'window_size': args.window,
+            'start': args.start,
+            'end': args.end,
+            'workers': args.workers,
+            'cache_dir': None if args.no_cache else FEATURE_CACHE_DIR,
+        }
+    
+    if args.tune:
+        if args.source == 'logs':
+            df = load_log_training_data(**log_options)
+        else:
+            df = generate_synthetic_training_data(n_samples=2000)
+        tune_models(df, args.report, args.latency_budget_ms, args.output)
+    else:
+        train_model(args.output, source=args.source, **log_options)
+
 if __name__ == "__main__":
-    train_model()
+    main()
@@ -0,0 +1,111 @@
+"""
+Streaming anomaly scoring of analysis windows
+Learns an exponentially weighted mean and variance per window feature and
+scores each new window by how far it sits from that baseline, so unusual
+traffic is surfaced even when it matches no rule or trained class
+"""
+
+import threading
+from typing import Dict, List
+
+import numpy as np
+
+from feature_extractor import FEATURE_NAMES
+
+
+class EwmaAnomalyScorer:
+    """
+    Per-feature EWMA baselines over the window feature vector
+
+    State is three float arrays of len(feature_names), and each window costs
+    O(features) to score and update.
+    """
+
+    def __init__(self, feature_names: List[str] = FEATURE_NAMES, alpha=0.05, warmup=20,
+                 threshold=3.0, top_k=3, z_clip=10.0):
+        """
+        Initialize the scorer
+
+        Args:
+            feature_names: Features read from each window (in this order)
+            alpha: EWMA weight of the newest window (~2/alpha windows of memory)
+            warmup: Windows observed before scores are reported
+            threshold: anomaly_score at or above which a window is flagged
+            top_k: Number of contributing features reported per window
+            z_clip: Cap on a single feature's z-score so one feature cannot dominate
+        """
+        self.feature_names = list(feature_names)
+        self.alpha = alpha
+        self.warmup = warmup
+        self.threshold = threshold
+        self.top_k = top_k
+        self.z_clip = z_clip
+
+        n = len(self.feature_names)
+        self.mean = np.zeros(n)
+        self.var = np.zeros(n)
+        # Floor of the std so near-constant features (e.g. ssh_packets = 0) don't explode
+        self.min_std = np.full(n, 0.1)
+        self.windows = 0
+        self.anomalies = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, features: Dict) -> np.ndarray:
+        # Counts and byte totals are heavy-tailed; log1p puts them on a comparable scale
+        x = np.array([float(features.get(name, 0) or 0) for name in self.feature_names])
+        return np.log1p(np.maximum(x, 0))
+
+    def score(self, features: Dict) -> Dict:
+        """
+        Score a window against the baseline, then fold it into the baseline
+
+        Args:
+            features: Window features (extract_flow_features output)
+
+        Returns:
+            Dictionary with anomaly_score, is_anomaly and anomaly_features
+            (the top contributing features with their z-scores)
+        """
+        x = self._vector(features)
+        with self._lock:
+            std = np.maximum(np.sqrt(self.var), self.min_std)
+            z = np.clip((x - self.mean) / std, -self.z_clip, self.z_clip)
+            warming_up = self.windows < self.warmup
+
+            score = 0.0 if warming_up else float(np.sqrt(np.mean(z * z)))
+            is_anomaly = score >= self.threshold
+
+            # Anomalous windows move the baseline ten times slower, so an
+            # ongoing attack does not quickly become the new normal
+            if self.windows == 0:
+                alpha = 1.0
+            elif warming_up:
+                alpha = max(self.alpha, 1.0 / (self.windows + 1))
+            else:
+                alpha = self.alpha * (0.1 if is_anomaly else 1.0)
+            delta = x - self.mean
+            self.mean += alpha * delta
+            self.var = (1 - alpha) * (self.var + alpha * delta * delta)
+
+            self.windows += 1
+            self.anomalies += int(is_anomaly)
+
+        top = np.argsort(-np.abs(z))[:self.top_k] if not warming_up else []
+        return {
+            'anomaly_score': score,
+            'is_anomaly': bool(is_anomaly),
+            'anomaly_features': [
+                {'feature': self.feature_names[i], 'z': float(z[i])} for i in top if z[i] != 0
+            ],
+        }
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'windows': self.windows,
+                'anomalies': self.anomalies,
+                'warming_up': self.windows < self.warmup,
+                'threshold': self.threshold,
+                # Baseline in original units (geometric-style centre of the log1p EWMA)
+                'baseline': {name: float(np.expm1(m)) for name, m in zip(self.feature_names, self.mean)},
+            }
@@ -0,0 +1,175 @@
+"""
+Beaconing (C2 check-in) detection
+Keeps a ring buffer of check-in times per internal host -> external
+(destination, port) pair and periodically scores how regular the gaps
+between them are; malware polling its controller shows up as a pair with
+many, nearly identical intervals
+"""
+
+import threading
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from utils.host_baselines import is_internal_ip
+
+
+class BeaconDetector:
+    """
+    Struct-of-arrays table of per-(src, dst, dport) check-in rings
+
+    Memory is max_pairs * ring_size * 8 bytes at most (~13 MB for 50k pairs
+    of 32 timestamps); the least recently active pair is evicted when full.
+    """
+
+    def __init__(self, max_pairs=50_000, ring_size=32, min_gap=1.0, min_events=8,
+                 min_period=5.0, max_cv=0.15, score_interval=60.0, realert=3600.0):
+        """
+        Initialize the detector
+
+        Args:
+            max_pairs: Hard cap on tracked (src, dst, dport) pairs
+            ring_size: Check-in timestamps kept per pair
+            min_gap: Packets closer than this to the previous check-in belong to it
+            min_events: Check-ins needed before a pair is scored
+            min_period: Shortest mean interval (seconds) treated as beaconing
+            max_cv: Highest coefficient of variation of the intervals that counts as periodic
+            score_interval: Seconds between batch scoring passes
+            realert: Seconds before the same pair can alert again
+        """
+        self.max_pairs = max_pairs
+        self.ring_size = ring_size
+        self.min_gap = min_gap
+        self.min_events = min_events
+        self.min_period = min_period
+        self.max_cv = max_cv
+        self.score_interval = score_interval
+        self.realert = realert
+
+        self.index = {}  # (src, dst, dport) -> row
+        self.pairs = []
+        capacity = min(1024, max_pairs)
+        self.times = np.full((capacity, ring_size), np.nan)
+        self.count = np.zeros(capacity, dtype=np.int64)  # check-ins ever recorded (ring head = count % ring_size)
+        self.last_seen = np.zeros(capacity)
+        self.last_alert = np.full(capacity, -np.inf)
+        self.last_scored = None
+        self.alerts_raised = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.pairs)
+
+    def _row(self, key) -> int:
+        row = self.index.get(key)
+        if row is not None:
+            return row
+        if len(self.pairs) < self.max_pairs:
+            if len(self.pairs) == len(self.count):
+                capacity = min(len(self.count) * 2, self.max_pairs)
+                grown = np.full((capacity, self.ring_size), np.nan)
+                grown[:len(self.count)] = self.times
+                self.times = grown
+                self.count = np.resize(self.count, capacity)
+                self.last_seen = np.resize(self.last_seen, capacity)
+                self.last_alert = np.resize(self.last_alert, capacity)
+            row = len(self.pairs)
+            self.pairs.append(key)
+        else:
+            row = int(np.argmin(self.last_seen[:len(self.pairs)]))
+            del self.index[self.pairs[row]]
+            self.pairs[row] = key
+        self.index[key] = row
+        self.times[row] = np.nan
+        self.count[row] = 0
+        self.last_seen[row] = 0
+        self.last_alert[row] = -np.inf
+        return row
+
+    def observe(self, packets: pd.DataFrame):
+        """
+        Record check-ins from a batch of new packet records
+
+        Args:
+            packets: DataFrame with timestamp, src_ip, dst_ip, dst_port
+        """
+        if packets.empty:
+            return
+        outbound = packets[packets['src_ip'].map(is_internal_ip) & ~packets['dst_ip'].map(is_internal_ip)]
+        if outbound.empty:
+            return
+
+        frame = pd.DataFrame({
+            'ts': (outbound['timestamp'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1),
+            'src': outbound['src_ip'].to_numpy(),
+            'dst': outbound['dst_ip'].to_numpy(),
+            'dport': outbound['dst_port'].fillna(-1).astype(np.int64).to_numpy(),
+        }).sort_values(['src', 'dst', 'dport', 'ts'])
+        # A check-in is the first packet of each burst of a pair
+        same_pair = ((frame['src'] == frame['src'].shift()) & (frame['dst'] == frame['dst'].shift())
+                     & (frame['dport'] == frame['dport'].shift()))
+        starts = frame[~same_pair | (frame['ts'].diff() > self.min_gap)]
+
+        with self._lock:
+            for ts, src, dst, dport in zip(starts['ts'].tolist(), starts['src'].tolist(),
+                                           starts['dst'].tolist(), starts['dport'].tolist()):
+                row = self._row((src, dst, dport))
+                if self.count[row] and ts - self.last_seen[row] <= self.min_gap:
+                    self.last_seen[row] = max(self.last_seen[row], ts)
+                    continue  # burst continuing from the previous batch
+                self.times[row, self.count[row] % self.ring_size] = ts
+                self.count[row] += 1
+                self.last_seen[row] = ts
+
+    def score(self, now: float, force=False) -> List[Dict]:
+        """
+        Score all pairs in one vectorized pass (at most every score_interval seconds)
+
+        Args:
+            now: Current time (seconds since epoch)
+            force: Score even if score_interval has not elapsed
+
+        Returns:
+            New beaconing alerts
+        """
+        with self._lock:
+            if not force and self.last_scored is not None and now - self.last_scored < self.score_interval:
+                return []
+            self.last_scored = now
+            n = len(self.pairs)
+            rows = np.nonzero(self.count[:n] >= self.min_events)[0]
+            if len(rows) == 0:
+                return []
+
+            # Ring order doesn't matter once sorted; NaN (unused slots) sort last
+            times = np.sort(self.times[rows], axis=1)
+            intervals = np.diff(times, axis=1)
+            mean = np.nanmean(intervals, axis=1)
+            std = np.nanstd(intervals, axis=1)
+            cv = std / np.maximum(mean, 1e-9)
+
+            hits = (mean >= self.min_period) & (cv <= self.max_cv) & (now - self.last_alert[rows] >= self.realert)
+            alerts = []
+            for i in np.nonzero(hits)[0]:
+                row = rows[i]
+                src, dst, dport = self.pairs[row]
+                self.last_alert[row] = now
+                alerts.append({
+                    'type': 'c2_beaconing',
+                    'src_ip': src, 'dst_ip': dst, 'dst_port': int(dport) if dport >= 0 else None,
+                    'period_seconds': float(mean[i]),
+                    'cv': float(cv[i]),
+                    'check_ins': int(self.count[row]),
+                })
+            self.alerts_raised += len(alerts)
+        return alerts
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'tracked_pairs': len(self.pairs),
+                'max_pairs': self.max_pairs,
+                'scorable_pairs': int((self.count[:len(self.pairs)] >= self.min_events).sum()),
+                'alerts_raised': self.alerts_raised,
+            }
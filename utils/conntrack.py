@@ -0,0 +1,302 @@
+"""
+Connection tracking for TCP sessions and UDP pseudo-sessions
+Follows each 5-tuple through handshake, established and teardown states,
+expires idle entries with a timer wheel and exports finished sessions for
+feature extraction and archival
+"""
+
+import os
+import csv
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from utils.syn_flood import flag_array, TCP_SYN, TCP_ACK, TCP_FIN, TCP_RST
+
+SESSIONS_FILE = 'data/sessions_log.csv'
+
+PROTO_TCP = 6
+PROTO_UDP = 17
+
+# Connection states
+SYN_SENT = 'SYN_SENT'
+SYN_RECV = 'SYN_RECV'
+ESTABLISHED = 'ESTABLISHED'
+FIN_WAIT = 'FIN_WAIT'
+CLOSED = 'CLOSED'
+UDP = 'UDP'
+
+# Idle seconds before an entry in each state expires
+DEFAULT_TIMEOUTS = {
+    SYN_SENT: 30,
+    SYN_RECV: 30,
+    ESTABLISHED: 300,
+    FIN_WAIT: 60,
+    CLOSED: 5,
+    UDP: 60,
+}
+
+SESSION_FIELDS = [
+    'start', 'end', 'duration', 'proto', 'src_ip', 'src_port', 'dst_ip', 'dst_port',
+    'state', 'close_reason', 'orig_packets', 'orig_bytes', 'reply_packets', 'reply_bytes',
+]
+
+
+class Connection:
+    """One tracked session; the originator is the sender of the first packet seen"""
+
+    __slots__ = ('key', 'state', 'start', 'last_seen', 'expires', 'slot',
+                 'orig_packets', 'orig_bytes', 'reply_packets', 'reply_bytes',
+                 'fin_orig', 'fin_reply')
+
+    def __init__(self, key, state, now):
+        self.key = key
+        self.state = state
+        self.start = now
+        self.last_seen = now
+        self.expires = now
+        self.slot = None
+        self.orig_packets = self.orig_bytes = 0
+        self.reply_packets = self.reply_bytes = 0
+        self.fin_orig = self.fin_reply = False
+
+    def to_record(self, reason: str) -> Dict:
+        proto, src, sport, dst, dport = self.key
+        return {
+            'start': pd.Timestamp(self.start, unit='s').isoformat(),
+            'end': pd.Timestamp(self.last_seen, unit='s').isoformat(),
+            'duration': self.last_seen - self.start,
+            'proto': proto, 'src_ip': src, 'src_port': sport, 'dst_ip': dst, 'dst_port': dport,
+            'state': self.state, 'close_reason': reason,
+            'orig_packets': self.orig_packets, 'orig_bytes': self.orig_bytes,
+            'reply_packets': self.reply_packets, 'reply_bytes': self.reply_bytes,
+        }
+
+
+class ConnTracker:
+    """
+    5-tuple session table with timer-wheel expiry and an LRU memory cap
+
+    Each packet costs O(1): a dict lookup, a move to the LRU tail and a
+    move between two wheel buckets. Advancing the clock visits one bucket
+    per elapsed second, so expiry is O(1) amortized per connection.
+    """
+
+    def __init__(self, max_entries=200_000, timeouts: Optional[Dict] = None, wheel_size=512):
+        """
+        Initialize the tracker
+
+        Args:
+            max_entries: Hard cap on tracked connections (least recently active is evicted)
+            timeouts: Per-state idle timeouts overriding DEFAULT_TIMEOUTS
+            wheel_size: Timer wheel slots (1 second each)
+        """
+        self.max_entries = max_entries
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.table = OrderedDict()  # key -> Connection, least recently active first
+        self.wheel = [set() for _ in range(wheel_size)]
+        self.tick = None
+        self.finished: List[Dict] = []  # session records waiting for drain()
+        self.evicted = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.table)
+
+    def _schedule(self, conn: Connection):
+        conn.expires = conn.last_seen + self.timeouts[conn.state]
+        slot = int(conn.expires) % len(self.wheel)
+        if slot != conn.slot:
+            if conn.slot is not None:
+                self.wheel[conn.slot].discard(conn.key)
+            self.wheel[slot].add(conn.key)
+            conn.slot = slot
+
+    def _close(self, conn: Connection, reason: str):
+        self.table.pop(conn.key, None)
+        if conn.slot is not None:
+            self.wheel[conn.slot].discard(conn.key)
+        self.finished.append(conn.to_record(reason))
+
+    def _advance(self, now: float):
+        """Expire connections whose deadline passed, one wheel slot per elapsed second"""
+        tick = int(now)
+        if self.tick is None:
+            self.tick = tick
+            return
+        steps = min(tick - self.tick, len(self.wheel))
+        for step in range(1, steps + 1):
+            bucket = self.wheel[(self.tick + step) % len(self.wheel)]
+            # Entries due in a later lap of the wheel stay in the bucket
+            due = [key for key in bucket if self.table[key].expires <= now]
+            for key in due:
+                self._close(self.table[key], 'timeout')
+                self.expired += 1
+        self.tick = max(self.tick, tick)
+
+    def expire(self, now: float):
+        """
+        Expire idle connections at time now without a packet
+
+        update() only moves the wheel when packets arrive, so the analyzer
+        calls this every window to time out sessions on a quiet link.
+
+        Args:
+            now: Current time in the packet timestamp clock (seconds)
+        """
+        with self._lock:
+            self._advance(now)
+
+    def update(self, now: float, src: str, sport, dst: str, dport, proto: int, size: int, flags: int = 0):
+        """
+        Account one packet
+
+        Args:
+            now: Packet time (seconds since epoch)
+            src, sport, dst, dport, proto: 5-tuple
+            size: Packet length in bytes
+            flags: TCP flag bits (utils.syn_flood.TCP_*)
+        """
+        if proto != PROTO_TCP and proto != PROTO_UDP:
+            return
+        self._advance(now)
+
+        key = (proto, src, sport, dst, dport)
+        conn = self.table.get(key)
+        reply = False
+        if conn is None:
+            conn = self.table.get((proto, dst, dport, src, sport))
+            reply = conn is not None
+        if conn is None:
+            if proto == PROTO_UDP:
+                state = UDP
+            elif flags & TCP_SYN and not flags & TCP_ACK:
+                state = SYN_SENT
+            else:
+                state = ESTABLISHED  # picked up mid-stream
+            conn = Connection(key, state, now)
+            self.table[key] = conn
+            if len(self.table) > self.max_entries:
+                _, oldest = next(iter(self.table.items()))
+                self._close(oldest, 'evicted')
+                self.evicted += 1
+        else:
+            self.table.move_to_end(conn.key)
+
+        if reply:
+            conn.reply_packets += 1
+            conn.reply_bytes += size
+        else:
+            conn.orig_packets += 1
+            conn.orig_bytes += size
+        conn.last_seen = max(conn.last_seen, now)
+
+        if proto == PROTO_TCP:
+            if flags & TCP_RST:
+                conn.state = CLOSED
+                self._close(conn, 'reset')
+                return
+            if conn.state == SYN_SENT and reply and flags & TCP_SYN and flags & TCP_ACK:
+                conn.state = SYN_RECV
+            elif conn.state == SYN_RECV and not reply and flags & TCP_ACK:
+                conn.state = ESTABLISHED
+            if flags & TCP_FIN:
+                if reply:
+                    conn.fin_reply = True
+                else:
+                    conn.fin_orig = True
+                conn.state = CLOSED if conn.fin_orig and conn.fin_reply else FIN_WAIT
+
+        self._schedule(conn)
+
+    def update_frame(self, packets: pd.DataFrame):
+        """
+        Account a window of packet records (RealTimeAnalyzer._packet_callback format)
+
+        Args:
+            packets: DataFrame with timestamp, src_ip, src_port, dst_ip, dst_port, protocol, size[, flags]
+        """
+        if packets.empty:
+            return
+        # Naive local datetimes -> seconds; converted back the same way in to_record
+        now = ((packets['timestamp'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy()
+        flags = flag_array(packets['flags']) if 'flags' in packets else np.zeros(len(packets), dtype=np.uint8)
+        # Portless (ICMP) packets have NaN ports and are skipped by update()
+        sport = packets['src_port'].fillna(-1).astype(np.int64)
+        dport = packets['dst_port'].fillna(-1).astype(np.int64)
+        columns = zip(
+            now.tolist(), packets['src_ip'].tolist(), sport.tolist(),
+            packets['dst_ip'].tolist(), dport.tolist(),
+            packets['protocol'].tolist(), packets['size'].tolist(), flags.tolist(),
+        )
+        with self._lock:
+            for ts, src, sport, dst, dport, proto, size, flag in columns:
+                self.update(ts, src, sport, dst, dport, proto, size, flag)
+
+    def drain(self) -> List[Dict]:
+        """Return and forget the sessions that finished since the last call"""
+        with self._lock:
+            finished, self.finished = self.finished, []
+        return finished
+
+    def flush(self) -> List[Dict]:
+        """Close every active connection (shutdown) and return all unreported sessions"""
+        with self._lock:
+            for conn in list(self.table.values()):
+                self._close(conn, 'shutdown')
+        return self.drain()
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            states = {}
+            for conn in self.table.values():
+                states[conn.state] = states.get(conn.state, 0) + 1
+            return {
+                'active': len(self.table),
+                'max_entries': self.max_entries,
+                'states': states,
+                'expired': self.expired,
+                'evicted': self.evicted,
+            }
+
+
+def session_features(sessions: List[Dict]) -> Dict:
+    """
+    Summarize finished sessions for a prediction window
+
+    Args:
+        sessions: Records from ConnTracker.drain()
+
+    Returns:
+        Dictionary of session-level features
+    """
+    if not sessions:
+        return {'sessions_closed': 0, 'mean_session_duration': 0, 'mean_session_bytes': 0,
+                'max_session_bytes': 0, 'reset_sessions': 0, 'unanswered_sessions': 0}
+    durations = np.array([s['duration'] for s in sessions])
+    total_bytes = np.array([s['orig_bytes'] + s['reply_bytes'] for s in sessions])
+    return {
+        'sessions_closed': len(sessions),
+        'mean_session_duration': float(durations.mean()),
+        'mean_session_bytes': float(total_bytes.mean()),
+        'max_session_bytes': int(total_bytes.max()),
+        'reset_sessions': sum(1 for s in sessions if s['close_reason'] == 'reset'),
+        'unanswered_sessions': sum(1 for s in sessions if s['state'] == SYN_SENT),
+    }
+
+
+def append_sessions(sessions: List[Dict], path: str = SESSIONS_FILE):
+    """Append session records to a CSV archive (header written for new files)"""
+    if not sessions:
+        return
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    new_file = not os.path.exists(path)
+    with open(path, 'a', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SESSION_FIELDS)
+        if new_file:
+            writer.writeheader()
+        writer.writerows(sessions)
@@ -0,0 +1,259 @@
+"""
+Local control endpoint for the analyzer processes
+A tiny localhost HTTP server exposing status/health/stats/stop, so the
+dashboard can supervise the analyzer without forking pgrep/pkill.
+State-changing (POST) routes require a per-run token that only local users
+who can read the token file have, and browser requests are refused.
+"""
+
+import os
+import hmac
+import json
+import secrets
+import time
+import logging
+import threading
+import http.client
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, Optional
+
+CONTROL_HOST = '127.0.0.1'
+CONTROL_PORT = 8765
+# Per-run secret for POST routes; written 0600 by the server, read by ControlClient
+CONTROL_TOKEN_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                  'data', 'control.token')
+TOKEN_HEADER = 'X-Control-Token'
+
+
+def _write_token(path: str, token: str):
+    """Write the token readable by the owner only"""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w') as f:
+        os.fchmod(f.fileno(), 0o600)  # an existing file keeps its old mode otherwise
+        f.write(token)
+
+
+class ControlServer:
+    """
+    Route table + ThreadingHTTPServer running in a daemon thread
+    """
+
+    def __init__(self, name: str, host=CONTROL_HOST, port=CONTROL_PORT, token_file=CONTROL_TOKEN_FILE):
+        """
+        Initialize the control server with the built-in /status route
+
+        Args:
+            name: Process name reported by /status
+            host: Interface to bind (localhost only by default)
+            port: TCP port to listen on
+            token_file: Where the per-run token for POST routes is written
+        """
+        self.name = name
+        self.started_at = time.time()
+        self.routes = {}
+        self.add_route('GET', '/status', self._status)
+        self.token = secrets.token_hex(16)
+        self.token_file = token_file
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _refusal(self, method) -> Optional[str]:
+                """Reason to refuse the request, or None"""
+                # Browsers send Origin on cross-site requests; a local client never does
+                if self.headers.get('Origin') is not None:
+                    return "browser requests are not accepted"
+                # A DNS-rebound name reaches 127.0.0.1 with a foreign Host header
+                if self.headers.get('Host', '').lower() not in server.allowed_hosts:
+                    return "unexpected Host header"
+                if method == 'POST' and not hmac.compare_digest(
+                        self.headers.get(TOKEN_HEADER, ''), server.token):
+                    return "missing or invalid control token"
+                return None
+
+            def _dispatch(self, method):
+                refusal = self._refusal(method)
+                if refusal:
+                    self._send(403, {'error': refusal})
+                    return
+                handler = server.routes.get((method, self.path.split('?')[0]))
+                if handler is None:
+                    self._send(404, {'error': f"no route {method} {self.path}"})
+                    return
+                try:
+                    self._send(200, handler())
+                except Exception as e:
+                    self._send(500, {'error': str(e)})
+
+            def _send(self, code, body):
+                if isinstance(body, str):
+                    data, content_type = body.encode(), 'text/plain; version=0.0.4'
+                else:
+                    data, content_type = json.dumps(body, default=str).encode(), 'application/json'
+                self.send_response(code)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._dispatch('GET')
+
+            def do_POST(self):
+                self._dispatch('POST')
+
+            def log_message(self, format, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        bound_port = self._httpd.server_address[1]
+        self.allowed_hosts = {f"{h}:{bound_port}" for h in (host, '127.0.0.1', 'localhost')}
+        try:
+            _write_token(token_file, self.token)
+        except OSError:
+            self._httpd.server_close()
+            raise
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        logging.info(f"🎛️ Control endpoint listening on http://{host}:{port}")
+
+    def _status(self) -> Dict:
+        return {
+            'name': self.name,
+            'pid': os.getpid(),
+            'running': True,
+            'started_at': self.started_at,
+            'uptime': time.time() - self.started_at,
+        }
+
+    def add_route(self, method: str, path: str, handler: Callable):
+        """
+        Register a handler; it returns a dict (sent as JSON) or a str (sent as text)
+
+        Args:
+            method: 'GET' or 'POST'
+            path: URL path, e.g. '/stop'
+            handler: Zero-argument callable
+        """
+        self.routes[(method, path)] = handler
+
+    def close(self):
+        """Stop serving requests and remove the token file"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        try:
+            with open(self.token_file) as f:
+                ours = f.read() == self.token
+            if ours:
+                os.remove(self.token_file)
+        except OSError:
+            pass
+
+
+def start_control_server(name: str, host=CONTROL_HOST, port=CONTROL_PORT) -> Optional[ControlServer]:
+    """Start a ControlServer, or return None if the port is already taken"""
+    try:
+        return ControlServer(name, host, port)
+    except OSError as e:
+        logging.warning(f"⚠️ Control endpoint disabled ({host}:{port}: {e})")
+        return None
+
+
+class ControlError(Exception):
+    """The control endpoint answered with an error (e.g. a rejected rollback)"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.message = message
+
+
+class ControlClient:
+    """
+    Client for ControlServer; every call returns None if nothing is listening
+    and raises ControlError if the endpoint rejects the request
+    """
+
+    def __init__(self, host=CONTROL_HOST, port=CONTROL_PORT, timeout=0.5, token_file=CONTROL_TOKEN_FILE):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self.token_file = token_file
+
+    def _token(self) -> str:
+        """Token of the running server (re-read on every POST; it changes per run)"""
+        try:
+            with open(self.token_file) as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def request(self, method: str, path: str):
+        """
+        Send a request to the control endpoint
+
+        Returns:
+            Parsed JSON (or text) body, or None if the endpoint is unreachable
+
+        Raises:
+            ControlError: If the endpoint answered with a non-200 status
+        """
+        headers = {TOKEN_HEADER: self._token()} if method == 'POST' else {}
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        try:
+            conn.request(method, path, headers=headers)
+            response = conn.getresponse()
+            body = response.read().decode()
+            is_json = response.getheader('Content-Type', '').startswith('application/json')
+        except (OSError, http.client.HTTPException):
+            return None
+        finally:
+            conn.close()
+
+        try:
+            parsed = json.loads(body) if is_json else body
+        except ValueError:
+            parsed = body
+        if response.status != 200:
+            message = parsed.get('error', body) if isinstance(parsed, dict) else body
+            raise ControlError(response.status, message)
+        return parsed
+
+    def status(self) -> Optional[Dict]:
+        return self.request('GET', '/status')
+
+    def health(self) -> Optional[Dict]:
+        return self.request('GET', '/health')
+
+    def stats(self) -> Optional[Dict]:
+        return self.request('GET', '/stats')
+
+    def stop(self) -> Optional[Dict]:
+        return self.request('POST', '/stop')
+
+    def model_status(self) -> Optional[Dict]:
+        return self.request('GET', '/model')
+
+    def rollback_model(self) -> Optional[Dict]:
+        return self.request('POST', '/model/rollback')
+
+    def wait_until(self, running: bool, timeout=5.0, interval=0.05) -> bool:
+        """
+        Poll /status until the process is (or is no longer) reachable
+
+        Args:
+            running: Wait for the endpoint to come up (True) or go away (False)
+            timeout: Maximum seconds to wait
+            interval: Seconds between polls
+
+        Returns:
+            True if the desired state was reached
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if (self.status() is not None) == running:
+                return True
+            time.sleep(interval)
+        return False
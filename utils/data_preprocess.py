@@ -3,83 +3,178 @@ import os
 import json
 import random
 from datetime import datetime, timedelta
+from utils.packet_archive import COLUMN_ALIASES
+from utils.rollups import TrafficRollup
 
-def preprocess_packet_data():
-    input_file = 'data/packets_cleaned.csv'
-    output_file = 'data/packets_features.csv'
+# Parsed with to_numeric by add_ip_features, so chunk dtypes do not matter
+PORT_COLUMNS = ['src_port', 'dst_port']
+
+
+def _last_octet(ip):
+    """Last octet of a dotted-quad string, 0 for anything else"""
+    try:
+        parts = ip.split('.')
+        if len(parts) == 4:
+            return int(parts[-1])
+        return 0
+    except:
+        return 0
+
+
+def _ip_features(ips: pd.Series):
+    """
+    Stripped IPs, last octets and 192.168 flags for a column
+
+    Each distinct address is parsed once and the results are gathered back
+    by code, so the cost scales with unique hosts rather than rows
+    """
+    codes, uniques = pd.factorize(ips.astype(str), use_na_sentinel=False)
+    uniques = pd.Series(uniques, dtype=object).str.strip()
+    last = uniques.map(_last_octet).to_numpy(dtype=int)
+    local = uniques.str.startswith('192.168', na=False).to_numpy(dtype=int)
+    return uniques.to_numpy()[codes], last[codes], local[codes]
 
-    print("🔄 Loading packet data...")
-    df = pd.read_csv(input_file)
 
-    print(f"✅ Loaded {len(df)} rows with columns: {list(df.columns)}")
+def add_ip_features(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalize ports/IPs and add last-octet and local-network columns
 
+    Args:
+        df: Packet rows with src_ip, dst_ip, src_port, dst_port
+
+    Returns:
+        The same frame with src_last, dst_last, src_local, dst_local added
+    """
     # Ensure ports are integers; fill NaN with 0
-    df['src_port'] = pd.to_numeric(df['src_port'], errors='coerce').fillna(0).astype(int)
-    df['dst_port'] = pd.to_numeric(df['dst_port'], errors='coerce').fillna(0).astype(int)
-
-    # Ensure IPs are strings
-    df['src_ip'] = df['src_ip'].astype(str).str.strip()
-    df['dst_ip'] = df['dst_ip'].astype(str).str.strip()
-
-    # Extract last octet safely
-    def get_last_octet(ip):
-        try:
-            parts = ip.split('.')
-            if len(parts) == 4:
-                return int(parts[-1])
-            return 0
-        except:
-            return 0
-
-    df['src_last'] = df['src_ip'].apply(get_last_octet)
-    df['dst_last'] = df['dst_ip'].apply(get_last_octet)
-
-    # Flag local IPs (private 192.168.x.x range)
-    df['src_local'] = df['src_ip'].apply(lambda x: 1 if x.startswith('192.168') else 0)
-    df['dst_local'] = df['dst_ip'].apply(lambda x: 1 if x.startswith('192.168') else 0)
-
-    # Save the processed features
-    df.to_csv(output_file, index=False)
-    print(f"✅ Features saved to {output_file} ({len(df)} rows)")
+    for col in PORT_COLUMNS:
+        df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0).astype(int)
 
-def generate_sample_data(num_packets=100):
-    """Generate sample packet data with CURRENT timestamps"""
-    import random
-    from datetime import datetime, timedelta
-    
-    os.makedirs('data', exist_ok=True)
-    
-    protocols = ['TCP', 'UDP', 'ICMP']
-    ips = [
-        '192.168.1.100', '192.168.1.101', '192.168.1.102',
-        '8.8.8.8', '1.1.1.1', '172.217.164.46', '142.250.185.206',
-        '104.244.42.129', '151.101.1.140', '13.107.42.14'
-    ]
+    # Ensure IPs are strings; flag local IPs (private 192.168.x.x range)
+    df['src_ip'], src_last, src_local = _ip_features(df['src_ip'])
+    df['dst_ip'], dst_last, dst_local = _ip_features(df['dst_ip'])
+    df['src_last'] = src_last
+    df['dst_last'] = dst_last
+    df['src_local'] = src_local
+    df['dst_local'] = dst_local
+    return df
+
+
+def _passthrough_dtypes(input_file: str, columns: list, chunksize: int) -> dict:
+    """
+    Resolve the dtype pandas would infer for each non-port column over the
+    whole file, so every chunk is parsed (and written) the same way
+    """
+    others = [c for c in columns if c not in PORT_COLUMNS]
+    if not others:
+        return {}
+
+    seen = {c: set() for c in others}
+    for chunk in pd.read_csv(input_file, usecols=others, chunksize=chunksize):
+        for col, dtype in chunk.dtypes.items():
+            seen[col].add(dtype.kind)
+
+    dtypes = {}
+    for col, kinds in seen.items():
+        if len(kinds) == 1:
+            continue  # consistent across chunks; let pandas infer it again
+        # Integer chunks plus chunks with gaps widen to float, as a single read would
+        dtypes[col] = 'float64' if kinds <= {'i', 'f'} else 'object'
+    return dtypes
+
+
+def preprocess_packet_data(input_file='data/packets_cleaned.csv', output_file='data/packets_features.csv',
+                           chunksize=250_000, workers=1):
+    """
+    Stream the cleaned packet CSV through add_ip_features in bounded memory
+
+    Args:
+        input_file: Cleaned packet CSV
+        output_file: Feature CSV (same content as processing the file in one piece)
+        chunksize: Rows per chunk
+        workers: Processes transforming chunks in parallel (1 = in-process)
+    """
+    print("🔄 Loading packet data...")
+    columns = list(pd.read_csv(input_file, nrows=0).columns)
+    print(f"✅ Streaming {input_file} in chunks of {chunksize:,} rows with columns: {columns}")
+
+    dtypes = _passthrough_dtypes(input_file, columns, chunksize)
+    chunks = pd.read_csv(input_file, chunksize=chunksize, dtype=dtypes)
+
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        from collections import deque
+
+        def transformed():
+            # Keep at most 2 chunks per worker in flight so memory stays bounded
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                pending = deque()
+                for chunk in chunks:
+                    pending.append(pool.submit(add_ip_features, chunk))
+                    if len(pending) >= workers * 2:
+                        yield pending.popleft().result()
+                while pending:
+                    yield pending.popleft().result()
+        results = transformed()
+    else:
+        results = (add_ip_features(chunk) for chunk in chunks)
+
+    # Save the processed features chunk by chunk
+    total = 0
+    for i, df in enumerate(results):
+        df.to_csv(output_file, index=False, header=(i == 0), mode='w' if i == 0 else 'a')
+        total += len(df)
+    if total == 0:
+        add_ip_features(pd.read_csv(input_file, nrows=0, dtype=dtypes)).to_csv(output_file, index=False)
+
+    print(f"✅ Features saved to {output_file} ({total} rows)")
+
+
+# Address pool, protocols and service ports of the sample traffic
+SAMPLE_IPS = [
+    '192.168.1.100', '192.168.1.101', '192.168.1.102',
+    '8.8.8.8', '1.1.1.1', '172.217.164.46', '142.250.185.206',
+    '104.244.42.129', '151.101.1.140', '13.107.42.14'
+]
+SAMPLE_PROTOCOLS = ['TCP', 'UDP', 'ICMP']
+SAMPLE_PORTS = [80, 443, 53, 22, 3389, 8080]
+
+def sample_packets(num_packets, rng=random, now=None, spread=300):
+    """
+    Random sample packets in packets_log.csv columns
     
+    Args:
+        num_packets: Number of packets
+        rng: random.Random (or the random module) to draw from; seed it for repeatable traffic
+        now: Newest possible timestamp (default: datetime.now())
+        spread: Timestamps fall within the last spread seconds before now
+        
+    Returns:
+        List of packet dictionaries with datetime timestamps, in generation order
+    """
+    now = now or datetime.now()
     packets = []
-    now = datetime.now()
-    
     for i in range(num_packets):
-        # Generate timestamps within LAST 5 MINUTES (for Live Monitoring)
-        time_offset = random.uniform(0, 300)  # 0-300 seconds ago
-        timestamp = now - timedelta(seconds=time_offset)
-        
-        protocol = random.choice(protocols)
-        src_ip = random.choice(ips)
-        dst_ip = random.choice([ip for ip in ips if ip != src_ip])
-        src_port = random.randint(1024, 65535)
-        dst_port = random.choice([80, 443, 53, 22, 3389, 8080])
-        size = random.randint(64, 1500)
-        
+        timestamp = now - timedelta(seconds=rng.uniform(0, spread))
+        src_ip = rng.choice(SAMPLE_IPS)
         packets.append({
-            'Timestamp': timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            'Timestamp': timestamp,
             'Source IP': src_ip,
-            'Destination IP': dst_ip,
-            'Protocol': protocol,
-            'Source Port': src_port,
-            'Destination Port': dst_port,
-            'Packet Size': size
+            'Destination IP': rng.choice([ip for ip in SAMPLE_IPS if ip != src_ip]),
+            'Protocol': rng.choice(SAMPLE_PROTOCOLS),
+            'Source Port': rng.randint(1024, 65535),
+            'Destination Port': rng.choice(SAMPLE_PORTS),
+            'Packet Size': rng.randint(64, 1500)
         })
+    return packets
+
+def generate_sample_data(num_packets=100):
+    """Generate sample packet data with CURRENT timestamps"""
+    os.makedirs('data', exist_ok=True)
+    
+    # Timestamps within the LAST 5 MINUTES (for Live Monitoring)
+    packets = sample_packets(num_packets)
+    for packet in packets:
+        packet['Timestamp'] = packet['Timestamp'].strftime('%Y-%m-%d %H:%M:%S')
     
     # Sort by timestamp (newest first for dashboard)
     packets.sort(key=lambda x: x['Timestamp'], reverse=True)
@@ -87,6 +182,9 @@ def generate_sample_data(num_packets=100):
     # Save to CSV
     df = pd.DataFrame(packets)
     df.to_csv('data/packets_log.csv', index=False)
+    
+    # Rebuild dashboard rollups to match the regenerated log
+    TrafficRollup.from_frame(df.rename(columns=COLUMN_ALIASES)).save('data/packet_rollups.json')
     print(f"✅ Generated {num_packets} sample packets with current timestamps")
     return True
 
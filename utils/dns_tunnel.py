@@ -0,0 +1,254 @@
+"""
+DNS payload parsing and DNS tunneling/exfiltration detection
+Parses the question of raw UDP/53 payloads on the capture path (no Scapy
+DNS layer) and keeps bounded per-client, per-domain statistics that reveal
+data smuggled through query names
+"""
+
+import math
+import struct
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+RCODE_NXDOMAIN = 3
+
+# Public suffixes where the registered domain has three labels (example.co.uk)
+SECOND_LEVEL_SUFFIXES = {
+    'co.uk', 'org.uk', 'ac.uk', 'gov.uk', 'com.au', 'net.au', 'org.au', 'co.nz',
+    'co.jp', 'co.in', 'co.za', 'com.br', 'com.cn', 'com.mx', 'com.tr', 'co.kr',
+}
+
+
+def parse_dns(payload: bytes) -> Optional[Tuple[str, int, int, bool]]:
+    """
+    Parse the first question of a DNS message
+
+    Args:
+        payload: UDP payload bytes
+
+    Returns:
+        (qname, qtype, rcode, is_response), or None if the payload is not a
+        well-formed DNS message with a question
+    """
+    if len(payload) < 12:
+        return None
+    flags, qdcount = struct.unpack_from('!2xHH', payload)
+    if qdcount == 0:
+        return None
+
+    labels = []
+    offset = 12
+    length = 0
+    while True:
+        if offset >= len(payload):
+            return None
+        size = payload[offset]
+        if size == 0:
+            offset += 1
+            break
+        # Compression pointers / extended label types never appear in a first question
+        if size & 0xC0 or len(labels) >= 127:
+            return None
+        length += size + 1
+        if length > 255 or offset + 1 + size > len(payload):
+            return None
+        labels.append(payload[offset + 1:offset + 1 + size].decode('ascii', 'replace').lower())
+        offset += 1 + size
+    if offset + 4 > len(payload):
+        return None
+
+    qtype = struct.unpack_from('!H', payload, offset)[0]
+    return '.'.join(labels), qtype, flags & 0x000F, bool(flags & 0x8000)
+
+
+def registered_domain(qname: str) -> str:
+    """Registered domain of a query name (www.a.example.co.uk -> example.co.uk)"""
+    labels = qname.rstrip('.').split('.')
+    keep = 3 if '.'.join(labels[-2:]) in SECOND_LEVEL_SUFFIXES else 2
+    return '.'.join(labels[-keep:])
+
+
+def label_entropy(label: str) -> float:
+    """Shannon entropy (bits per character) of a label"""
+    if not label:
+        return 0.0
+    n = len(label)
+    return -sum(c / n * math.log2(c / n) for c in Counter(label).values())
+
+
+class DistinctSketch:
+    """64-register HyperLogLog: ~13% error, 64 bytes regardless of cardinality"""
+
+    __slots__ = ('registers',)
+    M = 64
+    ALPHA = 0.709
+
+    def __init__(self):
+        self.registers = bytearray(self.M)
+
+    def add(self, value: str):
+        h = hash(value) & 0xFFFFFFFFFFFFFFFF
+        index = h & (self.M - 1)
+        rest = h >> 6
+        rank = 59 - rest.bit_length()  # position of the first 1 bit in the remaining 58 bits
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def estimate(self) -> float:
+        estimate = self.ALPHA * self.M * self.M / sum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.M and zeros:
+            estimate = self.M * math.log(self.M / zeros)  # small-range correction
+        return estimate
+
+
+class _DomainStats:
+    __slots__ = ('queries', 'name_bytes', 'max_length', 'entropy_sum', 'subdomains')
+
+    def __init__(self):
+        self.queries = 0
+        self.name_bytes = 0
+        self.max_length = 0
+        self.entropy_sum = 0.0
+        self.subdomains = DistinctSketch()
+
+
+class DnsTunnelDetector:
+    """
+    Per-(client, registered domain) query statistics over a fixed interval
+
+    Memory is bounded by max_pairs and max_clients; the least recently
+    active entries are dropped first.
+    """
+
+    def __init__(self, interval=60.0, max_pairs=50_000, max_clients=10_000,
+                 min_queries=20, unique_subdomains=30, mean_length=40, entropy=3.5,
+                 exfil_bytes=4096, nxdomain_rate=0.5):
+        """
+        Initialize the detector
+
+        Args:
+            interval: Seconds of statistics evaluated together (then reset)
+            max_pairs: Cap on tracked (client, domain) pairs
+            max_clients: Cap on clients with response (NXDOMAIN) statistics
+            min_queries: Queries to one domain needed before it is judged
+            unique_subdomains: Distinct subdomains of one domain that suggest tunneling
+            mean_length: Mean query name length that suggests tunneling
+            entropy: Mean leftmost-label entropy (bits/char) that suggests encoded data
+            exfil_bytes: Query name bytes to one domain per interval treated as exfiltration
+            nxdomain_rate: Share of NXDOMAIN answers that suggests DGA or tunnel probing
+        """
+        self.interval = interval
+        self.max_pairs = max_pairs
+        self.max_clients = max_clients
+        self.min_queries = min_queries
+        self.unique_subdomains = unique_subdomains
+        self.mean_length = mean_length
+        self.entropy = entropy
+        self.exfil_bytes = exfil_bytes
+        self.nxdomain_rate = nxdomain_rate
+
+        self.pairs = OrderedDict()  # (client, domain) -> _DomainStats
+        self.clients = OrderedDict()  # client -> [responses, nxdomain]
+        self.interval_start = None
+        self.alerted = set()  # alert keys already raised this interval
+        self.alerts_raised = 0
+        self._lock = threading.Lock()
+
+    def observe(self, src_ip: str, dst_ip: str, dns: Tuple[str, int, int, bool]):
+        """
+        Account one parsed DNS packet
+
+        Args:
+            src_ip, dst_ip: Packet addresses (the client is the querier)
+            dns: parse_dns result
+        """
+        qname, _, rcode, is_response = dns
+        with self._lock:
+            if is_response:
+                entry = self.clients.get(dst_ip)
+                if entry is None:
+                    entry = self.clients[dst_ip] = [0, 0]
+                    if len(self.clients) > self.max_clients:
+                        self.clients.popitem(last=False)
+                else:
+                    self.clients.move_to_end(dst_ip)
+                entry[0] += 1
+                entry[1] += rcode == RCODE_NXDOMAIN
+                return
+
+            domain = registered_domain(qname)
+            key = (src_ip, domain)
+            stats = self.pairs.get(key)
+            if stats is None:
+                stats = self.pairs[key] = _DomainStats()
+                if len(self.pairs) > self.max_pairs:
+                    self.pairs.popitem(last=False)
+            else:
+                self.pairs.move_to_end(key)
+
+            subdomain = qname[:-len(domain)].rstrip('.')
+            stats.queries += 1
+            stats.name_bytes += len(qname)
+            stats.max_length = max(stats.max_length, len(qname))
+            if subdomain:
+                stats.subdomains.add(subdomain)
+                stats.entropy_sum += label_entropy(subdomain.split('.', 1)[0])
+
+    def evaluate(self, now: float) -> List[Dict]:
+        """
+        Check the current interval and start a new one once it has elapsed
+
+        Args:
+            now: Current time (seconds since epoch)
+
+        Returns:
+            List of new alert dictionaries (type, client, domain and the evidence);
+            each alert is raised at most once per interval
+        """
+        alerts = []
+        with self._lock:
+            if self.interval_start is None:
+                self.interval_start = now
+
+            for (client, domain), s in self.pairs.items():
+                if s.queries < self.min_queries:
+                    continue
+                unique = s.subdomains.estimate()
+                mean_length = s.name_bytes / s.queries
+                mean_entropy = s.entropy_sum / s.queries
+                evidence = {
+                    'client': client, 'domain': domain, 'queries': s.queries,
+                    'unique_subdomains': round(unique), 'mean_qname_length': round(mean_length, 1),
+                    'mean_label_entropy': round(mean_entropy, 2), 'qname_bytes': s.name_bytes,
+                }
+                if s.name_bytes >= self.exfil_bytes and unique >= self.unique_subdomains:
+                    alerts.append({'type': 'data_exfiltration', **evidence})
+                elif unique >= self.unique_subdomains and (mean_length >= self.mean_length
+                                                           or mean_entropy >= self.entropy):
+                    alerts.append({'type': 'dns_tunneling', **evidence})
+
+            for client, (responses, nxdomain) in self.clients.items():
+                if responses >= self.min_queries and nxdomain / responses >= self.nxdomain_rate:
+                    alerts.append({'type': 'dns_nxdomain_burst', 'client': client,
+                                   'responses': responses, 'nxdomain': nxdomain})
+
+            alerts = [a for a in alerts if (a['type'], a['client'], a.get('domain')) not in self.alerted]
+            self.alerted.update((a['type'], a['client'], a.get('domain')) for a in alerts)
+
+            if now - self.interval_start >= self.interval:
+                self.pairs.clear()
+                self.clients.clear()
+                self.alerted.clear()
+                self.interval_start = now
+            self.alerts_raised += len(alerts)
+        return alerts
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'tracked_pairs': len(self.pairs),
+                'tracked_clients': len(self.clients),
+                'alerts_raised': self.alerts_raised,
+            }
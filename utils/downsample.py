@@ -0,0 +1,110 @@
+"""
+Server-side downsampling for dashboard charts
+Pre-bins histograms and decimates time series so Plotly payloads stay
+bounded no matter how many rows sit behind a chart
+"""
+
+import numpy as np
+
+# Upper bound on points sent to the browser per trace
+MAX_POINTS = 500
+
+
+def histogram(values, bins=20, value_range=None):
+    """
+    Pre-bin values for a go.Bar chart instead of shipping raw samples
+
+    Args:
+        values: Sequence of numbers
+        bins: Number of equal-width bins
+        value_range: Optional (min, max); defaults to the data range
+
+    Returns:
+        Tuple (bin centers, counts, bin width)
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[np.isfinite(values)]
+    if values.size == 0:
+        return np.array([]), np.array([], dtype=np.int64), 0.0
+
+    counts, edges = np.histogram(values, bins=bins, range=value_range)
+    centers = (edges[:-1] + edges[1:]) / 2
+    return centers, counts, float(edges[1] - edges[0])
+
+
+def _as_float(x):
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    return x.astype(float)
+
+
+def lttb(x, y, n_out=MAX_POINTS):
+    """
+    Largest-Triangle-Three-Buckets downsampling, keeps the visual shape of a line
+
+    Args:
+        x: Monotonic x values (numbers or datetime64)
+        y: y values
+        n_out: Number of points to keep (first and last are always kept)
+
+    Returns:
+        Tuple (x, y) with at most n_out points
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= n_out or n_out < 3:
+        return x, y
+
+    xf = _as_float(x)
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+
+    # Bucket boundaries over the interior points
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    a = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        next_start = end
+        next_end = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = xf[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Pick the point forming the largest triangle with the previous pick and next bucket's mean
+        areas = np.abs((xf[a] - avg_x) * (y[start:end] - y[a]) - (xf[a] - xf[start:end]) * (avg_y - y[a]))
+        a = start + int(np.argmax(areas))
+        keep[i + 1] = a
+
+    return x[keep], y[keep]
+
+
+def minmax_decimate(x, y, n_out=MAX_POINTS):
+    """
+    Keep the min and max of each bucket, preserves spikes in dense series
+
+    Args:
+        x: x values
+        y: y values
+        n_out: Maximum number of points to keep
+
+    Returns:
+        Tuple (x, y) with at most n_out points, in original order
+    """
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n <= n_out or n_out < 2:
+        return x, y
+
+    n_buckets = n_out // 2
+    edges = np.linspace(0, n, n_buckets + 1).astype(np.int64)
+    keep = []
+    for start, end in zip(edges[:-1], edges[1:]):
+        if end <= start:
+            continue
+        segment = y[start:end]
+        keep.extend(sorted({start + int(np.argmin(segment)), start + int(np.argmax(segment))}))
+
+    keep = np.asarray(keep, dtype=np.int64)
+    return x[keep], y[keep]
@@ -0,0 +1,221 @@
+"""
+Outbound byte accounting for data exfiltration detection
+Counts bytes and flows each internal host sends to external destinations
+in fixed time buckets, and compares recent totals with the host's own
+history so both bursts and slow, steady leaks stand out
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+OUTBOUND_FILE = 'data/outbound_history.npz'
+
+
+class OutboundAccounting:
+    """
+    Per-host ring of time buckets in a struct-of-arrays table
+
+    Row i of bytes/flows is host i's ring of n_buckets counters; memory is
+    max_hosts * n_buckets * 12 bytes at most (~17 MB for 10k hosts, 24 h).
+    """
+
+    def __init__(self, max_hosts=10_000, bucket_seconds=600, n_buckets=144, horizons=(1, 6),
+                 k=4.0, min_history=12, min_bytes=50e6):
+        """
+        Initialize the table
+
+        Args:
+            max_hosts: Hard cap on tracked hosts (least recently seen is evicted)
+            bucket_seconds: Width of one bucket
+            n_buckets: Buckets of history kept per host
+            horizons: Recent spans (in buckets) compared with history; the long one catches slow leaks
+            k: Limit is expected + k * spread of the host's history
+            min_history: Buckets of history a host needs before it is judged
+            min_bytes: Bytes a horizon must exceed regardless of history
+        """
+        self.max_hosts = max_hosts
+        self.bucket_seconds = bucket_seconds
+        self.n_buckets = n_buckets
+        self.horizons = tuple(horizons)
+        self.k = k
+        self.min_history = min_history
+        self.min_bytes = min_bytes
+
+        self.index = {}  # ip -> row
+        self.hosts: List[str] = []
+        capacity = min(256, max_hosts)
+        self.bytes = np.zeros((capacity, n_buckets))
+        self.flows = np.zeros((capacity, n_buckets), dtype=np.uint32)
+        self.first_epoch = np.zeros(capacity, dtype=np.int64)
+        self.last_seen = np.zeros(capacity)
+        self.epoch = None  # bucket number (time // bucket_seconds) being filled
+        self.alerted = {}  # (host, horizon) -> epoch of the last alert
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def _row(self, host: str, now: float) -> int:
+        row = self.index.get(host)
+        if row is not None:
+            return row
+        if len(self.hosts) < self.max_hosts:
+            if len(self.hosts) == len(self.last_seen):
+                capacity = min(len(self.last_seen) * 2, self.max_hosts)
+                self.bytes = np.resize(self.bytes, (capacity, self.n_buckets))
+                self.flows = np.resize(self.flows, (capacity, self.n_buckets))
+                self.first_epoch = np.resize(self.first_epoch, capacity)
+                self.last_seen = np.resize(self.last_seen, capacity)
+            row = len(self.hosts)
+            self.hosts.append(host)
+        else:
+            row = int(np.argmin(self.last_seen))
+            del self.index[self.hosts[row]]
+            self.hosts[row] = host
+        self.index[host] = row
+        self.bytes[row] = 0
+        self.flows[row] = 0
+        self.first_epoch[row] = self.epoch
+        self.last_seen[row] = now
+        return row
+
+    def _advance(self, now: float):
+        """Zero the buckets that the ring moves into"""
+        epoch = int(now // self.bucket_seconds)
+        if self.epoch is None:
+            self.epoch = epoch
+            return
+        for e in range(self.epoch + 1, min(epoch, self.epoch + self.n_buckets) + 1):
+            self.bytes[:, e % self.n_buckets] = 0
+            self.flows[:, e % self.n_buckets] = 0
+        self.epoch = max(self.epoch, epoch)
+
+    def add(self, hosts: Iterable[str], sent_bytes, flows, now: float):
+        """
+        Account outbound traffic
+
+        Args:
+            hosts: Internal source ips
+            sent_bytes: Bytes each host sent to external destinations
+            flows: Distinct external (destination, port) flows per host
+            now: Time of the traffic (seconds since epoch)
+        """
+        with self._lock:
+            self._advance(now)
+            rows = np.array([self._row(host, now) for host in hosts], dtype=np.intp)
+            if len(rows) == 0:
+                return
+            column = self.epoch % self.n_buckets
+            np.add.at(self.bytes[:, column], rows, np.asarray(sent_bytes, dtype=float))
+            np.add.at(self.flows[:, column], rows, np.asarray(flows, dtype=np.uint32))
+            self.last_seen[rows] = now
+
+    def check(self, now: float) -> List[Dict]:
+        """
+        Compare each host's recent outbound bytes with its history
+
+        Args:
+            now: Current time (seconds since epoch)
+
+        Returns:
+            New alerts (at most one per host and horizon per bucket)
+        """
+        alerts = []
+        with self._lock:
+            self._advance(now)
+            n = len(self.hosts)
+            if n == 0:
+                return alerts
+            # Columns oldest -> newest
+            order = (np.arange(self.n_buckets) + self.epoch + 1) % self.n_buckets
+            ring = self.bytes[:n][:, order]
+            flows = self.flows[:n][:, order]
+            age = self.epoch - self.first_epoch[:n] + 1  # buckets since the host was first seen
+
+            for h in self.horizons:
+                recent = ring[:, -h:].sum(axis=1)
+                history = ring[:, :-h]
+                length = np.clip(age - h, 0, history.shape[1])
+                # Only the buckets that existed for the host count as history
+                valid = np.arange(history.shape[1]) >= history.shape[1] - length[:, None]
+                mean = (history * valid).sum(axis=1) / np.maximum(length, 1)
+                var = (((history - mean[:, None]) ** 2) * valid).sum(axis=1) / np.maximum(length, 1)
+                limit = np.maximum(mean * h + self.k * np.sqrt(var * h), self.min_bytes)
+
+                for i in np.nonzero((length >= self.min_history) & (recent > limit))[0]:
+                    key = (self.hosts[i], h)
+                    if self.alerted.get(key) == self.epoch:
+                        continue
+                    self.alerted[key] = self.epoch
+                    alerts.append({
+                        'type': 'data_exfiltration',
+                        'host': self.hosts[i],
+                        'window_seconds': h * self.bucket_seconds,
+                        'bytes': float(recent[i]),
+                        'expected_bytes': float(mean[i] * h),
+                        'limit': float(limit[i]),
+                        'flows': int(flows[i, -h:].sum()),
+                    })
+            if len(self.alerted) > 4 * self.max_hosts:
+                self.alerted = {k: e for k, e in self.alerted.items() if e == self.epoch}
+        return alerts
+
+    def save(self, path: str = OUTBOUND_FILE):
+        """Write the table to an .npz file (atomically)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        n = len(self.hosts)
+        tmp = f"{path}.tmp"
+        with self._lock, open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f,
+                layout=np.array([self.bucket_seconds, self.n_buckets, -1 if self.epoch is None else self.epoch]),
+                hosts=np.array(self.hosts, dtype=str),
+                bytes=self.bytes[:n], flows=self.flows[:n],
+                first_epoch=self.first_epoch[:n], last_seen=self.last_seen[:n],
+            )
+        os.replace(tmp, path)
+        logging.info(f"💾 Saved outbound history for {n} hosts to {path}")
+
+    def load(self, path: str = OUTBOUND_FILE) -> bool:
+        """Restore a table written by save(); returns False if there is nothing usable"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                bucket_seconds, n_buckets, epoch = (int(v) for v in data['layout'])
+                if (bucket_seconds, n_buckets) != (self.bucket_seconds, self.n_buckets):
+                    logging.warning(f"⚠️ Ignoring {path}: bucket layout changed")
+                    return False
+                hosts = [str(h) for h in data['hosts']][-self.max_hosts:]
+                n = len(hosts)
+                arrays = {name: data[name][-n:] for name in ('bytes', 'flows', 'first_epoch', 'last_seen')}
+        except FileNotFoundError:
+            return False
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"⚠️ Could not load outbound history from {path}: {e}")
+            return False
+
+        with self._lock:
+            capacity = max(len(self.last_seen), n)
+            self.bytes = np.zeros((capacity, self.n_buckets))
+            self.flows = np.zeros((capacity, self.n_buckets), dtype=np.uint32)
+            self.first_epoch = np.zeros(capacity, dtype=np.int64)
+            self.last_seen = np.zeros(capacity)
+            for name, values in arrays.items():
+                getattr(self, name)[:n] = values
+            self.hosts = hosts
+            self.index = {host: row for row, host in enumerate(hosts)}
+            self.epoch = None if epoch < 0 else epoch
+        logging.info(f"📂 Loaded outbound history for {n} hosts from {path}")
+        return True
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'hosts': len(self.hosts),
+                'max_hosts': self.max_hosts,
+                'bucket_seconds': self.bucket_seconds,
+                'history_hours': self.n_buckets * self.bucket_seconds / 3600,
+            }
@@ -0,0 +1,213 @@
+"""
+Per-host behavioral baselines
+Keeps a time-decayed mean and variance of each internal host's packet rate,
+byte rate, fan-out and port diversity in a struct-of-arrays table so rule
+thresholds can adapt to what is normal for that host
+"""
+
+import os
+import math
+import ipaddress
+import logging
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Column order of the per-host metric arrays
+HOST_METRICS = ('pps', 'bytes_per_second', 'fan_out', 'port_diversity')
+
+BASELINES_FILE = 'data/host_baselines.npz'
+
+
+@lru_cache(maxsize=65536)
+def is_internal_ip(ip: str) -> bool:
+    """True for private/link-local/loopback addresses (RFC 1918 and friends)"""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return False
+    return address.is_private and not address.is_unspecified
+
+
+class HostBaselines:
+    """
+    Struct-of-arrays baseline table indexed by host id
+
+    Row i of mean/var holds host i's EWMA of every HOST_METRICS column; the
+    only per-host Python object is the ip -> row entry in the index dict.
+    """
+
+    def __init__(self, max_hosts=65536, half_life=6 * 3600, warmup=10, k=4.0,
+                 defaults: Optional[Dict] = None, floors: Optional[Dict] = None):
+        """
+        Initialize the table
+
+        Args:
+            max_hosts: Hard cap on tracked hosts (least recently seen is evicted)
+            half_life: Seconds after which an old observation has half its weight
+            warmup: Observations before a host's own baseline replaces the defaults
+            k: Limit is mean + k * std
+            defaults: Per-metric limits used while a host is warming up
+            floors: Per-metric minimum limits, so a quiet host is not flagged for a few packets
+        """
+        self.max_hosts = max_hosts
+        self.half_life = half_life
+        self.warmup = warmup
+        self.k = k
+        self.defaults = self._metric_array(defaults, np.inf)
+        self.floors = self._metric_array(floors, 0.0)
+
+        self.index = {}  # ip -> row
+        self.hosts: List[str] = []  # row -> ip
+        capacity = min(1024, max_hosts)
+        n_metrics = len(HOST_METRICS)
+        self.mean = np.zeros((capacity, n_metrics))
+        self.var = np.zeros((capacity, n_metrics))
+        self.last_seen = np.zeros(capacity)
+        self.samples = np.zeros(capacity, dtype=np.int32)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _metric_array(values: Optional[Dict], fill: float) -> np.ndarray:
+        values = values or {}
+        return np.array([float(values.get(name, fill)) for name in HOST_METRICS])
+
+    def __len__(self):
+        return len(self.hosts)
+
+    def _grow(self):
+        capacity = min(len(self.last_seen) * 2, self.max_hosts)
+        self.mean = np.resize(self.mean, (capacity, self.mean.shape[1]))
+        self.var = np.resize(self.var, (capacity, self.var.shape[1]))
+        self.last_seen = np.resize(self.last_seen, capacity)
+        self.samples = np.resize(self.samples, capacity)
+
+    def _row(self, host: str, now: float) -> int:
+        row = self.index.get(host)
+        if row is not None:
+            return row
+
+        if len(self.hosts) < self.max_hosts:
+            if len(self.hosts) == len(self.last_seen):
+                self._grow()
+            row = len(self.hosts)
+            self.hosts.append(host)
+        else:
+            # Table full: reuse the least recently seen host's row
+            row = int(np.argmin(self.last_seen))
+            del self.index[self.hosts[row]]
+            self.hosts[row] = host
+
+        self.index[host] = row
+        self.mean[row] = 0
+        self.var[row] = 0
+        # Stamped now so later new hosts in the same batch cannot evict this row
+        self.last_seen[row] = now
+        self.samples[row] = 0
+        return row
+
+    def _limits(self, rows: np.ndarray) -> np.ndarray:
+        limits = self.mean[rows] + self.k * np.sqrt(self.var[rows])
+        limits = np.maximum(limits, self.floors)
+        warming = self.samples[rows] < self.warmup
+        limits[warming] = self.defaults
+        return limits
+
+    def limit(self, host: str, metric: str, default: float) -> float:
+        """Current limit of one metric for one host (default for unknown hosts)"""
+        row = self.index.get(host)
+        if row is None or self.samples[row] < self.warmup:
+            return default
+        j = HOST_METRICS.index(metric)
+        return max(self.mean[row, j] + self.k * math.sqrt(self.var[row, j]), self.floors[j])
+
+    def observe(self, hosts: Iterable[str], values: np.ndarray, now: float) -> np.ndarray:
+        """
+        Check one window of per-host metrics against the baselines, then update them
+
+        Args:
+            hosts: Host ips, one per row of values
+            values: Array of shape (len(hosts), len(HOST_METRICS))
+            now: Window end time (seconds since epoch)
+
+        Returns:
+            Array of limits in effect for each host before the update (same shape as values)
+        """
+        values = np.asarray(values, dtype=float)
+        with self._lock:
+            rows = np.array([self._row(host, now) for host in hosts], dtype=np.intp)
+            if len(rows) == 0:
+                return np.empty((0, len(HOST_METRICS)))
+            limits = self._limits(rows)
+
+            # Time-decayed weight of the new observation; plain averaging while warming up
+            elapsed = np.maximum(now - self.last_seen[rows], 0)
+            alpha = 1 - np.exp(-math.log(2) * elapsed / self.half_life)
+            alpha = np.maximum(alpha, 1.0 / (self.samples[rows] + 1))
+            # Windows over the limit barely move the baseline, so an attack doesn't become normal
+            exceeded = (values > limits).any(axis=1)
+            alpha = np.where(exceeded & (self.samples[rows] >= self.warmup), alpha * 0.1, alpha)[:, None]
+
+            delta = values - self.mean[rows]
+            self.mean[rows] += alpha * delta
+            self.var[rows] = (1 - alpha) * (self.var[rows] + alpha * delta * delta)
+            self.last_seen[rows] = now
+            self.samples[rows] += 1
+        return limits
+
+    def save(self, path: str = BASELINES_FILE):
+        """Write the table to an .npz file (atomically)"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        n = len(self.hosts)
+        tmp = f"{path}.tmp"
+        with self._lock, open(tmp, 'wb') as f:
+            np.savez_compressed(
+                f,
+                metrics=np.array(HOST_METRICS),
+                hosts=np.array(self.hosts, dtype=str),
+                mean=self.mean[:n], var=self.var[:n],
+                last_seen=self.last_seen[:n], samples=self.samples[:n],
+            )
+        os.replace(tmp, path)
+        logging.info(f"💾 Saved baselines for {n} hosts to {path}")
+
+    def load(self, path: str = BASELINES_FILE) -> bool:
+        """Restore a table written by save(); returns False if there is nothing usable"""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                if tuple(data['metrics']) != HOST_METRICS:
+                    logging.warning(f"⚠️ Ignoring {path}: baseline metrics changed")
+                    return False
+                hosts = [str(h) for h in data['hosts']][-self.max_hosts:]
+                n = len(hosts)
+                mean, var = data['mean'][-n:], data['var'][-n:]
+                last_seen, samples = data['last_seen'][-n:], data['samples'][-n:]
+        except FileNotFoundError:
+            return False
+        except (OSError, KeyError, ValueError) as e:
+            logging.warning(f"⚠️ Could not load host baselines from {path}: {e}")
+            return False
+
+        with self._lock:
+            capacity = max(len(self.last_seen), n)
+            self.mean = np.zeros((capacity, len(HOST_METRICS)))
+            self.var = np.zeros((capacity, len(HOST_METRICS)))
+            self.last_seen = np.zeros(capacity)
+            self.samples = np.zeros(capacity, dtype=np.int32)
+            self.mean[:n], self.var[:n] = mean, var
+            self.last_seen[:n], self.samples[:n] = last_seen, samples
+            self.hosts = hosts
+            self.index = {host: row for row, host in enumerate(hosts)}
+        logging.info(f"📂 Loaded baselines for {n} hosts from {path}")
+        return True
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            n = len(self.hosts)
+            return {
+                'hosts': n,
+                'max_hosts': self.max_hosts,
+                'warmed_up': int((self.samples[:n] >= self.warmup).sum()),
+            }
@@ -0,0 +1,142 @@
+"""
+Capture-side load shedding
+Builds kernel BPF filters that keep trusted traffic out of Python entirely,
+and samples what remains when the packet callback falls behind the wire,
+tagging each kept packet with the weight that compensates for the sampling
+"""
+
+import logging
+import ipaddress
+from typing import Dict, Iterable, Optional
+
+SAMPLING_MODES = ('packet', 'flow')
+
+
+def build_bpf_filter(exclude_nets: Iterable[str] = (), exclude_ports: Iterable[int] = (),
+                     extra: Optional[str] = None) -> str:
+    """
+    Compose the capture filter
+
+    Args:
+        exclude_nets: CIDRs (or addresses) whose traffic is dropped in the kernel, e.g. backup subnets
+        exclude_ports: TCP/UDP ports dropped in the kernel, e.g. a trusted replication port
+        extra: Additional BPF expression that packets must also match
+
+    Returns:
+        BPF expression for sniff(filter=...)
+
+    Raises:
+        ValueError: If a network or port is malformed
+    """
+    clauses = ['ip']
+    for net in exclude_nets:
+        clauses.append(f"not net {ipaddress.ip_network(net, strict=False)}")
+    for port in exclude_ports:
+        port = int(port)
+        if not 0 <= port <= 65535:
+            raise ValueError(f"Port out of range: {port}")
+        clauses.append(f"not port {port}")
+    if extra:
+        clauses.append(f"({extra})")
+    return ' and '.join(clauses)
+
+
+class AdaptiveSampler:
+    """
+    1-in-N packet or flow sampling whose N follows the capture lag
+
+    N is a power of two. In flow mode a flow is kept when its hash is a
+    multiple of N, so raising N only drops flows and the survivors keep
+    complete sessions (conntrack, half-open and DNS state stay consistent).
+    Packet mode is cheaper and spreads evenly but splits sessions.
+    """
+
+    def __init__(self, mode='flow', max_rate=64, high_lag=0.5, low_lag=0.05, calm_windows=3, name='capture'):
+        """
+        Initialize the sampler (starts unsampled)
+
+        Args:
+            mode: 'packet' (every Nth packet) or 'flow' (every Nth flow by 5-tuple hash)
+            max_rate: Largest N (a power of two)
+            high_lag: Worst callback lag (seconds behind the packet timestamp) in a window that doubles N
+            low_lag: Lag below which a window counts as calm
+            calm_windows: Consecutive calm windows before N is halved
+            name: Label used in log messages
+        """
+        if mode not in SAMPLING_MODES:
+            raise ValueError(f"Unknown sampling mode {mode!r} (expected one of {SAMPLING_MODES})")
+        if max_rate < 1 or max_rate & (max_rate - 1):
+            raise ValueError(f"max_rate must be a power of two, got {max_rate}")
+        self.mode = mode
+        self.max_rate = max_rate
+        self.high_lag = high_lag
+        self.low_lag = low_lag
+        self.calm_windows = calm_windows
+        self.name = name
+
+        self.rate = 1
+        self.seen = 0
+        self.kept = 0
+        self.worst_lag = 0.0  # since the last adjust()
+        self.last_lag = 0.0
+        self._calm = 0
+        self._counter = 0
+
+    def observe_lag(self, lag: float):
+        """Record how far behind the wire one callback ran"""
+        if lag > self.worst_lag:
+            self.worst_lag = lag
+
+    def keep(self, proto, src, sport, dst, dport) -> int:
+        """
+        Decide whether to process a packet
+
+        Returns:
+            0 to drop it, otherwise its sample weight (the N it was kept at)
+        """
+        self.seen += 1
+        rate = self.rate
+        if rate > 1:
+            if self.mode == 'packet':
+                self._counter += 1
+                if self._counter & (rate - 1):
+                    return 0
+            else:
+                # Both directions of a flow hash alike
+                a, b = (src, sport or 0), (dst, dport or 0)
+                key = (proto, a, b) if a <= b else (proto, b, a)
+                if hash(key) & (rate - 1):
+                    return 0
+        self.kept += 1
+        return rate
+
+    def adjust(self) -> int:
+        """Pick N for the next window from the worst lag of the last one; returns N"""
+        lag, self.worst_lag = self.worst_lag, 0.0
+        self.last_lag = lag
+        rate = self.rate
+        if lag > self.high_lag:
+            self._calm = 0
+            rate = min(rate * 2, self.max_rate)
+        elif lag < self.low_lag:
+            self._calm += 1
+            if self._calm >= self.calm_windows:
+                self._calm = 0
+                rate = max(rate // 2, 1)
+        else:
+            self._calm = 0
+
+        if rate != self.rate:
+            log = logging.warning if rate > self.rate else logging.info
+            log(f"📉 Sampling on {self.name}: 1 in {rate} {self.mode}s (callback lag {lag:.2f}s)")
+            self.rate = rate
+        return rate
+
+    def get_status(self) -> Dict:
+        return {
+            'mode': self.mode,
+            'rate': self.rate,
+            'seen': self.seen,
+            'kept': self.kept,
+            'last_lag_seconds': round(self.last_lag, 3),
+        }
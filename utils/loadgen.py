@@ -0,0 +1,432 @@
+"""
+High-rate synthetic traffic for load testing
+Generates packet batches with NumPy (one array op per field, no per-packet
+Python) for configurable attack mixes, and writes them to the packet log
+CSV, a pcap file, or an in-process queue at a paced packets/sec rate
+"""
+
+import os
+import time
+import queue
+import struct
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+PROFILES = ['normal', 'dos', 'port_scan', 'random_flood']
+
+SERVICE_PORTS = np.array([80, 443, 22, 3389, 8080])
+
+PROTO_TCP, PROTO_UDP, PROTO_ICMP = 6, 17, 1
+PROTOCOL_NAMES = {PROTO_TCP: 'TCP', PROTO_UDP: 'UDP', PROTO_ICMP: 'ICMP'}
+
+# One generated packet; ports are 0 for ICMP
+PACKET_DTYPE = np.dtype([
+    ('ts', 'f8'), ('src', 'u4'), ('dst', 'u4'), ('proto', 'u1'),
+    ('sport', 'u2'), ('dport', 'u2'), ('size', 'u2'), ('ttl', 'u1'),
+    ('flags', 'u1'),  # TCP flag bits (0 for UDP/ICMP)
+])
+
+# Lookup tables for string formatting without per-field str() calls
+_NUM_STR = np.array([str(i) for i in range(65536)], dtype=object)
+_PROTO_STR = np.array([PROTOCOL_NAMES.get(i, str(i)) for i in range(256)], dtype=object)
+
+
+def ip_to_int(ip: str) -> int:
+    a, b, c, d = (int(x) for x in ip.split('.'))
+    return (a << 24) | (b << 16) | (c << 8) | d
+
+
+def ips_to_str(ips: np.ndarray) -> np.ndarray:
+    """Dotted-quad strings for an array of IPv4 addresses as uint32"""
+    ips = ips.astype(np.uint32)
+    return (_NUM_STR[ips >> 24] + '.' + _NUM_STR[(ips >> 16) & 255] + '.'
+            + _NUM_STR[(ips >> 8) & 255] + '.' + _NUM_STR[ips & 255])
+
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    """
+    Parse an attack mix like 'normal=0.8,dos=0.15,port_scan=0.05'
+
+    Returns:
+        Profile -> fraction, normalized to sum to 1
+    """
+    mix = {}
+    for part in filter(None, (p.strip() for p in spec.split(','))):
+        name, _, weight = part.partition('=')
+        if name not in PROFILES:
+            raise ValueError(f"Unknown traffic profile '{name}' (choose from {', '.join(PROFILES)})")
+        mix[name] = float(weight or 1)
+    total = sum(mix.values())
+    if total <= 0:
+        raise ValueError(f"Attack mix '{spec}' has no positive weights")
+    return {name: weight / total for name, weight in mix.items()}
+
+
+class TrafficGenerator:
+    """
+    Vectorized packet batch generator for a weighted mix of traffic profiles
+    """
+
+    def __init__(self, ips: List[str], mix: Optional[Dict[str, float]] = None, seed=None):
+        """
+        Initialize the generator
+
+        Args:
+            ips: Address pool; 192.168.x.x entries are treated as internal hosts
+            mix: Profile -> fraction (default: all normal)
+            seed: RNG seed for reproducible traffic
+        """
+        self.rng = np.random.default_rng(seed)
+        self.mix = mix or {'normal': 1.0}
+        self.pool = np.array([ip_to_int(ip) for ip in ips], dtype=np.uint32)
+        internal = [ip_to_int(ip) for ip in ips if ip.startswith('192.168.')]
+        external = [ip_to_int(ip) for ip in ips if not ip.startswith('192.168.')]
+        self.victims = internal or [int(self.pool[0])]
+        self.attackers = external or [int(self.pool[-1])]
+        self._scan_port = 0
+
+    def _normal(self, batch):
+        n = len(batch)
+        rng = self.rng
+        src = rng.integers(0, len(self.pool), n)
+        batch['src'] = self.pool[src]
+        batch['dst'] = self.pool[(src + rng.integers(1, len(self.pool), n)) % len(self.pool)]
+        batch['proto'] = rng.choice([PROTO_TCP, PROTO_UDP, PROTO_ICMP], n)
+        batch['sport'] = rng.integers(1024, 65536, n)
+        batch['dport'] = rng.choice(SERVICE_PORTS, n)
+        batch['size'] = rng.integers(64, 1501, n)
+        batch['ttl'] = rng.choice([64, 128], n)
+        # Established traffic with the odd new connection: PSH|ACK, some SYN
+        batch['flags'] = np.where(rng.random(n) < 0.05, 0x02, 0x18)
+
+    def _dos(self, batch):
+        n = len(batch)
+        batch['src'] = self.attackers[0]
+        batch['dst'] = self.victims[0]
+        batch['proto'] = PROTO_TCP
+        batch['sport'] = self.rng.integers(1024, 65536, n)
+        batch['dport'] = 80
+        batch['size'] = self.rng.integers(40, 81, n)
+        batch['ttl'] = 64
+        batch['flags'] = 0x02  # SYN flood
+
+    def _port_scan(self, batch):
+        n = len(batch)
+        batch['src'] = self.attackers[1 % len(self.attackers)]
+        batch['dst'] = self.victims[1 % len(self.victims)]
+        batch['proto'] = PROTO_TCP
+        batch['sport'] = 40000
+        batch['dport'] = (self._scan_port + np.arange(n)) % 65535 + 1
+        batch['size'] = 60
+        batch['ttl'] = 64
+        batch['flags'] = 0x02  # SYN scan
+        self._scan_port = (self._scan_port + n) % 65535
+
+    def _random_flood(self, batch):
+        n = len(batch)
+        rng = self.rng
+        # Spoofed unicast sources: first octet 1-223
+        batch['src'] = (rng.integers(1, 224, n, dtype=np.uint32) << 24) | rng.integers(0, 1 << 24, n, dtype=np.uint32)
+        batch['dst'] = self.victims[2 % len(self.victims)]
+        batch['proto'] = rng.choice([PROTO_TCP, PROTO_UDP], n)
+        batch['sport'] = rng.integers(1024, 65536, n)
+        batch['dport'] = rng.choice([80, 53], n)
+        batch['size'] = rng.integers(40, 1501, n)
+        batch['ttl'] = rng.integers(30, 256, n)
+        batch['flags'] = 0x02
+
+    def generate(self, n: int, start: float, duration: float) -> np.ndarray:
+        """
+        Generate one batch
+
+        Args:
+            n: Number of packets
+            start: Epoch seconds of the first packet
+            duration: Seconds the batch spans (timestamps are evenly spaced)
+
+        Returns:
+            Structured array with PACKET_DTYPE, in timestamp order
+        """
+        batch = np.zeros(n, dtype=PACKET_DTYPE)
+        names = list(self.mix)
+        counts = self.rng.multinomial(n, [self.mix[name] for name in names])
+
+        offset = 0
+        for name, count in zip(names, counts):
+            if count:
+                getattr(self, f"_{name}")(batch[offset:offset + count])
+                offset += count
+
+        batch = batch[self.rng.permutation(n)]
+        batch['ts'] = start + np.arange(n) * (duration / max(n, 1))
+        batch['sport'][batch['proto'] == PROTO_ICMP] = 0
+        batch['dport'][batch['proto'] == PROTO_ICMP] = 0
+        batch['flags'][batch['proto'] != PROTO_TCP] = 0
+        return batch
+
+
+def _timestamp_strings(ts: np.ndarray) -> np.ndarray:
+    """'%Y-%m-%d %H:%M:%S' strings, formatting each distinct second once"""
+    seconds, inverse = np.unique(ts.astype(np.int64), return_inverse=True)
+    formatted = np.array([datetime.fromtimestamp(s).strftime('%Y-%m-%d %H:%M:%S') for s in seconds], dtype=object)
+    return formatted[inverse]
+
+
+def _port_strings(ports: np.ndarray, proto: np.ndarray) -> np.ndarray:
+    strings = _NUM_STR[ports]
+    strings[proto == PROTO_ICMP] = ''
+    return strings
+
+
+def format_csv(batch: np.ndarray) -> str:
+    """Render a batch as packet log CSV lines (same columns as packet_capture.py)"""
+    if len(batch) == 0:
+        return ''
+    lines = (_timestamp_strings(batch['ts']) + ',' + ips_to_str(batch['src']) + ','
+             + ips_to_str(batch['dst']) + ',' + _PROTO_STR[batch['proto']] + ','
+             + _port_strings(batch['sport'], batch['proto']) + ','
+             + _port_strings(batch['dport'], batch['proto']) + ',' + _NUM_STR[batch['size']] + '\n')
+    return ''.join(lines)
+
+
+def _local_datetimes(ts: np.ndarray) -> pd.DatetimeIndex:
+    """Naive local-time datetimes (matching datetime.fromtimestamp) for epoch seconds"""
+    if len(ts) == 0:
+        return pd.DatetimeIndex([])
+    # UTC offset per distinct second, so a batch spanning a DST change stays correct
+    seconds, inverse = np.unique(np.floor(ts).astype(np.int64), return_inverse=True)
+    offsets = np.array([
+        (datetime.fromtimestamp(s) - datetime.fromtimestamp(s, timezone.utc).replace(tzinfo=None)).total_seconds()
+        for s in seconds.tolist()
+    ])
+    return pd.to_datetime(ts + offsets[inverse], unit='s')
+
+
+def to_frame(batch: np.ndarray) -> pd.DataFrame:
+    """Batch as a DataFrame in canonical packet log columns (for TrafficRollup.update_frame)"""
+    icmp = batch['proto'] == PROTO_ICMP
+    return pd.DataFrame({
+        'Timestamp': _local_datetimes(batch['ts']),
+        'Src_IP': ips_to_str(batch['src']),
+        'Dst_IP': ips_to_str(batch['dst']),
+        'Protocol': _PROTO_STR[batch['proto']],
+        'Src_Port': pd.Series(batch['sport'], dtype='Int64').mask(icmp),
+        'Dst_Port': pd.Series(batch['dport'], dtype='Int64').mask(icmp),
+        'Size': batch['size'].astype(np.int64),
+    })
+
+
+def to_packet_records(batch: np.ndarray) -> List[Dict]:
+    """Batch as packet dicts in the format RealTimeAnalyzer._packet_callback produces"""
+    icmp = (batch['proto'] == PROTO_ICMP).tolist()
+    tcp = (batch['proto'] == PROTO_TCP).tolist()
+    return [
+        {
+            'timestamp': datetime.fromtimestamp(ts),
+            'src_ip': src, 'dst_ip': dst, 'protocol': proto, 'size': size, 'ttl': ttl,
+            'src_port': None if no_ports else sport,
+            'dst_port': None if no_ports else dport,
+            'flags': flags if is_tcp else None,
+        }
+        for ts, src, dst, proto, sport, dport, size, ttl, flags, no_ports, is_tcp in zip(
+            batch['ts'].tolist(), ips_to_str(batch['src']).tolist(), ips_to_str(batch['dst']).tolist(),
+            batch['proto'].tolist(), batch['sport'].tolist(), batch['dport'].tolist(),
+            batch['size'].tolist(), batch['ttl'].tolist(), batch['flags'].tolist(), icmp, tcp)
+    ]
+
+
+# pcap record: 16-byte pcap header + Ethernet/IPv4 + 20 bytes of L4 header,
+# one fixed-size row per packet (orig_len carries the real frame size)
+PCAP_RECORD = np.dtype([
+    ('ts_sec', '<u4'), ('ts_usec', '<u4'), ('incl_len', '<u4'), ('orig_len', '<u4'),
+    ('eth_dst', 'V6'), ('eth_src', 'V6'), ('eth_type', '>u2'),
+    ('ip_vhl', 'u1'), ('ip_tos', 'u1'), ('ip_len', '>u2'), ('ip_id', '>u2'), ('ip_frag', '>u2'),
+    ('ip_ttl', 'u1'), ('ip_proto', 'u1'), ('ip_sum', '>u2'), ('ip_src', '>u4'), ('ip_dst', '>u4'),
+    ('l4_sport', '>u2'), ('l4_dport', '>u2'), ('l4_word1', '>u4'), ('l4_word2', '>u4'),
+    ('l4_flags', '>u2'), ('l4_win', '>u2'), ('l4_sum', '>u2'), ('l4_urp', '>u2'),
+])
+PCAP_CAPTURE_LEN = PCAP_RECORD.itemsize - 16
+PCAP_GLOBAL_HEADER = struct.pack('<IHHiIII', 0xa1b2c3d4, 2, 4, 0, 0, 65535, 1)  # LINKTYPE_ETHERNET
+
+
+def _ip_checksum(records: np.ndarray) -> np.ndarray:
+    """RFC 791 header checksum, computed over all rows at once"""
+    words = ((records['ip_vhl'].astype(np.uint32) << 8) | records['ip_tos']) \
+        + records['ip_len'] + records['ip_id'] + records['ip_frag'] \
+        + ((records['ip_ttl'].astype(np.uint32) << 8) | records['ip_proto']) \
+        + (records['ip_src'] >> 16) + (records['ip_src'] & 0xffff) \
+        + (records['ip_dst'] >> 16) + (records['ip_dst'] & 0xffff)
+    words = words.astype(np.uint32)
+    words = (words & 0xffff) + (words >> 16)
+    words = (words & 0xffff) + (words >> 16)
+    return (~words) & 0xffff
+
+
+def format_pcap(batch: np.ndarray, rng: Optional[np.random.Generator] = None) -> bytes:
+    """Render a batch as pcap records (headers only, orig_len = packet size)"""
+    rng = rng or np.random.default_rng()
+    records = np.zeros(len(batch), dtype=PCAP_RECORD)
+    frame_len = np.maximum(batch['size'], 60).astype(np.uint32)
+    tcp = batch['proto'] == PROTO_TCP
+    udp = batch['proto'] == PROTO_UDP
+    icmp = batch['proto'] == PROTO_ICMP
+
+    records['ts_sec'] = batch['ts'].astype(np.uint32)
+    records['ts_usec'] = ((batch['ts'] % 1) * 1e6).astype(np.uint32)
+    records['incl_len'] = PCAP_CAPTURE_LEN
+    records['orig_len'] = frame_len
+    records['eth_dst'] = np.void(b'\x02\x00\x00\x00\x00\x01')
+    records['eth_src'] = np.void(b'\x02\x00\x00\x00\x00\x02')
+    records['eth_type'] = 0x0800
+
+    records['ip_vhl'] = 0x45
+    records['ip_len'] = frame_len - 14
+    records['ip_id'] = rng.integers(0, 65536, len(batch))
+    records['ip_ttl'] = batch['ttl']
+    records['ip_proto'] = batch['proto']
+    records['ip_src'] = batch['src']
+    records['ip_dst'] = batch['dst']
+    records['ip_sum'] = _ip_checksum(records)
+
+    records['l4_sport'] = batch['sport']
+    records['l4_dport'] = batch['dport']
+    # TCP: random seq, generated flags with a 20-byte header
+    records['l4_word1'][tcp] = rng.integers(0, 1 << 32, int(tcp.sum()), dtype=np.uint32)
+    records['l4_flags'][tcp] = 0x5000 | batch['flags'][tcp].astype(np.uint16)
+    records['l4_win'][tcp] = 65535
+    # UDP: length in the high half of word1
+    records['l4_word1'][udp] = (records['ip_len'][udp].astype(np.uint32) - 20) << 16
+    # ICMP echo request: type/code in place of the ports
+    records['l4_sport'][icmp] = 0x0800
+    records['l4_dport'][icmp] = 0
+    return records.tobytes()
+
+
+class CsvSink:
+    """Append batches to a packet log CSV (header written for new files)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'w') as f:
+                f.write('Timestamp,Src_IP,Dst_IP,Protocol,Src_Port,Dst_Port,Size\n')
+
+    def write(self, batch: np.ndarray):
+        # Reopen per batch so log rotation by the compactor is picked up
+        with open(self.path, 'a') as f:
+            f.write(format_csv(batch))
+
+    def close(self):
+        pass
+
+
+class PcapSink:
+    """Write batches to a pcap file readable by tcpdump/Wireshark/scapy"""
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._file = open(path, 'wb')
+        self._file.write(PCAP_GLOBAL_HEADER)
+        self._rng = np.random.default_rng()
+
+    def write(self, batch: np.ndarray):
+        self._file.write(format_pcap(batch, self._rng))
+
+    def close(self):
+        self._file.close()
+
+
+class QueueSink:
+    """Hand batches to an in-process consumer; drops (and counts) when it falls behind"""
+
+    def __init__(self, q: queue.Queue):
+        self.queue = q
+        self.dropped_packets = 0
+
+    def write(self, batch: np.ndarray):
+        try:
+            self.queue.put_nowait(batch)
+        except queue.Full:
+            self.dropped_packets += len(batch)
+
+    def close(self):
+        pass
+
+
+class LoadGenerator:
+    """
+    Paced generation loop: one batch per tick at the requested packets/sec
+    """
+
+    def __init__(self, generator: TrafficGenerator, sink, rate: float, batch_interval=0.1):
+        """
+        Initialize the load generator
+
+        Args:
+            generator: TrafficGenerator producing the batches
+            sink: CsvSink, PcapSink or QueueSink
+            rate: Target packets per second
+            batch_interval: Seconds of traffic per batch
+        """
+        self.generator = generator
+        self.sink = sink
+        self.rate = rate
+        self.batch_interval = batch_interval
+        self.total_packets = 0
+        self.late_batches = 0
+        self.started_at = None
+
+    def run(self, duration: Optional[float] = None, stop_event=None, on_batch=None):
+        """
+        Generate until duration elapses or stop_event is set
+
+        Args:
+            duration: Seconds to run (None = until stopped)
+            stop_event: threading.Event ending the run
+            on_batch: Optional callback(batch) after each batch is written
+        """
+        self.started_at = time.time()
+        next_tick = self.started_at
+        carry = 0.0
+
+        while not (stop_event is not None and stop_event.is_set()):
+            if duration is not None and next_tick - self.started_at >= duration:
+                break
+
+            # Carry the fractional packet so low rates average out exactly
+            carry += self.rate * self.batch_interval
+            n, carry = int(carry), carry - int(carry)
+
+            batch = self.generator.generate(n, next_tick, self.batch_interval)
+            self.sink.write(batch)
+            self.total_packets += n
+            if on_batch:
+                on_batch(batch)
+
+            next_tick += self.batch_interval
+            delay = next_tick - time.time()
+            if delay > 0:
+                if stop_event is not None:
+                    stop_event.wait(delay)
+                else:
+                    time.sleep(delay)
+            else:
+                self.late_batches += 1
+                if -delay > 1.0:
+                    # Can't sustain the rate; resync instead of bursting to catch up
+                    logging.warning(f"⚠️ Load generator {-delay:.1f}s behind schedule at {self.rate:,.0f} pps")
+                    next_tick = time.time()
+
+        self.sink.close()
+
+    def achieved_rate(self) -> float:
+        """Packets per second actually generated since run() started"""
+        if not self.started_at:
+            return 0.0
+        return self.total_packets / max(time.time() - self.started_at, 1e-9)
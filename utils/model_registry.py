@@ -0,0 +1,256 @@
+"""
+Versioned model hot-reload for the analyzer
+Watches the model directory, loads and validates new artifacts in a
+background thread, swaps them in atomically and keeps a short history so
+a bad model can be rolled back without restarting the analyzer
+"""
+
+import os
+import glob
+import time
+import hashlib
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from feature_extractor import FEATURE_NAMES, default_features
+
+MODEL_DIR = 'models'
+
+
+def model_version(path: str) -> str:
+    """Version id of a model artifact: file stem plus a content hash"""
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return f"{stem}-{digest.hexdigest()[:12]}"
+
+
+def smoke_batch() -> pd.DataFrame:
+    """Small fixed batch of windows (idle, normal, flood) every model must score"""
+    idle = default_features()
+    normal = dict(idle, total_packets=50, unique_src_ips=5, unique_dst_ips=8, unique_src_ports=30,
+                  unique_dst_ports=10, total_bytes=30000, mean_packet_size=600, max_packet_size=1500,
+                  min_packet_size=60, std_packet_size=150, tcp_packets=40, udp_packets=8, icmp_packets=2,
+                  http_packets=10, https_packets=20, dns_packets=5, mean_ttl=64, min_ttl=64, max_ttl=128,
+                  duration=5, packets_per_second=10, max_src_ip_count=15, max_dst_ip_count=12,
+                  src_ip_entropy=2.0, dst_ip_entropy=2.5, syn_packets=2, ack_packets=38, fin_packets=2,
+                  syn_no_ack_ratio=0.05, max_half_open_per_dst=1)
+    flood = dict(normal, total_packets=5000, unique_src_ips=1, unique_dst_ports=1, total_bytes=300000,
+                 mean_packet_size=60, tcp_packets=5000, packets_per_second=1000,
+                 max_src_ip_count=5000, src_ip_entropy=0.0, syn_packets=5000, ack_packets=0,
+                 syn_no_ack_ratio=1.0, max_half_open_per_dst=5000)
+    return pd.DataFrame([idle, normal, flood], columns=FEATURE_NAMES)
+
+
+def validate_model(model, feature_names: List[str] = FEATURE_NAMES) -> Dict:
+    """
+    Check a model against the feature schema and score the smoke batch
+
+    Args:
+        model: Loaded estimator
+        feature_names: Features the analyzer produces
+
+    Returns:
+        Dictionary with smoke batch latency
+
+    Raises:
+        ValueError: If the model cannot serve analyzer windows
+    """
+    if not hasattr(model, 'predict'):
+        raise ValueError(f"{type(model).__name__} has no predict()")
+
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        missing = sorted(set(names) - set(feature_names))
+        if missing:
+            raise ValueError(f"model expects features the analyzer does not produce: {missing}")
+        columns = list(names)
+    else:
+        n_features = getattr(model, 'n_features_in_', len(feature_names))
+        if n_features != len(feature_names):
+            raise ValueError(f"model expects {n_features} features, analyzer produces {len(feature_names)}")
+        columns = list(feature_names)
+
+    batch = smoke_batch()[columns]
+    started = time.perf_counter()
+    predictions = np.asarray(model.predict(batch))
+    if predictions.shape != (len(batch),) or not set(predictions.tolist()) <= {0, 1}:
+        raise ValueError(f"predict() returned {predictions!r}, expected one 0/1 label per window")
+
+    if hasattr(model, 'predict_proba'):
+        proba = np.asarray(model.predict_proba(batch))
+        if proba.shape != (len(batch), 2) or not np.all(np.isfinite(proba)):
+            raise ValueError(f"predict_proba() returned shape {proba.shape}, expected ({len(batch)}, 2)")
+
+    return {'smoke_ms': (time.perf_counter() - started) * 1000}
+
+
+class ModelRegistry:
+    """
+    Active model plus a bounded history of previously served versions
+    """
+
+    def __init__(self, install: Callable, model_dir=MODEL_DIR, pattern='*.joblib',
+                 poll_interval=5.0, settle_seconds=1.0, history=5):
+        """
+        Initialize the registry
+
+        Args:
+            install: Called with (model, version) to make a model live
+            model_dir: Directory watched for new artifacts
+            pattern: Glob of model files inside model_dir
+            poll_interval: Seconds between directory scans
+            settle_seconds: Ignore files modified more recently than this (still being written)
+            history: Number of versions kept for rollback
+        """
+        self.install = install
+        self.model_dir = model_dir
+        self.pattern = pattern
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+
+        self.history = deque(maxlen=history)  # (version, model, info), newest last
+        self.rejected = {}  # version or path -> reason
+        self._seen = {}  # path -> mtime_ns already considered
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    @property
+    def current_version(self) -> Optional[str]:
+        return self.history[-1][0] if self.history else None
+
+    def activate(self, model, version: str, source: str, validate=True) -> Dict:
+        """
+        Validate a model and make it the serving model
+
+        Args:
+            model: Estimator to serve
+            version: Version id recorded with every prediction
+            source: Where it came from ('startup', a file path, 'online', ...)
+            validate: Run schema and smoke batch checks first
+
+        Returns:
+            Info dictionary stored in the history
+        """
+        info = {'version': version, 'source': source, 'activated_at': time.time()}
+        if validate:
+            info.update(validate_model(model))
+        with self._lock:
+            self.install(model, version)
+            self.history.append((version, model, info))
+        logging.info(f"🔁 Serving model {version} ({source})")
+        return info
+
+    def load_path(self, path: str) -> Optional[Dict]:
+        """Load, validate and activate a model file; failures are logged and remembered"""
+        import joblib
+
+        try:
+            version = model_version(path)
+            if version == self.current_version or version in self.rejected:
+                return None
+            model = joblib.load(path)
+            return self.activate(model, version, source=path)
+        except Exception as e:
+            self.rejected[path] = str(e)
+            logging.error(f"❌ Rejected model {path}: {e}")
+            return None
+
+    def rollback(self) -> Dict:
+        """
+        Return to the previously served version
+
+        Returns:
+            Info dictionary of the restored version
+
+        Raises:
+            ValueError: If there is no earlier version to restore
+        """
+        with self._lock:
+            if len(self.history) < 2:
+                raise ValueError("no previous model version to roll back to")
+            bad_version, _, _ = self.history.pop()
+            # Keep the watcher from re-activating the version we just left
+            self.rejected[bad_version] = 'rolled back'
+            version, model, info = self.history[-1]
+            self.install(model, version)
+        logging.warning(f"⏪ Rolled back model {bad_version} -> {version}")
+        return {'rolled_back': bad_version, 'version': version, 'source': info['source']}
+
+    def _scan(self):
+        """Load files that appeared or changed since the last scan, newest last"""
+        now = time.time()
+        changed = []
+        for path in glob.glob(os.path.join(self.model_dir, self.pattern)):
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            if self._seen.get(path) == st.st_mtime_ns or now - st.st_mtime < self.settle_seconds:
+                continue
+            self._seen[path] = st.st_mtime_ns
+            changed.append((st.st_mtime_ns, path))
+
+        for _, path in sorted(changed):
+            self.load_path(path)
+
+    def _run(self):
+        while not self._stop_event.wait(self.poll_interval):
+            try:
+                self._scan()
+            except Exception as e:
+                logging.error(f"Model watcher error: {e}")
+
+    def start(self):
+        """Start watching; files already present count as seen"""
+        for path in glob.glob(os.path.join(self.model_dir, self.pattern)):
+            self._seen[path] = os.stat(path).st_mtime_ns
+        self._thread = threading.Thread(target=self._run, daemon=True, name='model-watcher')
+        self._thread.start()
+        logging.info(f"👀 Watching {os.path.join(self.model_dir, self.pattern)} for new models")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+    def get_status(self) -> Dict:
+        return {
+            'version': self.current_version,
+            'history': [{k: v for k, v in info.items()} for _, _, info in self.history],
+            'rejected': dict(self.rejected),
+        }
+
+
+def main():
+    """Inspect or roll back the running analyzer's model via its control endpoint"""
+    import argparse
+    import json
+    from utils.control import ControlClient, ControlError
+
+    parser = argparse.ArgumentParser(description="Model registry control")
+    parser.add_argument("command", choices=['status', 'rollback'])
+    args = parser.parse_args()
+
+    client = ControlClient(timeout=5)
+    try:
+        result = client.model_status() if args.command == 'status' else client.rollback_model()
+    except ControlError as e:
+        print(f"❌ {args.command} failed: {e.message}")
+        raise SystemExit(1)
+    if result is None:
+        print("❌ Analyzer not reachable")
+        raise SystemExit(1)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
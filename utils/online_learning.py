@@ -0,0 +1,316 @@
+"""
+Online model updating from confirmed detections
+Keeps the features of recent analysis windows, joins them with analyst
+labels appended to a JSONL file, retrains in a background process and
+hot-swaps the analyzer's model without pausing the analysis loop
+"""
+
+import os
+import json
+import time
+import zlib
+import logging
+import threading
+import multiprocessing
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from feature_extractor import FEATURE_NAMES
+
+LABELS_FILE = 'data/window_labels.jsonl'
+
+
+def append_label(window_id: str, label: int, labels_file: str = LABELS_FILE, note: str = None):
+    """
+    Record an analyst verdict for one analysis window
+
+    Args:
+        window_id: window_id of the prediction (ml_predictions.json)
+        label: 1 = confirmed threat, 0 = false positive / normal
+        labels_file: JSONL file read by OnlineModelUpdater
+        note: Optional free-text comment
+    """
+    os.makedirs(os.path.dirname(labels_file) or '.', exist_ok=True)
+    record = {'window_id': window_id, 'label': int(label), 'labeled_at': time.time()}
+    if note:
+        record['note'] = note
+    with open(labels_file, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def _retrain(model, X: pd.DataFrame, y: np.ndarray, incremental: bool):
+    """Fit a copy of model in the worker process and return it"""
+    if incremental:
+        # partial_fit must keep the columns the model was first fit on
+        names = getattr(model, 'feature_names_in_', None)
+        if names is not None:
+            X = X.reindex(columns=list(names), fill_value=0)
+        model.partial_fit(X, y, classes=np.array([0, 1]))
+        return model
+
+    from sklearn.base import clone
+    fresh = clone(model)
+    fresh.fit(X, y)
+    return fresh
+
+
+def _f1(model, X: pd.DataFrame, y: np.ndarray) -> float:
+    from sklearn.metrics import f1_score
+    # Models trained before a feature was added only see the columns they know
+    names = getattr(model, 'feature_names_in_', None)
+    if names is not None:
+        X = X[list(names)]
+    return float(f1_score(y, model.predict(X), zero_division=0))
+
+
+class OnlineModelUpdater:
+    """
+    Periodic mini-batch retraining on recently labeled windows
+    """
+
+    def __init__(self, get_model: Callable, set_model: Callable, labels_file=LABELS_FILE,
+                 anchor_file: Optional[str] = None, max_windows=20_000, max_examples=5_000,
+                 retrain_interval=300, min_new_labels=20, holdout_fraction=0.2, tolerance=0.02):
+        """
+        Initialize the updater
+
+        Args:
+            get_model: Returns the model currently serving predictions
+            set_model: Installs a new model (called with model and info dict)
+            labels_file: JSONL of {"window_id", "label"} verdicts
+            anchor_file: Optional pickled/CSV training set (FEATURE_NAMES + label)
+                mixed into every refit so old attack patterns are not forgotten
+            max_windows: Recent window feature vectors kept for joining labels
+            max_examples: Labeled examples kept (oldest dropped first)
+            retrain_interval: Seconds between retraining checks
+            min_new_labels: New labels required before retraining
+            holdout_fraction: Share of labeled windows set aside (never trained on) to validate candidates
+            tolerance: Candidate may score at most this much lower F1 than the current model
+        """
+        self.get_model = get_model
+        self.set_model = set_model
+        self.labels_file = labels_file
+        self.anchor = self._load_anchor(anchor_file)
+        self.retrain_interval = retrain_interval
+        self.min_new_labels = min_new_labels
+        self.holdout_fraction = holdout_fraction
+        self.tolerance = tolerance
+
+        self.windows = OrderedDict()  # window_id -> feature vector
+        self.max_windows = max_windows
+        self.examples = deque(maxlen=max_examples)  # (feature vector, label) used for training
+        # Examples the serving model has not learned yet; partial_fit models are fed only these
+        self.unfit = deque(maxlen=max_examples)
+        # Fixed validation set: a window is assigned once, by a hash of its id, and never trained on
+        self.holdout = deque(maxlen=max(1, int(max_examples * holdout_fraction)))
+        self.new_labels = 0
+        self.unmatched_labels = 0
+        self.labels_offset = 0
+
+        self.retrains = 0
+        self.swaps = 0
+        self.last_result = None
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pool = None
+
+    @staticmethod
+    def _load_anchor(path: Optional[str]) -> Optional[pd.DataFrame]:
+        if not path:
+            return None
+        df = pd.read_pickle(path) if path.endswith('.pkl') else pd.read_csv(path)
+        # Features added since the anchor set was exported are 0
+        return df.reindex(columns=FEATURE_NAMES + ['label'], fill_value=0)
+
+    def record_window(self, window_id: str, features: Dict):
+        """Remember a window's features so a later label can be joined to it"""
+        vector = np.array([float(features.get(name, 0)) for name in FEATURE_NAMES])
+        with self._lock:
+            self.windows[window_id] = vector
+            if len(self.windows) > self.max_windows:
+                self.windows.popitem(last=False)
+
+    def _read_new_labels(self):
+        """Join labels appended since the last read with remembered windows"""
+        try:
+            if os.path.getsize(self.labels_file) < self.labels_offset:
+                self.labels_offset = 0  # file was truncated/replaced
+            # Binary mode: offsets are real byte positions, with no newline translation
+            lines = []
+            with open(self.labels_file, 'rb') as f:
+                f.seek(self.labels_offset)
+                for line in iter(f.readline, b''):
+                    if not line.endswith(b'\n'):
+                        break  # partially written; read again next time
+                    lines.append(line)
+                    self.labels_offset = f.tell()
+        except FileNotFoundError:
+            return
+
+        with self._lock:
+            for line in lines:
+                try:
+                    record = json.loads(line)
+                    vector = self.windows.get(record['window_id'])
+                except (ValueError, KeyError):
+                    continue
+                if vector is None:
+                    self.unmatched_labels += 1
+                    continue
+                example = (vector, int(record['label']))
+                if self._is_holdout(record['window_id']):
+                    self.holdout.append(example)
+                else:
+                    self.examples.append(example)
+                    self.unfit.append(example)
+                    self.new_labels += 1
+
+    def _is_holdout(self, window_id: str) -> bool:
+        # Stable across restarts (unlike hash()), so a window never moves between sets
+        return zlib.crc32(str(window_id).encode()) % 10_000 < self.holdout_fraction * 10_000
+
+    def _training_sets(self, incremental: bool):
+        """
+        Training examples and the fixed holdout
+
+        Args:
+            incremental: Only the examples the serving model has not learned yet
+                (partial_fit); otherwise every example plus the anchor set (full refit)
+        """
+        with self._lock:
+            train = list(self.unfit if incremental else self.examples)
+            holdout = list(self.holdout)
+
+        X_train = pd.DataFrame([v for v, _ in train], columns=FEATURE_NAMES)
+        y_train = np.array([label for _, label in train], dtype=int)
+        if self.anchor is not None and not incremental:
+            X_train = pd.concat([self.anchor[FEATURE_NAMES], X_train], ignore_index=True)
+            y_train = np.concatenate([self.anchor['label'].to_numpy(dtype=int), y_train])
+
+        X_holdout = pd.DataFrame([v for v, _ in holdout], columns=FEATURE_NAMES)
+        y_holdout = np.array([label for _, label in holdout], dtype=int)
+        return X_train, y_train, X_holdout, y_holdout
+
+    def retrain_once(self) -> Optional[Dict]:
+        """
+        Retrain if enough new labels arrived, and swap in the result if it
+        validates at least as well as the current model
+
+        Returns:
+            Result dictionary, or None if no retraining was due
+        """
+        self._read_new_labels()
+        if self.new_labels < self.min_new_labels:
+            return None
+
+        current = self.get_model()
+        if current is None:
+            return None
+
+        incremental = hasattr(current, 'partial_fit')
+        X_train, y_train, X_holdout, y_holdout = self._training_sets(incremental)
+        if not incremental and len(np.unique(y_train)) < 2:
+            logging.info("🧠 Online update waiting for both normal and threat labels")
+            return None
+        if len(np.unique(y_holdout)) < 2:
+            # F1 on a one-class holdout cannot tell a better model from a worse one
+            logging.info("🧠 Online update waiting for both normal and threat holdout labels")
+            return None
+
+        self.new_labels = 0
+        started = time.time()
+        # Fit in a separate process so the analysis thread never waits on the GIL
+        candidate = self._pool.submit(_retrain, current, X_train, y_train, incremental).result()
+
+        result = {
+            'trained_at': started,
+            'fit_seconds': time.time() - started,
+            'train_examples': len(y_train),
+            'holdout_examples': len(y_holdout),
+            'incremental': incremental,
+            'current_f1': _f1(current, X_holdout, y_holdout),
+            'candidate_f1': _f1(candidate, X_holdout, y_holdout),
+        }
+        # A candidate that detects nothing on the holdout is never an improvement, even on a tie
+        result['swapped'] = (result['candidate_f1'] > 0
+                             and result['candidate_f1'] >= result['current_f1'] - self.tolerance)
+        self.retrains += 1
+        self.last_result = result
+
+        if result['swapped']:
+            try:
+                self.set_model(candidate, {'source': 'online', **result})
+                self.swaps += 1
+                # The serving model has now learned these (labels are only read on this
+                # thread); a rejected candidate's batch is fed again next time
+                with self._lock:
+                    self.unfit.clear()
+            except Exception as e:
+                # e.g. rejected by the model registry's validation
+                result['swapped'] = False
+                result['error'] = str(e)
+                logging.warning(f"⚠️ Online candidate not installed: {e}")
+        logging.info(
+            f"🧠 Online retrain #{self.retrains}: f1 {result['current_f1']:.3f} -> "
+            f"{result['candidate_f1']:.3f} on {len(y_holdout)} holdout windows "
+            f"({'swapped' if result['swapped'] else 'kept current model'})"
+        )
+        return result
+
+    def _run(self):
+        while not self._stop_event.wait(self.retrain_interval):
+            try:
+                self.retrain_once()
+            except Exception as e:
+                logging.error(f"Online retraining error: {e}")
+
+    def start(self):
+        """Start the background retraining thread and worker process"""
+        # spawn: never fork a process that is running capture threads
+        self._pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn'))
+        self._thread = threading.Thread(target=self._run, daemon=True, name='online-learning')
+        self._thread.start()
+        logging.info(f"🧠 Online learning enabled (labels: {self.labels_file}, every {self.retrain_interval}s)")
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def get_status(self) -> Dict:
+        return {
+            'windows_remembered': len(self.windows),
+            'labeled_examples': len(self.examples),
+            'holdout_examples': len(self.holdout),
+            'pending_labels': self.new_labels,
+            'unmatched_labels': self.unmatched_labels,
+            'retrains': self.retrains,
+            'swaps': self.swaps,
+            'last_result': self.last_result,
+        }
+
+
+def main():
+    """Append an analyst label: python -m utils.online_learning <window_id> <0|1>"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Label an analysis window for online learning")
+    parser.add_argument("window_id", help="window_id from data/ml_predictions.json")
+    parser.add_argument("label", type=int, choices=[0, 1], help="1 = confirmed threat, 0 = normal")
+    parser.add_argument("--note", default=None, help="Optional comment")
+    parser.add_argument("--labels-file", default=LABELS_FILE, help=f"Labels JSONL (default: {LABELS_FILE})")
+    args = parser.parse_args()
+
+    append_label(args.window_id, args.label, args.labels_file, args.note)
+    print(f"✅ Labeled {args.window_id} as {'threat' if args.label else 'normal'}")
+
+
+if __name__ == "__main__":
+    main()
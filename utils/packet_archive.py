@@ -0,0 +1,440 @@
+"""
+Columnar archival of packet logs
+Rolls closed packets_log.csv segments into time-partitioned Parquet files
+with typed columns, and loads back only the partitions/columns a reader needs
+"""
+
+import os
+import glob
+import time
+import logging
+import tempfile
+import threading
+from datetime import datetime
+from typing import List, Optional
+import pandas as pd
+
+LOG_FILE = 'data/packets_log.csv'
+SEGMENT_DIR = 'data/segments'
+ARCHIVE_DIR = 'data/archive'
+
+# Canonical packet log schema (packet_capture.py header)
+CANONICAL_COLUMNS = ['Timestamp', 'Src_IP', 'Dst_IP', 'Protocol', 'Src_Port', 'Dst_Port', 'Size']
+
+# Header variants written by other producers (generate_sample_data)
+COLUMN_ALIASES = {
+    'Source IP': 'Src_IP',
+    'Destination IP': 'Dst_IP',
+    'Source Port': 'Src_Port',
+    'Destination Port': 'Dst_Port',
+    'Packet Size': 'Size',
+}
+
+
+def read_packet_csv(path: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a packet log CSV with or without a header row
+
+    live_simulator.py appends headerless rows, packet_capture.py and
+    generate_sample_data write a header, so sniff the first line.
+
+    Args:
+        path: CSV file path
+        usecols: Optional subset of canonical columns to return
+
+    Returns:
+        DataFrame with canonical column names
+    """
+    with open(path, 'r') as f:
+        first_line = f.readline()
+
+    if not first_line.strip():
+        return pd.DataFrame(columns=usecols or CANONICAL_COLUMNS)
+
+    if first_line.startswith('Timestamp'):
+        df = pd.read_csv(path)
+        df = df.rename(columns=COLUMN_ALIASES)
+    else:
+        df = pd.read_csv(path, header=None, names=CANONICAL_COLUMNS)
+
+    if usecols:
+        df = df[[c for c in usecols if c in df.columns]]
+    return df
+
+
+def normalize_packets(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convert a raw packet frame into typed columns for columnar storage
+
+    Args:
+        df: Packet DataFrame with canonical column names
+
+    Returns:
+        Typed DataFrame; rows with unparseable timestamps are dropped
+    """
+    df = df.rename(columns=COLUMN_ALIASES)
+    df = df.reindex(columns=CANONICAL_COLUMNS)
+
+    df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce', format='mixed')
+    df = df.dropna(subset=['Timestamp'])
+
+    for col in ['Src_IP', 'Dst_IP', 'Protocol']:
+        df[col] = df[col].astype(str).astype('category')
+    for col in ['Src_Port', 'Dst_Port']:
+        df[col] = pd.to_numeric(df[col], errors='coerce').astype('Int32')
+    df['Size'] = pd.to_numeric(df['Size'], errors='coerce').fillna(0).astype('int32')
+
+    return df.reset_index(drop=True)
+
+
+def rotate_packet_log(log_file: str = LOG_FILE, segment_dir: str = SEGMENT_DIR,
+                      max_bytes: int = 10 * 1024 * 1024) -> Optional[str]:
+    """
+    Close the active packet log as a segment once it reaches max_bytes
+
+    The active file is renamed into segment_dir and a fresh log is started
+    with the same header line (if the old one had one). Writers open the log
+    per write, so the next append lands in the new file.
+
+    Args:
+        log_file: Active packet log path
+        segment_dir: Directory for closed segments
+        max_bytes: Size threshold that triggers a rotation
+
+    Returns:
+        Path of the closed segment, or None if no rotation happened
+    """
+    if not os.path.exists(log_file):
+        return None
+    size = os.path.getsize(log_file)
+    if size == 0 or size < max_bytes:
+        return None
+
+    with open(log_file, 'r') as f:
+        first_line = f.readline()
+    header = first_line if first_line.startswith('Timestamp') else None
+
+    os.makedirs(segment_dir, exist_ok=True)
+    stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    segment_path = os.path.join(segment_dir, f"packets_{stamp}.csv")
+    os.replace(log_file, segment_path)
+
+    if header:
+        try:
+            # O_EXCL: if a writer already recreated the log, leave it alone
+            fd = os.open(log_file, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+            with os.fdopen(fd, 'w') as f:
+                f.write(header)
+        except FileExistsError:
+            pass
+
+    logging.info(f"📦 Rotated packet log into {segment_path}")
+    return segment_path
+
+
+def _partition_dir(archive_dir: str, hour: pd.Timestamp) -> str:
+    return os.path.join(archive_dir, f"date={hour:%Y-%m-%d}", f"hour={hour:%H}")
+
+
+def compact_segment(segment_path: str, archive_dir: str = ARCHIVE_DIR,
+                    keep_segment: bool = False) -> int:
+    """
+    Convert one closed CSV segment into hourly Parquet partitions
+
+    Args:
+        segment_path: Closed CSV segment
+        archive_dir: Root of the partitioned archive
+        keep_segment: Keep the CSV after a successful conversion
+
+    Returns:
+        Number of rows archived
+    """
+    df = normalize_packets(read_packet_csv(segment_path))
+    stem = os.path.splitext(os.path.basename(segment_path))[0]
+
+    for hour, part in df.groupby(df['Timestamp'].dt.floor('h'), observed=True):
+        part_dir = _partition_dir(archive_dir, hour)
+        os.makedirs(part_dir, exist_ok=True)
+        target = os.path.join(part_dir, f"part-{stem}.parquet")
+
+        # Write to a temp file first so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=part_dir, suffix='.tmp')
+        os.close(fd)
+        part.to_parquet(tmp_path, index=False, compression='zstd')
+        os.replace(tmp_path, target)
+
+    if not keep_segment:
+        os.remove(segment_path)
+
+    logging.info(f"🗜️ Archived {len(df)} rows from {segment_path}")
+    return len(df)
+
+
+def compact_closed_segments(segment_dir: str = SEGMENT_DIR, archive_dir: str = ARCHIVE_DIR,
+                            grace_seconds: float = 5.0, keep_segments: bool = False) -> int:
+    """
+    Archive every segment that has not been written for grace_seconds
+
+    Args:
+        segment_dir: Directory holding closed CSV segments
+        archive_dir: Root of the partitioned archive
+        grace_seconds: Minimum idle time before a segment counts as closed
+        keep_segments: Keep CSV segments after conversion
+
+    Returns:
+        Total rows archived
+    """
+    total = 0
+    now = time.time()
+    for segment_path in sorted(glob.glob(os.path.join(segment_dir, '*.csv'))):
+        if now - os.path.getmtime(segment_path) < grace_seconds:
+            continue
+        try:
+            total += compact_segment(segment_path, archive_dir, keep_segment=keep_segments)
+        except Exception as e:
+            logging.error(f"Error archiving {segment_path}: {e}")
+    return total
+
+
+def list_partitions(archive_dir: str = ARCHIVE_DIR, start: Optional[datetime] = None,
+                    end: Optional[datetime] = None) -> List[str]:
+    """
+    List Parquet files whose hourly partition overlaps [start, end]
+
+    Args:
+        archive_dir: Root of the partitioned archive
+        start: Earliest timestamp needed (inclusive)
+        end: Latest timestamp needed (inclusive)
+
+    Returns:
+        Sorted list of Parquet file paths
+    """
+    start_hour = pd.Timestamp(start).floor('h') if start is not None else None
+    end_hour = pd.Timestamp(end).floor('h') if end is not None else None
+
+    files = []
+    for hour_dir in glob.glob(os.path.join(archive_dir, 'date=*', 'hour=*')):
+        date_part = os.path.basename(os.path.dirname(hour_dir))[len('date='):]
+        hour_part = os.path.basename(hour_dir)[len('hour='):]
+        try:
+            hour = pd.Timestamp(f"{date_part} {hour_part}:00")
+        except ValueError:
+            continue
+        if start_hour is not None and hour < start_hour:
+            continue
+        if end_hour is not None and hour > end_hour:
+            continue
+        files.extend(glob.glob(os.path.join(hour_dir, '*.parquet')))
+    return sorted(files)
+
+
+def load_archived_packets(archive_dir: str = ARCHIVE_DIR, start: Optional[datetime] = None,
+                          end: Optional[datetime] = None,
+                          columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Load archived packets, reading only the partitions and columns needed
+
+    Args:
+        archive_dir: Root of the partitioned archive
+        start: Earliest timestamp needed (inclusive)
+        end: Latest timestamp needed (inclusive)
+        columns: Subset of canonical columns (default: all)
+
+    Returns:
+        DataFrame of archived packets
+    """
+    columns = list(columns or CANONICAL_COLUMNS)
+    read_columns = columns if 'Timestamp' in columns else ['Timestamp'] + columns
+
+    files = list_partitions(archive_dir, start, end)
+    if not files:
+        return pd.DataFrame(columns=columns)
+
+    df = pd.concat([pd.read_parquet(f, columns=read_columns) for f in files], ignore_index=True)
+
+    if start is not None:
+        df = df[df['Timestamp'] >= pd.Timestamp(start)]
+    if end is not None:
+        df = df[df['Timestamp'] <= pd.Timestamp(end)]
+
+    return df[columns].reset_index(drop=True)
+
+
+class PacketLogCompactor:
+    """
+    Background thread that rotates the packet log and archives closed segments
+    """
+
+    def __init__(self, log_file=LOG_FILE, segment_dir=SEGMENT_DIR, archive_dir=ARCHIVE_DIR,
+                 max_bytes=10 * 1024 * 1024, interval=30):
+        """
+        Initialize the compactor
+
+        Args:
+            log_file: Active packet log path
+            segment_dir: Directory for closed segments
+            archive_dir: Root of the partitioned archive
+            max_bytes: Rotate the active log once it reaches this size
+            interval: Seconds between compaction passes
+        """
+        self.log_file = log_file
+        self.segment_dir = segment_dir
+        self.archive_dir = archive_dir
+        self.max_bytes = max_bytes
+        self.interval = interval
+
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def run_once(self, grace_seconds=5.0) -> int:
+        """Rotate if needed and archive all closed segments"""
+        rotate_packet_log(self.log_file, self.segment_dir, self.max_bytes)
+        return compact_closed_segments(self.segment_dir, self.archive_dir, grace_seconds)
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logging.error(f"Packet log compactor error: {e}")
+            self._stop_event.wait(self.interval)
+
+    def start(self):
+        """Start the compactor thread"""
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        logging.info(f"🗜️ Packet log compactor started (every {self.interval}s)")
+
+    def stop(self):
+        """Stop the compactor thread"""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=5)
+
+
+def start_compactor(**kwargs) -> Optional[PacketLogCompactor]:
+    """Start a PacketLogCompactor if a Parquet engine is installed"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        logging.warning("⚠️ pyarrow not installed, packet log archival disabled")
+        return None
+
+    compactor = PacketLogCompactor(**kwargs)
+    compactor.start()
+    return compactor
+
+
+def _dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, f)) for f in files)
+    return total
+
+
+def benchmark_archive(num_rows=1_000_000, hours=24):
+    """
+    Compare full CSV parsing against partition/column-pruned Parquet loads
+
+    Args:
+        num_rows: Number of synthetic packet rows
+        hours: Time span covered by the rows
+
+    Returns:
+        Dictionary of benchmark results
+    """
+    import numpy as np
+
+    rng = np.random.default_rng(42)
+    ips = np.array(['192.168.1.100', '192.168.1.101', '192.168.1.102', '8.8.8.8',
+                    '1.1.1.1', '104.244.42.129', '151.101.1.140', '142.250.185.206'])
+    start = pd.Timestamp('2025-01-01 00:00:00')
+    offsets = np.sort(rng.uniform(0, hours * 3600, num_rows))
+
+    df = pd.DataFrame({
+        'Timestamp': (start + pd.to_timedelta(offsets, unit='s')).strftime('%Y-%m-%d %H:%M:%S.%f'),
+        'Src_IP': rng.choice(ips, num_rows),
+        'Dst_IP': rng.choice(ips, num_rows),
+        'Protocol': rng.choice(np.array(['TCP', 'UDP', 'ICMP']), num_rows),
+        'Src_Port': rng.integers(1024, 65535, num_rows),
+        'Dst_Port': rng.choice(np.array([80, 443, 22, 3389, 8080]), num_rows),
+        'Size': rng.integers(64, 1500, num_rows),
+    })
+
+    results = {'rows': num_rows, 'hours': hours}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, 'packets_log.csv')
+        archive_dir = os.path.join(tmp, 'archive')
+        df.to_csv(csv_path, index=False)
+        results['csv_bytes'] = os.path.getsize(csv_path)
+
+        t0 = time.perf_counter()
+        full = pd.read_csv(csv_path)
+        full['Timestamp'] = pd.to_datetime(full['Timestamp'])
+        results['csv_full_load_s'] = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        compact_segment(csv_path, archive_dir, keep_segment=True)
+        results['compaction_s'] = time.perf_counter() - t0
+        results['parquet_bytes'] = _dir_size(archive_dir)
+
+        t0 = time.perf_counter()
+        load_archived_packets(archive_dir)
+        results['parquet_full_load_s'] = time.perf_counter() - t0
+
+        last_hour = start + pd.Timedelta(hours=hours - 1)
+        t0 = time.perf_counter()
+        load_archived_packets(archive_dir, start=last_hour, columns=['Timestamp', 'Size'])
+        results['parquet_last_hour_2cols_s'] = time.perf_counter() - t0
+
+    return results
+
+
+def main():
+    """Run the compactor, a single compaction pass, or the benchmark"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Packet log Parquet archiver")
+    parser.add_argument("--log", default=LOG_FILE, help="Active packet log (default: data/packets_log.csv)")
+    parser.add_argument("--archive-dir", default=ARCHIVE_DIR, help="Archive root (default: data/archive)")
+    parser.add_argument("--max-mb", type=float, default=10, help="Rotate the log at this size in MB (default: 10)")
+    parser.add_argument("--interval", type=int, default=30, help="Seconds between passes (default: 30)")
+    parser.add_argument("--once", action="store_true", help="Run a single rotate+compact pass and exit")
+    parser.add_argument("--benchmark", type=int, metavar="ROWS", help="Benchmark CSV vs Parquet with ROWS rows")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s [%(levelname)s] %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S"
+    )
+
+    if args.benchmark:
+        results = benchmark_archive(num_rows=args.benchmark)
+        print("\n📊 Archive Benchmark:")
+        for key, value in results.items():
+            print(f"  {key:28s} {value:.3f}" if isinstance(value, float) else f"  {key:28s} {value:,}")
+        return
+
+    compactor = PacketLogCompactor(
+        log_file=args.log,
+        archive_dir=args.archive_dir,
+        max_bytes=int(args.max_mb * 1024 * 1024),
+        interval=args.interval
+    )
+
+    if args.once:
+        compactor.max_bytes = 0
+        compactor.run_once(grace_seconds=0)
+        return
+
+    compactor.start()
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        compactor.stop()
+
+
+if __name__ == "__main__":
+    main()
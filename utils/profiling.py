@@ -0,0 +1,228 @@
+"""
+Built-in profiling mode for the realtime analyzer
+Sampled per-stage timers, a stack sampler producing flame-graph input
+(collapsed stacks), and optional cProfile/tracemalloc captures for the
+first N analysis windows
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import cProfile
+import threading
+import functools
+import tracemalloc
+from collections import Counter, deque
+from typing import Dict
+
+import numpy as np
+
+
+class StackSampler:
+    """
+    Periodically sample every thread's Python stack into collapsed-stack counts
+    """
+
+    def __init__(self, interval=0.01, max_depth=64):
+        """
+        Initialize the sampler
+
+        Args:
+            interval: Seconds between samples
+            max_depth: Maximum frames kept per stack
+        """
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = Counter()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        own_id = threading.get_ident()
+        names = {t.ident: t.name for t in threading.enumerate()}
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_id:
+                continue
+            frames = []
+            while frame is not None and len(frames) < self.max_depth:
+                code = frame.f_code
+                frames.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})")
+                frame = frame.f_back
+            frames.append(names.get(thread_id, str(thread_id)))
+            self.stacks[';'.join(reversed(frames))] += 1
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self._sample()
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True, name='stack-sampler')
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join(timeout=1)
+
+    def write_folded(self, path: str):
+        """Write counts in the collapsed format read by flamegraph.pl and speedscope"""
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class StageProfiler:
+    """
+    Low-overhead instrumentation of named stages plus per-window deep captures
+    """
+
+    def __init__(self, sample_every=10, profile_windows=0, output_dir='data/profile',
+                 max_samples=100_000):
+        """
+        Initialize the profiler
+
+        Args:
+            sample_every: Time 1 in N calls of each stage (1 = every call)
+            profile_windows: Run cProfile and tracemalloc for the first N analysis windows
+            output_dir: Directory for the reports written by finish()
+            max_samples: Latency samples kept per stage for percentiles
+        """
+        self.sample_every = max(1, sample_every)
+        self.profile_windows = profile_windows
+        self.output_dir = output_dir
+        self.max_samples = max_samples
+
+        self.calls = Counter()
+        self.samples = {}
+        self.started_at = time.time()
+
+        self.sampler = StackSampler()
+        self.cprofile = cProfile.Profile() if profile_windows else None
+        self.windows_profiled = 0
+        self.allocation_snapshot = None
+
+    def start(self):
+        """Start the stack sampler (and tracemalloc when deep capture is on)"""
+        self.sampler.start()
+        if self.profile_windows:
+            tracemalloc.start(25)
+        logging.info(
+            f"🔬 Profiling enabled (1/{self.sample_every} calls timed, "
+            f"{self.profile_windows} deep-profiled windows)"
+        )
+
+    def wrap(self, obj, method_name: str, stage: str = None):
+        """
+        Replace obj.method_name with a sampled timing wrapper
+
+        Args:
+            obj: Instance whose method is instrumented
+            method_name: Method to wrap
+            stage: Stage label in the report (default: method name)
+        """
+        stage = stage or method_name
+        method = getattr(obj, method_name)
+        samples = self.samples.setdefault(stage, deque(maxlen=self.max_samples))
+        calls = self.calls
+        every = self.sample_every
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            calls[stage] += 1
+            if calls[stage] % every:
+                return method(*args, **kwargs)
+            started = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                samples.append(time.perf_counter_ns() - started)
+
+        setattr(obj, method_name, timed)
+
+    def wrap_window(self, obj, method_name: str):
+        """Wrap the per-window method so the first N windows run under cProfile"""
+        method = getattr(obj, method_name)
+
+        @functools.wraps(method)
+        def windowed(*args, **kwargs):
+            if self.windows_profiled >= self.profile_windows:
+                return method(*args, **kwargs)
+            self.cprofile.enable()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.cprofile.disable()
+                self.windows_profiled += 1
+                if self.windows_profiled == self.profile_windows:
+                    self._take_allocation_snapshot()
+
+        setattr(obj, method_name, windowed)
+        self.wrap(obj, method_name, stage='window')
+
+    def _take_allocation_snapshot(self):
+        if tracemalloc.is_tracing():
+            self.allocation_snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+
+    def stage_summary(self) -> Dict:
+        """Latency summary per stage in microseconds"""
+        summary = {}
+        for stage, samples in self.samples.items():
+            if not samples:
+                summary[stage] = {'calls': self.calls[stage], 'sampled': 0}
+                continue
+            us = np.asarray(samples, dtype=float) / 1000
+            summary[stage] = {
+                'calls': self.calls[stage],
+                'sampled': len(us),
+                'mean_us': float(us.mean()),
+                'p50_us': float(np.percentile(us, 50)),
+                'p99_us': float(np.percentile(us, 99)),
+                'max_us': float(us.max()),
+                'est_total_s': float(us.mean() * self.calls[stage] / 1e6),
+            }
+        return summary
+
+    def finish(self) -> str:
+        """
+        Stop sampling and write all reports
+
+        Returns:
+            Path of the report directory
+        """
+        self.sampler.stop()
+        if self.profile_windows and self.allocation_snapshot is None:
+            self._take_allocation_snapshot()
+
+        run_dir = os.path.join(self.output_dir, time.strftime('%Y%m%d-%H%M%S'))
+        os.makedirs(run_dir, exist_ok=True)
+
+        summary = self.stage_summary()
+        with open(os.path.join(run_dir, 'stages.json'), 'w') as f:
+            json.dump({'duration_s': time.time() - self.started_at,
+                       'sample_every': self.sample_every, 'stages': summary}, f, indent=2)
+
+        self.sampler.write_folded(os.path.join(run_dir, 'stacks.folded'))
+
+        if self.cprofile is not None and self.windows_profiled:
+            self.cprofile.dump_stats(os.path.join(run_dir, 'windows.pstats'))
+
+        if self.allocation_snapshot is not None:
+            with open(os.path.join(run_dir, 'allocations.txt'), 'w') as f:
+                top = self.allocation_snapshot.statistics('lineno')
+                total = sum(stat.size for stat in top)
+                f.write(f"Total traced: {total / 1024:.1f} KiB in {len(top)} locations\n\n")
+                for stat in top[:30]:
+                    f.write(f"{stat}\n")
+
+        logging.info("🔬 Stage latency (sampled):")
+        for stage, stats in sorted(summary.items(), key=lambda kv: -kv[1].get('est_total_s', 0)):
+            if stats.get('sampled'):
+                logging.info(
+                    f"   {stage:32s} calls={stats['calls']:>8} p50={stats['p50_us']:>9.1f}us "
+                    f"p99={stats['p99_us']:>9.1f}us"
+                )
+        logging.info(f"🔬 Profile written to {run_dir} (flame graph: stacks.folded)")
+        return run_dir
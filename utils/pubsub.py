@@ -0,0 +1,229 @@
+"""
+Local pub/sub channel between the analyzer and the dashboard
+Newline-delimited JSON over a localhost TCP socket: producers publish
+change events per topic, the dashboard reruns only when something changed
+"""
+
+import json
+import select
+import socket
+import logging
+import threading
+from typing import Dict, Optional
+
+PUBSUB_HOST = '127.0.0.1'
+PUBSUB_PORT = 8766
+
+# Topics used across the project
+TOPIC_PREDICTIONS = 'predictions'
+TOPIC_STATS = 'stats'
+TOPIC_PACKETS = 'packets'
+TOPIC_ROLLUPS = 'rollups'
+
+
+class _Client:
+    __slots__ = ('conn', 'pending')
+
+    def __init__(self, conn: socket.socket):
+        self.conn = conn
+        self.pending = bytearray()  # encoded messages not yet accepted by the socket
+
+
+class EventPublisher:
+    """
+    Broadcast topic events to every connected subscriber
+
+    publish() only appends to per-subscriber buffers; a sender thread writes
+    them with non-blocking sends, so a stalled subscriber never delays the
+    publisher and is disconnected once its backlog exceeds max_pending bytes.
+    """
+
+    def __init__(self, host=PUBSUB_HOST, port=PUBSUB_PORT, max_pending=256 * 1024):
+        """
+        Initialize the publisher and start accepting subscribers
+
+        Args:
+            host: Interface to bind (localhost only by default)
+            port: TCP port to listen on
+            max_pending: Unsent bytes after which a slow subscriber is dropped
+        """
+        self.host = host
+        self.port = port
+        self.max_pending = max_pending
+        self.seq = 0
+        self.latest = {}  # topic -> last encoded message, replayed to new subscribers
+        self.clients = []
+        self.dropped = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._running = True
+
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._server.bind((host, port))
+        self._server.listen()
+        self._server.settimeout(0.5)
+
+        self._accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        self._accept_thread.start()
+        self._send_thread = threading.Thread(target=self._send_loop, daemon=True)
+        self._send_thread.start()
+        logging.info(f"📣 Event publisher listening on {host}:{port}")
+
+    def _accept_loop(self):
+        while self._running:
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+
+            conn.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            conn.setblocking(False)
+            client = _Client(conn)
+            with self._lock:
+                for message in self.latest.values():
+                    client.pending += message
+                self.clients.append(client)
+            self._wake.set()
+
+    def _drop(self, client: _Client):
+        """Disconnect a subscriber (caller holds _lock)"""
+        client.conn.close()
+        if client in self.clients:
+            self.clients.remove(client)
+
+    def _send_loop(self):
+        while self._running:
+            self._wake.clear()
+            with self._lock:
+                waiting = [c for c in self.clients if c.pending]
+            if not waiting:
+                self._wake.wait(0.5)
+                continue
+            try:
+                _, writable, _ = select.select([], [c.conn for c in waiting], [], 0.5)
+            except (OSError, ValueError):
+                writable = []  # a socket was closed meanwhile; re-evaluate
+            with self._lock:
+                for client in waiting:
+                    if client.conn not in writable or client not in self.clients:
+                        continue
+                    try:
+                        sent = client.conn.send(client.pending)
+                        del client.pending[:sent]
+                    except BlockingIOError:
+                        pass
+                    except OSError:
+                        self._drop(client)
+
+    def publish(self, topic: str, payload=None):
+        """
+        Send an event to all subscribers
+
+        Args:
+            topic: Topic name (e.g. 'predictions')
+            payload: Small JSON-serializable body; subscribers re-read files for bulk data
+        """
+        with self._lock:
+            self.seq += 1
+            message = (json.dumps({'topic': topic, 'seq': self.seq, 'payload': payload}, default=str) + '\n').encode()
+            self.latest[topic] = message
+
+            for client in list(self.clients):
+                if len(client.pending) + len(message) > self.max_pending:
+                    # Subscriber stopped reading; it reconnects and gets the latest events replayed
+                    self._drop(client)
+                    self.dropped += 1
+                    continue
+                client.pending += message
+        self._wake.set()
+
+    def close(self):
+        """Stop accepting subscribers and disconnect existing ones"""
+        self._running = False
+        self._wake.set()
+        self._server.close()
+        with self._lock:
+            for client in self.clients:
+                client.conn.close()
+            self.clients = []
+
+
+def start_publisher(host=PUBSUB_HOST, port=PUBSUB_PORT) -> Optional[EventPublisher]:
+    """Start an EventPublisher, or return None if the port is already taken"""
+    try:
+        return EventPublisher(host, port)
+    except OSError as e:
+        logging.warning(f"⚠️ Event publisher disabled ({host}:{port}: {e})")
+        return None
+
+
+class EventSubscriber:
+    """
+    Background subscriber that tracks a version counter per topic
+    """
+
+    def __init__(self, host=PUBSUB_HOST, port=PUBSUB_PORT, retry_interval=1.0):
+        """
+        Initialize the subscriber and start its receive thread
+
+        Args:
+            host: Publisher host
+            port: Publisher port
+            retry_interval: Seconds between reconnection attempts
+        """
+        self.host = host
+        self.port = port
+        self.retry_interval = retry_interval
+
+        self.connected = False
+        self.versions = {}  # topic -> number of events received
+        self.latest = {}    # topic -> last payload
+        self._changed = threading.Condition()
+        self._stop_event = threading.Event()
+
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                with socket.create_connection((self.host, self.port), timeout=self.retry_interval) as sock:
+                    sock.settimeout(None)
+                    self.connected = True
+                    for line in sock.makefile('rb'):
+                        event = json.loads(line)
+                        topic = event.get('topic')
+                        with self._changed:
+                            self.versions[topic] = self.versions.get(topic, 0) + 1
+                            self.latest[topic] = event.get('payload')
+                            self._changed.notify_all()
+            except (OSError, ValueError):
+                pass
+            self.connected = False
+            self._stop_event.wait(self.retry_interval)
+
+    def snapshot(self) -> Dict[str, int]:
+        """Return a copy of the per-topic version counters"""
+        with self._changed:
+            return dict(self.versions)
+
+    def wait_for_change(self, since: Dict[str, int], timeout: float) -> bool:
+        """
+        Block until any topic version differs from since
+
+        Args:
+            since: Versions previously returned by snapshot()
+            timeout: Maximum seconds to wait
+
+        Returns:
+            True if something changed
+        """
+        with self._changed:
+            return self._changed.wait_for(lambda: self.versions != since, timeout=timeout)
+
+    def close(self):
+        """Stop reconnecting (the receive thread is a daemon)"""
+        self._stop_event.set()
@@ -0,0 +1,222 @@
+"""
+Precomputed traffic rollups for the dashboard
+Maintained incrementally by the capture pipeline and persisted to a small
+JSON file, so the Advanced Statistics tab never has to scan raw packets
+"""
+
+import os
+import json
+import bisect
+import heapq
+import tempfile
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+ROLLUPS_FILE = 'data/packet_rollups.json'
+
+# Fixed packet size bins (bytes); the last bin catches jumbo frames
+SIZE_BIN_EDGES = list(range(0, 1550, 50)) + [65536]
+
+
+class SpaceSaving:
+    """
+    Space-Saving top-k sketch: bounded counters with per-item error bounds
+    """
+
+    def __init__(self, capacity=100):
+        self.capacity = capacity
+        self.counters = {}  # item -> [count, error]
+
+    def update(self, item, count=1):
+        """Add count occurrences of item"""
+        entry = self.counters.get(item)
+        if entry is not None:
+            entry[0] += count
+        elif len(self.counters) < self.capacity:
+            self.counters[item] = [count, 0]
+        else:
+            # Replace the smallest counter; its count becomes the new item's error
+            victim = min(self.counters, key=lambda k: self.counters[k][0])
+            floor = self.counters.pop(victim)[0]
+            self.counters[item] = [floor + count, floor]
+
+    def update_many(self, counts):
+        """
+        Add a batch of (item, count) pairs
+
+        Same result as calling update() per pair, but evictions use a lazy
+        min-heap, so a batch with many new items costs O(log capacity) each
+        """
+        heap = None
+        for item, count in counts:
+            entry = self.counters.get(item)
+            if entry is not None:
+                entry[0] += count
+                continue
+            if len(self.counters) < self.capacity:
+                self.counters[item] = [count, 0]
+                continue
+
+            if heap is None:
+                heap = [(entry[0], key) for key, entry in self.counters.items()]
+                heapq.heapify(heap)
+            # Skip heap entries made stale by increments since they were pushed
+            while True:
+                floor, victim = heapq.heappop(heap)
+                if self.counters[victim][0] == floor:
+                    break
+                heapq.heappush(heap, (self.counters[victim][0], victim))
+            del self.counters[victim]
+            self.counters[item] = [floor + count, floor]
+            heapq.heappush(heap, (floor + count, item))
+
+    def top(self, n=10) -> List[Tuple[str, int]]:
+        """Return the n heaviest items as (item, estimated count)"""
+        ranked = sorted(self.counters.items(), key=lambda kv: kv[1][0], reverse=True)
+        return [(item, entry[0]) for item, entry in ranked[:n]]
+
+    def to_dict(self) -> Dict:
+        return {'capacity': self.capacity, 'counters': self.counters}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SpaceSaving':
+        sketch = cls(data.get('capacity', 100))
+        sketch.counters = {k: list(v) for k, v in data.get('counters', {}).items()}
+        return sketch
+
+
+class TrafficRollup:
+    """
+    Per-minute counts, protocol counters, top-k IP/port sketches and a
+    fixed-bin size histogram, all updatable one packet or one batch at a time
+    """
+
+    def __init__(self, max_minutes=1440, top_k=100):
+        """
+        Initialize an empty rollup
+
+        Args:
+            max_minutes: Number of most recent minutes kept in the timeline
+            top_k: Capacity of each top-k sketch
+        """
+        self.max_minutes = max_minutes
+        self.total_packets = 0
+        self.total_bytes = 0
+        self.minute_counts = {}
+        self.protocol_counts = Counter()
+        self.src_ips = SpaceSaving(top_k)
+        self.dst_ports = SpaceSaving(top_k)
+        self.size_hist = np.zeros(len(SIZE_BIN_EDGES) - 1, dtype=np.int64)
+
+    def _trim_minutes(self):
+        if len(self.minute_counts) > self.max_minutes:
+            for minute in sorted(self.minute_counts)[:-self.max_minutes]:
+                del self.minute_counts[minute]
+
+    def update(self, timestamp, src_ip, protocol, dst_port, size):
+        """
+        Add a single packet
+
+        Args:
+            timestamp: datetime of the packet
+            src_ip: Source IP address
+            protocol: Protocol name or number
+            dst_port: Destination port (None for portless protocols)
+            size: Packet size in bytes
+        """
+        minute = timestamp.strftime('%Y-%m-%d %H:%M')
+        self.minute_counts[minute] = self.minute_counts.get(minute, 0) + 1
+        self.protocol_counts[str(protocol)] += 1
+        self.src_ips.update(str(src_ip))
+        if dst_port is not None:
+            self.dst_ports.update(str(dst_port))
+
+        bin_idx = bisect.bisect_right(SIZE_BIN_EDGES, size) - 1
+        self.size_hist[min(max(bin_idx, 0), len(self.size_hist) - 1)] += 1
+
+        self.total_packets += 1
+        self.total_bytes += int(size)
+        self._trim_minutes()
+
+    def update_frame(self, df: pd.DataFrame):
+        """
+        Add a batch of packets in canonical packet log columns
+
+        Args:
+            df: DataFrame with Timestamp, Src_IP, Protocol, Dst_Port, Size
+        """
+        if df.empty:
+            return
+
+        # Format each distinct minute once rather than every row
+        minutes = pd.to_datetime(df['Timestamp'], errors='coerce', format='mixed').dt.floor('min').value_counts()
+        for minute, count in zip(minutes.index.strftime('%Y-%m-%d %H:%M'), minutes.tolist()):
+            self.minute_counts[minute] = self.minute_counts.get(minute, 0) + count
+
+        for proto, count in df['Protocol'].astype(str).value_counts().items():
+            self.protocol_counts[proto] += int(count)
+        src_counts = df['Src_IP'].astype(str).value_counts()
+        self.src_ips.update_many(zip(src_counts.index, src_counts.tolist()))
+        port_counts = df['Dst_Port'].dropna().astype('int64').astype(str).value_counts()
+        self.dst_ports.update_many(zip(port_counts.index, port_counts.tolist()))
+
+        sizes = pd.to_numeric(df['Size'], errors='coerce').fillna(0).to_numpy()
+        hist, _ = np.histogram(np.clip(sizes, 0, SIZE_BIN_EDGES[-1] - 1), bins=SIZE_BIN_EDGES)
+        self.size_hist += hist
+
+        self.total_packets += len(df)
+        self.total_bytes += int(sizes.sum())
+        self._trim_minutes()
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, **kwargs) -> 'TrafficRollup':
+        """Build a rollup from raw packet rows (fallback when no rollup file exists)"""
+        rollup = cls(**kwargs)
+        rollup.update_frame(df)
+        return rollup
+
+    def to_dict(self) -> Dict:
+        return {
+            'total_packets': self.total_packets,
+            'total_bytes': self.total_bytes,
+            'max_minutes': self.max_minutes,
+            'minute_counts': self.minute_counts,
+            'protocol_counts': dict(self.protocol_counts),
+            'src_ips': self.src_ips.to_dict(),
+            'dst_ports': self.dst_ports.to_dict(),
+            'size_bin_edges': SIZE_BIN_EDGES,
+            'size_hist': self.size_hist.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TrafficRollup':
+        rollup = cls(max_minutes=data.get('max_minutes', 1440))
+        rollup.total_packets = data.get('total_packets', 0)
+        rollup.total_bytes = data.get('total_bytes', 0)
+        rollup.minute_counts = dict(data.get('minute_counts', {}))
+        rollup.protocol_counts = Counter(data.get('protocol_counts', {}))
+        rollup.src_ips = SpaceSaving.from_dict(data.get('src_ips', {}))
+        rollup.dst_ports = SpaceSaving.from_dict(data.get('dst_ports', {}))
+        if data.get('size_bin_edges') == SIZE_BIN_EDGES:
+            rollup.size_hist = np.array(data.get('size_hist'), dtype=np.int64)
+        return rollup
+
+    def save(self, path: str = ROLLUPS_FILE):
+        """Atomically write the rollup so readers never see a partial file"""
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+
+def load_rollups(path: str = ROLLUPS_FILE) -> Optional[TrafficRollup]:
+    """Load a persisted rollup, or None if it is missing or unreadable"""
+    try:
+        with open(path, 'r') as f:
+            return TrafficRollup.from_dict(json.load(f))
+    except (OSError, ValueError):
+        return None
@@ -0,0 +1,147 @@
+"""
+Half-open TCP connection tracking for SYN-flood detection
+Remembers client SYNs that have not been followed by the handshake ACK (or
+a RST) and counts them per destination in a bounded table
+"""
+
+import threading
+from collections import Counter, OrderedDict
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+# TCP flag bits as stored in the packet records' 'flags' field
+TCP_FIN = 0x01
+TCP_SYN = 0x02
+TCP_RST = 0x04
+TCP_PSH = 0x08
+TCP_ACK = 0x10
+TCP_URG = 0x20
+
+
+def flag_array(flags: pd.Series) -> np.ndarray:
+    """uint8 flag bitfield of a 'flags' column (None/NaN for non-TCP packets -> 0)"""
+    return pd.to_numeric(flags, errors='coerce').fillna(0).to_numpy(dtype=np.uint8)
+
+
+class HalfOpenTable:
+    """
+    Bounded table of half-open connections keyed by (src, sport, dst, dport)
+
+    Entries leave the table when the client ACKs, either side resets, the
+    entry is older than timeout, or the table is full (oldest first).
+    """
+
+    def __init__(self, max_entries=100_000, timeout=30.0):
+        """
+        Initialize the table
+
+        Args:
+            max_entries: Hard cap on tracked half-open connections
+            timeout: Seconds after which an unanswered SYN is forgotten
+        """
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self.entries = OrderedDict()  # (src, sport, dst, dport) -> first SYN time, oldest first
+        self.per_dst = Counter()
+        self.evicted = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def _remove(self, key):
+        if self.entries.pop(key, None) is not None:
+            dst = key[2]
+            self.per_dst[dst] -= 1
+            if self.per_dst[dst] <= 0:
+                del self.per_dst[dst]
+
+    def _expire(self, now: float):
+        # Entries are in insertion (time) order, so expiry stops at the first fresh one
+        while self.entries:
+            key, first_seen = next(iter(self.entries.items()))
+            if now - first_seen <= self.timeout:
+                break
+            self._remove(key)
+
+    def expire(self, now: float) -> int:
+        """
+        Forget SYNs older than timeout at time now
+
+        update() only ages the table by packet time, so the analyzer calls
+        this every window to age it on a quiet link as well.
+
+        Args:
+            now: Current time in the packet timestamp clock (seconds)
+
+        Returns:
+            Number of entries removed
+        """
+        with self._lock:
+            before = len(self.entries)
+            self._expire(now)
+            return before - len(self.entries)
+
+    def update(self, packets: pd.DataFrame, now: Optional[float] = None) -> Dict:
+        """
+        Apply the packets new since the last call (each packet exactly once)
+
+        Args:
+            packets: Frame with timestamp, src_ip, dst_ip, src_port, dst_port, flags
+            now: Time entries expire against (default: the newest packet timestamp)
+
+        Returns:
+            Dictionary with max_half_open_per_dst and the destination it belongs to
+        """
+        # Packet time, not wall-clock time, so replayed or late windows age correctly
+        times = ((packets['timestamp'] - pd.Timestamp(0)) / pd.Timedelta(seconds=1)).to_numpy() \
+            if len(packets) else np.zeros(0)
+        if now is None:
+            now = float(times.max()) if len(times) else None
+        if 'flags' in packets and len(packets):
+            flags = flag_array(packets['flags'])
+            syn_only = (flags & TCP_SYN).astype(bool) & ~(flags & TCP_ACK).astype(bool)
+            # Client's handshake ACK, or a RST from either side, closes the half-open entry
+            ack_only = (flags & TCP_ACK).astype(bool) & ~(flags & TCP_SYN).astype(bool)
+            rst = (flags & TCP_RST).astype(bool)
+
+            columns = [packets[c].to_numpy() for c in ('src_ip', 'src_port', 'dst_ip', 'dst_port')]
+            # First SYN time per connection
+            opened = {}
+            for key, ts in zip(zip(*(c[syn_only] for c in columns)), times[syn_only].tolist()):
+                opened.setdefault(key, ts)
+            closed = set(zip(*(c[ack_only | rst] for c in columns)))
+            # A server RST travels dst -> src, so also close the reversed tuple
+            closed |= {(dst, dport, src, sport) for src, sport, dst, dport in zip(*(c[rst] for c in columns))}
+        else:
+            opened, closed = {}, set()
+
+        with self._lock:
+            for key in closed:
+                self._remove(key)
+            for key, first_syn in sorted(opened.items(), key=lambda item: item[1]):
+                if key in closed or key in self.entries:
+                    continue
+                self.entries[key] = first_syn
+                self.per_dst[key[2]] += 1
+                if len(self.entries) > self.max_entries:
+                    self._remove(next(iter(self.entries)))
+                    self.evicted += 1
+
+            if now is not None:
+                self._expire(now)
+
+            top = self.per_dst.most_common(1)
+        dst, count = top[0] if top else (None, 0)
+        return {'max_half_open_per_dst': count, 'half_open_top_dst': dst}
+
+    def get_status(self) -> Dict:
+        with self._lock:
+            return {
+                'half_open': len(self.entries),
+                'max_entries': self.max_entries,
+                'evicted': self.evicted,
+                'top_destinations': self.per_dst.most_common(5),
+            }
@@ -0,0 +1,163 @@
+"""
+Incremental file readers for the dashboard
+Remember byte offsets and mtimes per file so a refresh only parses what
+changed since the previous rerun
+"""
+
+import io
+import os
+import json
+import threading
+import pandas as pd
+
+from utils.packet_archive import CANONICAL_COLUMNS, COLUMN_ALIASES
+
+
+class CsvTailReader:
+    """
+    Tail a growing packet log CSV into a bounded in-memory DataFrame
+    """
+
+    def __init__(self, path, max_rows=100_000, chunk_bytes=64 * 1024 * 1024):
+        """
+        Initialize the tail reader
+
+        Args:
+            path: Packet log CSV path
+            max_rows: Maximum rows kept in memory (oldest rows are dropped)
+            chunk_bytes: Maximum bytes parsed per read() call
+        """
+        self.path = path
+        self.max_rows = max_rows
+        self.chunk_bytes = chunk_bytes
+
+        self.offset = 0
+        self.inode = None
+        self.mtime_ns = None
+        self.head = b''
+        self.columns = None
+        self.frame = pd.DataFrame()
+        self._lock = threading.Lock()
+
+    def _reset(self, keep_frame: bool):
+        self.offset = 0
+        self.head = b''
+        self.columns = None
+        if not keep_frame:
+            self.frame = pd.DataFrame()
+
+    def _parse(self, data: bytes) -> pd.DataFrame:
+        """Parse complete CSV lines into typed rows"""
+        if self.columns is None:
+            newline = data.find(b'\n')
+            first_line = data[:newline].decode(errors='replace')
+            if first_line.startswith('Timestamp'):
+                self.columns = [COLUMN_ALIASES.get(c, c) for c in first_line.strip().split(',')]
+                data = data[newline + 1:]
+            else:
+                self.columns = CANONICAL_COLUMNS
+
+        if not data.strip():
+            return pd.DataFrame(columns=self.columns)
+
+        df = pd.read_csv(io.BytesIO(data), header=None, names=self.columns)
+        if 'Timestamp' in df.columns:
+            df['Timestamp'] = pd.to_datetime(df['Timestamp'], errors='coerce', format='mixed')
+        return df
+
+    def read(self) -> pd.DataFrame:
+        """
+        Parse rows appended since the last call and return the current frame
+
+        Returns:
+            Shallow copy of the bounded in-memory frame
+        """
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                return self.frame.copy(deep=False)
+
+            if self.inode is not None and st.st_ino != self.inode:
+                # Log rotated: rows read so far stay valid, start the new file from 0
+                self._reset(keep_frame=True)
+            elif st.st_size < self.offset:
+                # Log truncated or rewritten in place: drop everything
+                self._reset(keep_frame=False)
+            elif st.st_size == self.offset and st.st_mtime_ns == self.mtime_ns:
+                return self.frame.copy(deep=False)
+
+            self.inode = st.st_ino
+            self.mtime_ns = st.st_mtime_ns
+
+            with open(self.path, 'rb') as f:
+                if self.head and f.read(len(self.head)) != self.head:
+                    # Same inode but different leading bytes: file was rewritten
+                    self._reset(keep_frame=False)
+                f.seek(self.offset)
+                data = f.read(min(st.st_size - self.offset, self.chunk_bytes))
+
+            # Only consume complete lines; a partial trailing row waits for next time
+            end = data.rfind(b'\n')
+            if end < 0:
+                return self.frame.copy(deep=False)
+            data = data[:end + 1]
+            if self.offset == 0:
+                self.head = data[:256]
+
+            try:
+                new_rows = self._parse(data)
+            except Exception:
+                new_rows = pd.DataFrame()
+            self.offset += len(data)
+
+            if not new_rows.empty:
+                if self.frame.empty:
+                    self.frame = new_rows
+                else:
+                    self.frame = pd.concat([self.frame, new_rows], ignore_index=True)
+                if len(self.frame) > self.max_rows:
+                    self.frame = self.frame.iloc[-self.max_rows:].reset_index(drop=True)
+
+            return self.frame.copy(deep=False)
+
+
+class JsonFileCache:
+    """
+    Re-parse a JSON file only when its mtime or size changes
+    """
+
+    def __init__(self, path, default=None):
+        """
+        Initialize the cache
+
+        Args:
+            path: JSON file path
+            default: Value returned while the file is missing or unreadable
+        """
+        self.path = path
+        self.default = default
+        self.signature = None
+        self.value = default
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Return the parsed file contents, reloading only if it changed"""
+        with self._lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self.signature = None
+                self.value = self.default
+                return self.value
+
+            signature = (st.st_ino, st.st_mtime_ns, st.st_size)
+            if signature != self.signature:
+                try:
+                    with open(self.path, 'r') as f:
+                        self.value = json.load(f)
+                    self.signature = signature
+                except (OSError, ValueError):
+                    # Writer is mid-rewrite; keep serving the previous value
+                    pass
+            return self.value